@@ -58,6 +58,12 @@ Examples:
         help="LLM workflow to use (default: gpt_mistral)"
     )
     
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Run every workflow on the problem in parallel and compare the results"
+    )
+    
     parser.add_argument(
         "--profile",
         default="Sifat",
@@ -70,6 +76,12 @@ Examples:
         help="Base directory for storing results (default: problems_solved)"
     )
     
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Start over at attempt 1 instead of resuming an earlier run from solving_log.json (always in replay mode)"
+    )
+    
     parser.add_argument(
         "--verbose", "-v",
         action="store_true",
@@ -92,7 +104,30 @@ Examples:
     # Convert workflow string to enum
     workflow_type = WorkflowType.GPT_MISTRAL if args.workflow == "gpt_mistral" else WorkflowType.GPT_GROQ
     
-    solver = AutomatedProblemSolver(base_dir=args.base_dir, workflow_type=workflow_type)
+    solver = AutomatedProblemSolver(base_dir=args.base_dir, workflow_type=workflow_type, resume=False if args.restart else None)
+    
+    if args.compare:
+        comparison = solver.compare_workflows(
+            problem_id=args.problem_id,
+            max_attempts=args.max_attempts,
+            chromium_profile=args.profile
+        )
+        if "error" in comparison:
+            print(f"\n❌ Error: {comparison['error']}")
+            sys.exit(3)
+        
+        print("\n" + "⚖️  WORKFLOW COMPARISON" + "\n" + "=" * 60)
+        for workflow, result in comparison["results"].items():
+            status = "✅" if result.get("accepted") else "❌"
+            print(f"{status} {workflow}: {result.get('status', result.get('error', 'unknown'))} "
+                  f"({comparison['workflow_seconds'][workflow] / 60:.1f} minutes)")
+        print(f"⏱️  Wall time: {comparison['wall_seconds'] / 60:.1f} minutes")
+        
+        if args.verbose:
+            print(f"\n🔍 DETAILED RESULT:")
+            print(json.dumps(comparison, indent=2))
+        
+        sys.exit(0 if comparison["accepted_by"] else 1)
     
     try:
         # Start solving
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Batch Problem Solver CLI
+
+Runs the automated feedback loop for many problems and workflows at once.
+Every (problem, workflow) pair is an independent job; up to --concurrency
+jobs run at the same time. Results land in the usual
+problems_solved/<id>/<workflow>/ layout plus a batch_results_*.json summary.
+
+Usage:
+    python3 apps/cli/batch_solve.py 2041_A 2043_C
+    python3 apps/cli/batch_solve.py --all --workflows gpt_deepseek gpt5_deepseek --concurrency 8
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from core.batch_solver import BatchSolver, list_problem_ids
+from core.config import BATCH_CONCURRENCY, METRICS_PORT
+from core.workflow_manager import WorkflowType
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Solve many problems with many LLM workflows concurrently",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python3 apps/cli/batch_solve.py 2041_A 2043_C
+  python3 apps/cli/batch_solve.py --all --concurrency 8
+  python3 apps/cli/batch_solve.py --all --workflows gpt_deepseek gpt5_groq --max-attempts 4
+        """
+    )
+
+    parser.add_argument(
+        "problem_ids",
+        nargs="*",
+        help="Problem identifiers in format CONTEST_ID_LETTER (e.g., 2045_A)"
+    )
+
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Solve every problem found in --problems-dir"
+    )
+
+    parser.add_argument(
+        "--problems-dir",
+        default="problems",
+        help="Directory with <contest>-<letter>.json problem files (default: problems)"
+    )
+
+    parser.add_argument(
+        "--workflows",
+        nargs="+",
+        choices=[wf.value for wf in WorkflowType],
+        default=[wf.value for wf in WorkflowType],
+        help="LLM workflows to run for each problem (default: all)"
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=BATCH_CONCURRENCY,
+        help=f"Maximum number of solve loops running at once (default: {BATCH_CONCURRENCY})"
+    )
+
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="Maximum number of solution attempts per job (default: 3)"
+    )
+
+    parser.add_argument(
+        "--profile",
+        default="Sifat",
+        help="Chromium profile to use for Codeforces submission (default: Sifat)"
+    )
+
+    parser.add_argument(
+        "--base-dir",
+        default="problems_solved",
+        help="Base directory for storing results (default: problems_solved)"
+    )
+
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Rerun finished jobs and start interrupted ones over instead of resuming them (always in replay mode)"
+    )
+
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=METRICS_PORT,
+        help="Serve Prometheus metrics on this port while the batch runs (default: METRICS_PORT or off)"
+    )
+
+    args = parser.parse_args()
+
+    problem_ids = list(args.problem_ids)
+    if args.all:
+        problem_ids += [pid for pid in list_problem_ids(args.problems_dir) if pid not in problem_ids]
+
+    if not problem_ids:
+        parser.error("provide at least one problem id or --all")
+
+    workflows = [WorkflowType(value) for value in args.workflows]
+
+    solver = BatchSolver(base_dir=args.base_dir, max_concurrency=args.concurrency, metrics_port=args.metrics_port,
+                         resume=False if args.restart else None)
+
+    try:
+        summary = solver.solve_batch(
+            problem_ids=problem_ids,
+            workflows=workflows,
+            max_attempts=args.max_attempts,
+            chromium_profile=args.profile
+        )
+    except KeyboardInterrupt:
+        print("\n⚠️  Interrupted by user")
+        sys.exit(2)
+
+    print("\n" + "🏆 BATCH RESULT" + "\n" + "=" * 60)
+    print(f"✅ Accepted: {summary['accepted']}/{summary['total_jobs']}")
+    print(f"⚠️  Errors: {summary['errors']}")
+    print(f"⏱️  Duration: {summary['total_duration_minutes']:.1f} minutes")
+    for workflow, stats in summary["per_workflow"].items():
+        print(f"   🧠 {workflow}: {stats['accepted']}/{stats['jobs']} accepted")
+
+    sys.exit(0 if summary["errors"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Solve Worker CLI
+
+Fills and drains the persistent job queue (SolveJob table). Start as many
+workers as you like - in several terminals, or on several machines sharing
+the database file - and each claims one (problem, workflow) job at a time.
+A worker that crashes stops heartbeating; its job is reclaimed by another
+worker once the lease (JOB_LEASE_SEC) runs out.
+
+Usage:
+    python3 apps/cli/solve_worker.py enqueue --all --workflows gpt5_deepseek gpt5_groq
+    python3 apps/cli/solve_worker.py work --exit-when-empty
+    python3 apps/cli/solve_worker.py status
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from core.batch_solver import list_problem_ids
+from core.db import init_db
+from core.job_queue import JobQueue, QueueWorker
+from core.models import JobStatus
+from core.workflow_manager import WorkflowType
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Queue solve jobs and run workers that drain the queue",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python3 apps/cli/solve_worker.py enqueue 2041_A 2043_C
+  python3 apps/cli/solve_worker.py enqueue --all --max-attempts 4
+  python3 apps/cli/solve_worker.py work
+  python3 apps/cli/solve_worker.py work --exit-when-empty --max-jobs 10
+  python3 apps/cli/solve_worker.py requeue
+        """
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Add (problem, workflow) jobs to the queue")
+    enqueue.add_argument(
+        "problem_ids",
+        nargs="*",
+        help="Problem identifiers in format CONTEST_ID_LETTER (e.g., 2045_A)"
+    )
+    enqueue.add_argument(
+        "--all",
+        action="store_true",
+        help="Queue every problem found in --problems-dir"
+    )
+    enqueue.add_argument(
+        "--problems-dir",
+        default="problems",
+        help="Directory with <contest>-<letter>.json problem files (default: problems)"
+    )
+    enqueue.add_argument(
+        "--workflows",
+        nargs="+",
+        choices=[wf.value for wf in WorkflowType],
+        default=[wf.value for wf in WorkflowType],
+        help="LLM workflows to run for each problem (default: all)"
+    )
+    enqueue.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="Maximum number of solution attempts per job (default: 3)"
+    )
+
+    work = commands.add_parser("work", help="Claim and solve jobs until stopped")
+    work.add_argument(
+        "--profile",
+        default="Sifat",
+        help="Chromium profile to use for Codeforces submission (default: Sifat)"
+    )
+    work.add_argument(
+        "--base-dir",
+        default="problems_solved",
+        help="Base directory for storing results (default: problems_solved)"
+    )
+    work.add_argument(
+        "--worker-id",
+        help="Name recorded as lease owner (default: <hostname>:<pid>)"
+    )
+    work.add_argument(
+        "--max-jobs",
+        type=int,
+        help="Stop after this many jobs"
+    )
+    work.add_argument(
+        "--exit-when-empty",
+        action="store_true",
+        help="Stop when no job is left to claim instead of polling"
+    )
+
+    commands.add_parser("status", help="Show job counts by status")
+    commands.add_parser("requeue", help="Put failed jobs back to pending")
+
+    args = parser.parse_args()
+
+    init_db()
+    queue = JobQueue()
+
+    if args.command == "enqueue":
+        problem_ids = list(args.problem_ids)
+        if args.all:
+            problem_ids += [pid for pid in list_problem_ids(args.problems_dir) if pid not in problem_ids]
+        if not problem_ids:
+            parser.error("provide at least one problem id or --all")
+        workflows = [WorkflowType(value) for value in args.workflows]
+        added = queue.enqueue(problem_ids, workflows, max_attempts=args.max_attempts)
+        print(f"📥 Queued {added} new job(s) ({len(problem_ids) * len(workflows) - added} already queued)")
+
+    elif args.command == "work":
+        worker = QueueWorker(queue, base_dir=args.base_dir, chromium_profile=args.profile, worker_id=args.worker_id)
+        try:
+            counts = worker.run(max_jobs=args.max_jobs, exit_when_empty=args.exit_when_empty)
+        except KeyboardInterrupt:
+            print("\n⚠️  Interrupted by user - current job handed back to the queue")
+            sys.exit(2)
+        sys.exit(0 if counts["failed"] == 0 else 1)
+
+    elif args.command == "requeue":
+        print(f"🔁 Requeued {queue.requeue([JobStatus.FAILED])} failed job(s)")
+
+    stats = queue.stats()
+    print("📊 Queue: " + ", ".join(f"{status} {count}" for status, count in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
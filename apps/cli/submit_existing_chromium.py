@@ -4,96 +4,234 @@ Submit solution using existing Chrome/Chromium browser with user profile.
 """
 
 import argparse
+import atexit
+import queue
 import sys
 import os
+import threading
 import time
 import subprocess
 import json
 import re
+from concurrent.futures import Future
+from contextlib import nullcontext
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
 
-from playwright.sync_api import sync_playwright
-from core.config import CF_USERNAME
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from core.browser_pool import LAUNCH_TIMEOUT_SEC, cdp_version
+from core.config import CF_USERNAME, PLAYWRIGHT_HEADLESS, PLAYWRIGHT_LEAN, PLAYWRIGHT_STORAGE
+from core.lean_browsing import LeanBrowsing, format_report
+from core.step_timer import StepTimer
+from core.submission_result import SubmissionResult, write_event
+from core.submit_spacer import get_submit_spacer
 
-def await_verdict(page, submission_id, max_wait_time=120):
-    """Poll for verdict using XPath elements until not 'Running...'"""
-    print("⏳ Polling for verdict... (this may take up to 2 minutes)")
-    start_time = time.time()
+# Status texts Codeforces shows while a submission is not judged yet
+QUEUED_MARKERS = ("in queue", "pending", "waiting")
+JUDGING_MARKERS = ("running", "testing", "judging")
+
+# Reads the status cell of our submission (or the newest row) and resolves as
+# soon as its text differs from the last status Python has seen
+STATUS_CELL_JS = """
+([submissionId, lastText]) => {
+    let cell = null;
+    if (submissionId) {
+        cell = document.querySelector(`td.status-verdict-cell[submissionid="${submissionId}"]`);
+        if (!cell) {
+            const row = document.querySelector(`tr[data-submission-id="${submissionId}"]`);
+            if (row) cell = row.querySelector('td.status-verdict-cell') || row.cells[5];
+        }
+    }
+    if (!cell) {
+        cell = document.evaluate('//*[@id="pageContent"]/div[4]/div[6]/table/tbody/tr[2]/td[6]',
+            document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    if (!cell) return null;
+    const text = (cell.innerText || '').trim();
+    if (!text || text === lastText) return null;
+    return {text: text, waiting: cell.getAttribute('waiting')};
+}
+"""
+
+# Present once the submit page can take the source code
+EDITOR_READY_SELECTOR = '#editor, textarea[name="source"], #singlePageSubmitButton'
+
+# True once a submit click settled: redirected to the status page, or the form came back with an error
+SUBMIT_SETTLED_JS = """
+() => /status|my/.test(location.pathname + location.search) || !!document.querySelector('span.error.for__source')
+"""
+
+# Text of the submit form's error (duplicate code, ...), if the submission was rejected
+FORM_ERROR_JS = """
+() => {
+    const error = document.querySelector('span.error.for__source');
+    return error && error.innerText.trim() ? error.innerText.trim() : null;
+}
+"""
+
+# Id of the newest status row for the given problem (rows of other problems are skipped)
+SUBMISSION_ROW_JS = """
+([contestId, index]) => {
+    for (const row of document.querySelectorAll('tr[data-submission-id]')) {
+        const link = row.querySelector('a[href*="/problem/"]');
+        const href = link ? link.getAttribute('href').replace(/\\/+$/, '') : '';
+        if (href.endsWith(`/problem/${contestId}/${index}`) || href.endsWith(`/${contestId}/problem/${index}`)) {
+            return row.getAttribute('data-submission-id');
+        }
+    }
+    return null;
+}
+"""
+
+# One lock per Codeforces account (browser profile): tabs of the same profile
+# take turns from the submit click until they read their submission id, so
+# each one finds its own row on the shared status page
+_account_locks = {}
+_account_locks_guard = threading.Lock()
+
+
+def account_lock(key: str) -> threading.Lock:
+    """Lock shared by every submitter logged in through the same profile or storage state"""
+    with _account_locks_guard:
+        return _account_locks.setdefault(key, threading.Lock())
+
+
+# True once the facebox popup is shown and its content finished loading
+FACEBOX_READY_JS = """
+() => {
+    const box = document.querySelector('#facebox');
+    if (!box || getComputedStyle(box).display === 'none' || box.querySelector('.loading')) return false;
+    const content = box.querySelector('.content') || box;
+    return content.innerText.trim().length > 0;
+}
+"""
+
+class VerdictWatcher:
+    """Resolves a submission's verdict as soon as its final state is known.
+    
+    The status cell is watched in the page (Codeforces updates it live), and
+    intercepted submitSource/submissionVerdict responses can settle the
+    verdict directly. A page reload is only a fallback when the status has
+    not changed for a while, with the reload interval backing off.
+    Also records how long the submission spent in queue versus judging.
+    """
     
-    while time.time() - start_time < max_wait_time:
+    def __init__(self, page, submission_id, max_wait_time=120, check_interval=2.0,
+                 stale_after=10.0, max_stale_after=40.0, started_at=None):
+        self.page = page
+        self.submission_id = submission_id
+        self.max_wait_time = max_wait_time
+        self.check_interval = check_interval
+        self.stale_after = stale_after
+        self.max_stale_after = max_stale_after
+        self.started_at = started_at or time.time()
+        self.judging_started_at = None
+        self.finished_at = None
+        self.reloads = 0
+        self._api_verdict = None
+        self._last_text = None
+    
+    def observe_api_response(self, response_text):
+        """Feed an intercepted submitSource/submissionVerdict body; settles the verdict if it is final"""
         try:
-            # Check verdict using your corrected XPath
-            verdict_element = page.locator('//*[@id="pageContent"]/div[4]/div[6]/table/tbody/tr[2]/td[6]/a/span')
-            if verdict_element.is_visible():
-                verdict_text = verdict_element.inner_text().strip()
-                print(f"📊 Current Status: {verdict_text}")
-                
-                # Check if verdict is final (not running)
-                if "Running" not in verdict_text.lower() and "in queue" not in verdict_text.lower():
-                    # Wait a bit for API calls to complete after verdict appears
-                    print("⏳ Waiting for API responses to complete...")
-                    time.sleep(3)  # Give time for API calls to finish
-                    
-                    if "accepted" in verdict_text.lower():
-                        print("🎉 ACCEPTED!")
-                        return verdict_text
-                    else:
-                        print(f"❌ {verdict_text}")
-                        return verdict_text
-                
-                # Still running, wait and refresh
-                time.sleep(5)
-                page.reload()
-                page.wait_for_load_state('networkidle')
-            else:
-                print("⚠️  XPath element not found, trying to find specific submission...")
-                # Try to find the specific submission ID and get its verdict
-                if submission_id:
-                    try:
-                        # Look for the submission ID link in the table
-                        submission_link = page.locator(f'a:has-text("{submission_id}")').first
-                        if submission_link.is_visible():
-                            # Get the row containing this submission
-                            submission_row = submission_link.locator('xpath=ancestor::tr[1]')
-                            # Get the verdict cell (6th column, index 5)
-                            verdict_cell = submission_row.locator('td').nth(5)
-                            
-                            # Try different selectors for verdict
-                            verdict_element = verdict_cell.locator('span, a span, a').first
-                            if verdict_element.is_visible():
-                                verdict_text = verdict_element.inner_text().strip()
-                                print(f"📊 Found verdict for {submission_id}: {verdict_text}")
-                                
-                                if "running" not in verdict_text.lower() and "in queue" not in verdict_text.lower() and "judging" not in verdict_text.lower():
-                                    # Wait a bit for API calls to complete after verdict appears
-                                    print("⏳ Waiting for API responses to complete...")
-                                    time.sleep(3)  # Give time for API calls to finish
-                                    
-                                    if "accepted" in verdict_text.lower():
-                                        print("🎉 ACCEPTED!")
-                                        return verdict_text
-                                    else:
-                                        print(f"❌ {verdict_text}")
-                                        return verdict_text
-                            else:
-                                print(f"⚠️  Verdict element not visible for submission {submission_id}")
-                        else:
-                            print(f"⚠️  Could not find submission {submission_id} in table")
-                    except Exception as e:
-                        print(f"⚠️  Error finding specific submission: {e}")
-                
-                print("⏳ Waiting for verdict to appear...")
-                time.sleep(5)
-                page.reload()
-                page.wait_for_load_state('networkidle')
+            data = json.loads(response_text)
+        except (TypeError, ValueError):
+            return
+        if not isinstance(data, dict) or not data.get("verdict"):
+            return
+        if str(data.get("waiting", "false")).lower() == "true":
+            return
+        verdict_text = re.sub(r'<[^>]+>', '', str(data["verdict"])).strip()
+        if verdict_text and self._is_final(verdict_text, None):
+            self._api_verdict = verdict_text
+    
+    def wait(self):
+        """Block until the verdict is final; returns the verdict text or "Timeout" """
+        print("⏳ Watching for verdict... (this may take up to 2 minutes)")
+        deadline = time.time() + self.max_wait_time
+        last_change = time.time()
+        stale_after = self.stale_after
+        
+        while time.time() < deadline:
+            if self._api_verdict:
+                return self._finish(self._api_verdict, "API response")
+            
+            try:
+                timeout_ms = max(1, int(min(self.check_interval, deadline - time.time()) * 1000))
+                handle = self.page.wait_for_function(
+                    STATUS_CELL_JS,
+                    arg=[str(self.submission_id or ""), self._last_text],
+                    polling=250,
+                    timeout=timeout_ms
+                )
+                status = handle.json_value()
+            except PlaywrightTimeoutError:
+                status = None
+            except Exception as e:
+                # Navigation in progress or page replaced; retry on the next slice
+                print(f"⚠️  Error checking verdict: {e}")
+                status = None
+            
+            if status:
+                last_change = time.time()
+                stale_after = self.stale_after
+                self._last_text = status["text"]
+                print(f"📊 Current Status: {self._last_text}")
                 
-        except Exception as e:
-            print(f"⚠️  Error checking verdict: {e}")
-            time.sleep(5)
-            continue
+                if self._is_final(self._last_text, status.get("waiting")):
+                    return self._finish(self._last_text, "status cell")
+                if self.judging_started_at is None and self._is_judging(self._last_text):
+                    self.judging_started_at = time.time()
+            elif time.time() - last_change >= stale_after:
+                # No live update for a while: fall back to a reload, backing off each time
+                print(f"🔄 No status change for {stale_after:.0f}s, reloading status page...")
+                try:
+                    self.page.reload(wait_until='domcontentloaded')
+                    self.reloads += 1
+                except Exception as e:
+                    print(f"⚠️  Reload failed: {e}")
+                self._last_text = None
+                last_change = time.time()
+                stale_after = min(stale_after * 2, self.max_stale_after)
+        
+        print("⏰ Timeout waiting for verdict")
+        return "Timeout"
     
-    print("⏰ Timeout waiting for verdict")
-    return "Timeout"
+    def timing(self):
+        """Seconds spent in queue and judging (None when unknown)"""
+        end = self.finished_at or time.time()
+        judging_start = self.judging_started_at or self.finished_at
+        return {
+            "queue_seconds": (judging_start - self.started_at) if judging_start else None,
+            "judging_seconds": (end - self.judging_started_at) if self.judging_started_at else None,
+            "verdict_reloads": self.reloads
+        }
+    
+    def _finish(self, verdict_text, source):
+        self.finished_at = time.time()
+        timing = self.timing()
+        print(f"⏱️  Verdict from {source} after {self.finished_at - self.started_at:.1f}s "
+              f"(queue: {timing['queue_seconds'] or 0:.1f}s, judging: {timing['judging_seconds'] or 0:.1f}s)")
+        if "accepted" in verdict_text.lower():
+            print("🎉 ACCEPTED!")
+        else:
+            print(f"❌ {verdict_text}")
+        return verdict_text
+    
+    @staticmethod
+    def _is_judging(text):
+        lowered = text.lower()
+        return any(marker in lowered for marker in JUDGING_MARKERS)
+    
+    @staticmethod
+    def _is_final(text, waiting):
+        if waiting is not None:
+            return waiting == "false"
+        lowered = text.lower()
+        return not any(marker in lowered for marker in QUEUED_MARKERS + JUDGING_MARKERS)
+
+def await_verdict(page, submission_id, max_wait_time=120):
+    """Wait for the submission's final verdict (see VerdictWatcher)"""
+    return VerdictWatcher(page, submission_id, max_wait_time).wait()
 
 def intercept_api_calls(page, submission_id):
     """Intercept and capture API calls for submission details"""
@@ -134,21 +272,21 @@ def intercept_api_calls(page, submission_id):
     
     return captured_responses
 
-def click_submission_for_details(page, submission_id):
+def click_submission_for_details(page, submission_id, timer=None):
     """Click on submission ID to get detailed popup results from #facebox"""
+    timer = timer or StepTimer()
     try:
         print(f"🖱️  Clicking on submission ID {submission_id} for details...")
         
         # Find and click the submission ID link
         submission_link = page.locator(f'a:has-text("{submission_id}")').first
         if submission_link.is_visible():
-            submission_link.click()
-            
-            # Wait for the facebox popup to appear
+            # Wait for the facebox popup to show its loaded content
             print("⏳ Waiting for facebox popup...")
             try:
-                page.wait_for_selector('#facebox', state='visible', timeout=10000)
-                page.wait_for_timeout(2000)  # Extra wait for content to load
+                with timer.step("details_click"):
+                    submission_link.click()
+                    page.wait_for_function(FACEBOX_READY_JS, timeout=timer.budget_ms("details_click"))
                 print("✅ Facebox popup appeared!")
             except Exception as e:
                 print(f"⚠️  Facebox not found: {e}")
@@ -254,11 +392,127 @@ def click_submission_for_details(page, submission_id):
         print(f"⚠️  Error clicking submission ID: {e}")
         return None
 
-def get_detailed_results(page, submission_id, captured_api_responses=None):
-    """Enhanced method to get detailed submission results via multiple approaches"""
+def parse_api_response(api_response):
+    """Parse the JSON body of an intercepted submitSource response, if possible"""
+    response_text = api_response.get("response_text", "")
+    if not response_text or not response_text.strip().startswith('{'):
+        return None
+    
+    try:
+        parsed_api = json.loads(response_text)
+    except json.JSONDecodeError as e:
+        print(f"⚠️  Could not parse API response as JSON: {e}")
+        return None
+    
+    print("✅ API response parsed as JSON")
+    
+    # Display key information
+    if 'testCount' in parsed_api:
+        test_count = parsed_api['testCount']
+        print(f"📊 Test Count: {test_count}")
+        
+        # Look for verdict information
+        if 'verdict' in parsed_api:
+            print(f"🏆 Overall Verdict: {parsed_api['verdict']}")
+        
+        # Show individual test results
+        for i in range(1, min(int(test_count) + 1, 4)):  # Show first 3
+            verdict_key = f"verdict#{i}"
+            if verdict_key in parsed_api:
+                print(f"🧪 Test {i}: {parsed_api[verdict_key]}")
+    
+    return parsed_api
+
+def fetch_submit_source(page, submission_id):
+    """Request submission details directly with the page's CSRF token (fallback when nothing was intercepted)"""
+    page_content = page.content()
+    
+    # Extract CSRF token more aggressively
+    csrf_patterns = [
+        r'csrf["\s]*[:=]["\s]*["\']([a-f0-9]+)["\']',
+        r'"csrf_token"["\s]*:["\s]*["\']([a-f0-9]+)["\']',
+        r'_tta["\s]*[:=]["\s]*["\']([a-f0-9]+)["\']',
+    ]
+    
+    csrf_token = None
+    for pattern in csrf_patterns:
+        match = re.search(pattern, page_content, re.IGNORECASE)
+        if match:
+            csrf_token = match.group(1)
+            break
+    
+    # Extract rv parameter from multiple sources
+    rv_patterns = [
+        r'rv["\s]*[:=]["\s]*["\']([a-zA-Z0-9]+)["\']',
+        r'data/submitSource\?rv=([a-zA-Z0-9]+)',
+        r'"rv"["\s]*:["\s]*"([a-zA-Z0-9]+)"'
+    ]
+    
+    rv_param = None
+    for pattern in rv_patterns:
+        match = re.search(pattern, page_content, re.IGNORECASE)
+        if match:
+            rv_param = match.group(1)
+            break
+    
+    if not csrf_token or not submission_id:
+        return None
+    
+    print("🔄 Attempting manual API call...")
+    if not rv_param:
+        rv_param = "k1pqe12g2"  # Fallback
+    
+    api_url = f"https://codeforces.com/data/submitSource?rv={rv_param}"
+    
+    manual_response = page.evaluate(f"""
+    async () => {{
+        try {{
+            const response = await fetch('{api_url}', {{
+                method: 'POST',
+                headers: {{
+                    'Content-Type': 'application/x-www-form-urlencoded',
+                    'X-Requested-With': 'XMLHttpRequest'
+                }},
+                body: 'submissionId={submission_id}&csrf_token={csrf_token}'
+            }});
+            
+            if (response.ok) {{
+                const text = await response.text();
+                return {{
+                    url: '{api_url}',
+                    rv_parameter: '{rv_param}',
+                    response_text: text,
+                    status: response.status
+                }};
+            }} else {{
+                return {{
+                    error: true,
+                    status: response.status,
+                    statusText: response.statusText
+                }};
+            }}
+        }} catch (error) {{
+            return {{
+                error: true,
+                message: error.toString()
+            }};
+        }}
+    }}
+    """)
+    
+    if manual_response and not manual_response.get('error'):
+        print("✅ Manual API call successful")
+        return manual_response
+    return None
+
+def get_detailed_results(page, submission_id, captured_api_responses=None, api_dir="api_responses", timer=None):
+    """Collect detailed submission results and write them once to api_dir.
+    
+    Returns (comprehensive_data, filename), or (None, None) when nothing was collected.
+    """
     from datetime import datetime
-    import os
-    import json  # Import at function level
+    
+    timer = timer or StepTimer()
     
     try:
         print("📊 Getting detailed results using multiple methods...")
@@ -267,298 +521,77 @@ def get_detailed_results(page, submission_id, captured_api_responses=None):
         if captured_api_responses is None:
             captured_api_responses = []
         
-        captured_responses = captured_api_responses
-        comprehensive_data = None
-        filename = None
-        initial_response_count = len(captured_responses)  # Track count before click
-        
-        if captured_responses:
-            print(f"✅ Using {len(captured_responses)} API responses captured during polling")
-            for i, resp in enumerate(captured_responses, 1):
+        initial_response_count = len(captured_api_responses)  # Track count before click
+        if captured_api_responses:
+            print(f"✅ Using {len(captured_api_responses)} API responses captured during polling")
+            for i, resp in enumerate(captured_api_responses, 1):
                 print(f"   Response {i}: {resp.get('url', 'unknown')[:80]}... ({resp.get('status', 'N/A')})")
-            
-            # IMMEDIATELY save API response to file (don't wait for facebox)
-            api_response = captured_responses[-1]  # Use the latest response
-            
-            # Create api_responses directory if it doesn't exist
-            api_dir = "api_responses"
-            if not os.path.exists(api_dir):
-                os.makedirs(api_dir)
-            
-            # Create filename with submission ID and timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{api_dir}/submission_{submission_id}_{timestamp}.json"
-            
-            # Prepare data to save
-            comprehensive_data = {
-                "submission_id": submission_id,
-                "timestamp": datetime.now().isoformat(),
-                "collection_methods": ["api_interception"]
-            }
-            
-            comprehensive_data["api_response"] = api_response
-            
-            # Try to parse API response
-            response_text = api_response.get("response_text", "")
-            if response_text and response_text.strip().startswith('{'):
-                try:
-                    parsed_api = json.loads(response_text)
-                    comprehensive_data["parsed_api_response"] = parsed_api
-                    print("✅ API response parsed as JSON")
-                    
-                    # Display key information
-                    if 'testCount' in parsed_api:
-                        test_count = parsed_api['testCount']
-                        print(f"📊 Test Count: {test_count}")
-                        
-                        # Look for verdict information
-                        if 'verdict' in parsed_api:
-                            print(f"🏆 Overall Verdict: {parsed_api['verdict']}")
-                        
-                        # Show individual test results
-                        for i in range(1, min(int(test_count) + 1, 4)):  # Show first 3
-                            verdict_key = f"verdict#{i}"
-                            if verdict_key in parsed_api:
-                                print(f"🧪 Test {i}: {parsed_api[verdict_key]}")
-                    
-                except json.JSONDecodeError as e:
-                    print(f"⚠️  Could not parse API response as JSON: {e}")
-            
-            # Save immediately!
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(comprehensive_data, f, indent=2, ensure_ascii=False)
-            
-            print(f"💾 Comprehensive results saved to: {filename}")
         
         # Method 2: Click on submission ID to get facebox details (this may trigger API calls!)
-        click_results = click_submission_for_details(page, submission_id)
+        click_results = click_submission_for_details(page, submission_id, timer)
         
-        # Give a moment for any API calls triggered by the click to complete
-        time.sleep(2)
+        # The click fires a submitSource call; wait until its response arrives, not a fixed delay
+        if click_results is not None:
+            with timer.step("details_api"):
+                deadline = time.time() + timer.budget("details_api")
+                while len(captured_api_responses) == initial_response_count and time.time() < deadline:
+                    page.wait_for_timeout(100)  # lets Playwright deliver the response event
         
-        # Check if clicking triggered NEW API responses (check count increased)
-        if initial_response_count == 0 and len(captured_api_responses) > 0:
-            print(f"✅ API responses captured during click: {len(captured_api_responses)}")
-            captured_responses = captured_api_responses
-            
-            # Now save the API response that was just captured
-            api_response = captured_responses[-1]
-            api_dir = "api_responses"
-            if not os.path.exists(api_dir):
-                os.makedirs(api_dir)
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{api_dir}/submission_{submission_id}_{timestamp}.json"
-            
-            comprehensive_data = {
-                "submission_id": submission_id,
-                "timestamp": datetime.now().isoformat(),
-                "collection_methods": ["api_interception_via_click"]
-            }
-            
+        comprehensive_data = {
+            "submission_id": submission_id,
+            "timestamp": datetime.now().isoformat(),
+            "collection_methods": []
+        }
+        
+        api_response = None
+        if captured_api_responses:
+            api_response = captured_api_responses[-1]  # Use the latest response
+            if initial_response_count:
+                comprehensive_data["collection_methods"].append("api_interception")
+            else:
+                print(f"✅ API responses captured during click: {len(captured_api_responses)}")
+                comprehensive_data["collection_methods"].append("api_interception_via_click")
+        else:
+            # Method 3: Try manual API call with extracted parameters
+            api_response = fetch_submit_source(page, submission_id)
+            if api_response:
+                comprehensive_data["collection_methods"].append("manual_api_call")
+        
+        if api_response:
             comprehensive_data["api_response"] = api_response
-            
-            # Try to parse API response
-            response_text = api_response.get("response_text", "")
-            if response_text and response_text.strip().startswith('{'):
-                try:
-                    parsed_api = json.loads(response_text)
-                    comprehensive_data["parsed_api_response"] = parsed_api
-                    print("✅ API response parsed as JSON")
-                    
-                    if 'testCount' in parsed_api:
-                        test_count = parsed_api['testCount']
-                        print(f"📊 Test Count: {test_count}")
-                        
-                        if 'verdict' in parsed_api:
-                            print(f"🏆 Overall Verdict: {parsed_api['verdict']}")
-                        
-                        for i in range(1, min(int(test_count) + 1, 4)):
-                            verdict_key = f"verdict#{i}"
-                            if verdict_key in parsed_api:
-                                print(f"🧪 Test {i}: {parsed_api[verdict_key]}")
-                except json.JSONDecodeError as e:
-                    print(f"⚠️  Could not parse API response as JSON: {e}")
-            
-            # Save immediately!
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(comprehensive_data, f, indent=2, ensure_ascii=False)
-            
-            print(f"💾 Comprehensive results saved to: {filename}")
+            parsed_api = parse_api_response(api_response)
+            if parsed_api is not None:
+                comprehensive_data["parsed_api_response"] = parsed_api
         
-        # Also check click results
         if click_results:
+            comprehensive_data["click_results"] = click_results
             try:
                 click_data = json.loads(click_results)
-                test_count = click_data.get('test_count', 0)
-                print(f"📊 Facebox extraction found {test_count} test cases")
-            except:
+                print(f"📊 Facebox extraction found {click_data.get('test_count', 0)} test cases")
+                if "test_results" in click_data:
+                    comprehensive_data["test_results"] = click_data["test_results"]
+            except json.JSONDecodeError:
                 pass
+            comprehensive_data["collection_methods"].append("click_extraction")
         
-        # Method 3: Try manual API call with extracted parameters
-        page_content = page.content()
-        
-        # Extract CSRF token more aggressively
-        csrf_patterns = [
-            r'csrf["\s]*[:=]["\s]*["\']([a-f0-9]+)["\']',
-            r'"csrf_token"["\s]*:["\s]*["\']([a-f0-9]+)["\']',
-            r'_tta["\s]*[:=]["\s]*["\']([a-f0-9]+)["\']',
-        ]
-        
-        csrf_token = None
-        for pattern in csrf_patterns:
-            match = re.search(pattern, page_content, re.IGNORECASE)
-            if match:
-                csrf_token = match.group(1)
-                break
-        
-        # Extract rv parameter from multiple sources
-        rv_patterns = [
-            r'rv["\s]*[:=]["\s]*["\']([a-zA-Z0-9]+)["\']',
-            r'data/submitSource\?rv=([a-zA-Z0-9]+)',
-            r'"rv"["\s]*:["\s]*"([a-zA-Z0-9]+)"'
-        ]
-        
-        rv_param = None
-        for pattern in rv_patterns:
-            match = re.search(pattern, page_content, re.IGNORECASE)
-            if match:
-                rv_param = match.group(1)
-                break
+        if not comprehensive_data["collection_methods"]:
+            print("⚠️  No detailed results obtained from any method")
+            return None, None
         
-        # Use captured responses if available
-        api_response = None
-        if captured_responses:
-            print(f"✅ Found {len(captured_responses)} intercepted API calls")
-            api_response = captured_responses[-1]  # Use the latest response
+        # Single write, straight into the attempt's api_responses directory
+        os.makedirs(api_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = os.path.join(api_dir, f"submission_{submission_id}_{timestamp}.json")
         
-        # Fallback: Try manual API call if we have the tokens
-        if not api_response and csrf_token and submission_id:
-            print("🔄 Attempting manual API call...")
-            if not rv_param:
-                rv_param = "k1pqe12g2"  # Fallback
-            
-            api_url = f"https://codeforces.com/data/submitSource?rv={rv_param}"
-            
-            manual_response = page.evaluate(f"""
-            async () => {{
-                try {{
-                    const response = await fetch('{api_url}', {{
-                        method: 'POST',
-                        headers: {{
-                            'Content-Type': 'application/x-www-form-urlencoded',
-                            'X-Requested-With': 'XMLHttpRequest'
-                        }},
-                        body: 'submissionId={submission_id}&csrf_token={csrf_token}'
-                    }});
-                    
-                    if (response.ok) {{
-                        const text = await response.text();
-                        return {{
-                            url: '{api_url}',
-                            rv_parameter: '{rv_param}',
-                            response_text: text,
-                            status: response.status
-                        }};
-                    }} else {{
-                        return {{
-                            error: true,
-                            status: response.status,
-                            statusText: response.statusText
-                        }};
-                    }}
-                }} catch (error) {{
-                    return {{
-                        error: true,
-                        message: error.toString()
-                    }};
-                }}
-            }}
-            """)
-            
-            if manual_response and not manual_response.get('error'):
-                api_response = manual_response
-                print("✅ Manual API call successful")
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(comprehensive_data, f, indent=2, ensure_ascii=False)
         
-        # If we have facebox results, update the existing file
-        if click_results and captured_responses:
-            print("📝 Adding facebox data to existing API response file...")
-            try:
-                # Read the existing file
-                import json
-                with open(filename, 'r', encoding='utf-8') as f:
-                    comprehensive_data = json.load(f)
-                
-                # Add facebox data
-                if isinstance(click_results, str):
-                    try:
-                        click_data = json.loads(click_results)
-                        comprehensive_data["click_results"] = click_results
-                        if "test_results" in click_data:
-                            comprehensive_data["test_results"] = click_data["test_results"]
-                            print(f"✅ Added {len(click_data['test_results'])} test cases from facebox")
-                    except json.JSONDecodeError:
-                        comprehensive_data["click_results"] = click_results
-                else:
-                    comprehensive_data["click_results"] = click_results
-                
-                if "click_extraction" not in comprehensive_data.get("collection_methods", []):
-                    comprehensive_data["collection_methods"].append("click_extraction")
-                
-                # Save updated data
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(comprehensive_data, f, indent=2, ensure_ascii=False)
-                
-                print(f"💾 Updated file with facebox data: {filename}")
-                return comprehensive_data
-                
-            except Exception as e:
-                print(f"⚠️  Could not update file with facebox data: {e}")
-                return comprehensive_data if captured_responses else None
-        
-        # If we only have API response (already saved) or only facebox
-        if captured_responses:
-            return comprehensive_data
-        elif click_results:
-            # Only facebox, no API response - save it
-            from datetime import datetime
-            import os
-            
-            api_dir = "api_responses"
-            if not os.path.exists(api_dir):
-                os.makedirs(api_dir)
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{api_dir}/submission_{submission_id}_{timestamp}.json"
-            
-            comprehensive_data = {
-                "submission_id": submission_id,
-                "timestamp": datetime.now().isoformat(),
-                "collection_methods": ["click_extraction"],
-                "click_results": click_results
-            }
-            
-            # Extract test_results if available
-            if isinstance(click_results, str):
-                try:
-                    click_data = json.loads(click_results)
-                    if "test_results" in click_data:
-                        comprehensive_data["test_results"] = click_data["test_results"]
-                except:
-                    pass
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(comprehensive_data, f, indent=2, ensure_ascii=False)
-            
-            print(f"💾 Facebox results saved to: {filename}")
-            return comprehensive_data
-        else:
-            print("⚠️  No detailed results obtained from any method")
-            return None
+        print(f"💾 Comprehensive results saved to: {filename}")
+        return comprehensive_data, filename
             
     except Exception as e:
         print(f"⚠️  Error in enhanced result collection: {e}")
-        return None
+        return None, None
 
 def get_chromium_path():
     """Find Chromium executable path."""
@@ -613,8 +646,13 @@ def start_chromium_with_debugging(profile_name="Sifat", port=9222):
         # Start Chromium in background
         subprocess.Popen(chromium_args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         
-        # Wait a moment for Chromium to start
-        time.sleep(3)
+        # Wait until the debugging port answers instead of a fixed delay
+        deadline = time.time() + LAUNCH_TIMEOUT_SEC
+        while cdp_version(port) is None:
+            if time.time() > deadline:
+                print(f"❌ Chromium did not open port {port} within {LAUNCH_TIMEOUT_SEC}s")
+                return False
+            time.sleep(0.2)
         
         print(f"✅ Chromium started with remote debugging on port {port}")
         return True
@@ -623,14 +661,8 @@ def start_chromium_with_debugging(profile_name="Sifat", port=9222):
         print(f"❌ Failed to start Chromium: {e}")
         return False
 
-def submit_with_existing_chrome(solution_file: str, contest_id: int, problem_letter: str, port=9222, no_interactive=False):
-    """Submit solution using existing Chromium browser."""
-    
-    # Read the solution file
-    if not os.path.exists(solution_file):
-        print(f"❌ Solution file not found: {solution_file}")
-        return False
-    
+def read_solution_source(solution_file: str):
+    """Read a solution file and strip the generated header comment, if present"""
     with open(solution_file, 'r', encoding='utf-8') as f:
         source_code = f.read()
     
@@ -643,222 +675,405 @@ def submit_with_existing_chrome(solution_file: str, contest_id: int, problem_let
                 source_code = '\n'.join(lines[i+1:]).strip()
                 break
     
-    print("🚀 **Codeforces Submission via Existing Chromium**")
-    print("=" * 50)
-    print()
-    print(f"📋 Solution file: {solution_file}")
-    print(f"🎯 Target: https://codeforces.com/problemset/problem/{contest_id}/{problem_letter}")
-    print(f"📏 Code length: {len(source_code)} characters")
-    print()
+    return source_code
+
+class ChromiumSubmitter:
+    """Importable Codeforces submitter that keeps one Playwright connection alive.
     
-    # Copy to clipboard if possible
-    try:
-        import pyperclip
-        pyperclip.copy(source_code)
-        print("✅ **Solution code copied to clipboard!**")
-    except ImportError:
-        print("💡 Install 'pyperclip' to auto-copy code: pip install pyperclip")
+    The CDP connection and page are opened on the first submission and reused
+    by every later one, so repeated submissions only pay for navigation and the
+    form post. Playwright's sync API is bound to the thread that started it,
+    therefore all browser work runs on a dedicated worker thread and submit()
+    may be called from any thread (calls are serialized on the shared page).
     
-    print()
+    With new_page the submitter opens a tab of its own instead of using the
+    browser's first one, so several submitters can share one browser.
     
-    # Try to connect to existing Chrome instance
-    try:
-        with sync_playwright() as p:
-            print(f"🔗 Connecting to Chromium on port {port}...")
+    With headless it launches its own headless Chromium instead, logged in
+    through the cookies in PLAYWRIGHT_STORAGE (written back on close). With
+    lean, heavy resources are blocked (see core.lean_browsing) and every
+    SubmissionResult reports requests, bytes and time saved in extra["browsing"].
+    """
+    
+    def __init__(self, port: int = 9222, no_interactive: bool = True, new_page: bool = False,
+                 headless: bool = PLAYWRIGHT_HEADLESS, lean: bool = PLAYWRIGHT_LEAN,
+                 storage_state: str = PLAYWRIGHT_STORAGE):
+        self.port = port
+        self.no_interactive = no_interactive
+        self.new_page = new_page
+        self.headless = headless
+        self.storage_state = storage_state
+        self._lean = LeanBrowsing(enabled=lean)
+        self._account_lock = account_lock(f"storage:{os.path.abspath(storage_state)}" if headless else f"cdp:{port}")
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._page = None
+        self._jobs = queue.Queue()
+        self._worker = threading.Thread(target=self._run_worker, name=f"chromium-submitter-{port}", daemon=True)
+        self._worker.start()
+        self._closed = False
+        atexit.register(self.close)
+    
+    def submit(self, solution_file: str, contest_id: int, problem_letter: str, api_dir: str = "api_responses",
+               on_event=None) -> SubmissionResult:
+        """Submit a solution file and wait for the verdict.
+        
+        on_event, if given, is called with progress events ({"event": "submitted", ...})
+        from the browser thread. Failures are reported in SubmissionResult.error.
+        """
+        return self._call(self._submit, solution_file, contest_id, problem_letter, api_dir, on_event)
+    
+    def close(self):
+        """Disconnect from Chromium (the browser itself keeps running)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._call(self._disconnect)
+        self._jobs.put(None)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _call(self, fn, *args):
+        """Run fn on the Playwright worker thread and wait for its result"""
+        future = Future()
+        self._jobs.put((future, fn, args))
+        return future.result()
+    
+    def _run_worker(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            future, fn, args = job
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+    
+    def _connect(self):
+        """Return the shared page, (re)connecting over CDP when needed"""
+        if self._page is not None and not self._page.is_closed() and self._browser.is_connected():
+            return self._page
+        
+        self._disconnect()
+        
+        self._playwright = sync_playwright().start()
+        
+        if self.headless:
+            print("🔗 Launching headless Chromium...")
+            self._browser = self._playwright.chromium.launch(headless=True)
+            has_storage = os.path.exists(self.storage_state)
+            if not has_storage:
+                print(f"⚠️  No storage state at {self.storage_state} - the headless browser is not logged in")
+            self._context = self._browser.new_context(storage_state=self.storage_state if has_storage else None)
+            self._page = self._context.new_page()
+        else:
+            print(f"🔗 Connecting to Chromium on port {self.port}...")
             
             # Connect to existing Chromium instance
-            browser = p.chromium.connect_over_cdp(f"http://localhost:{port}")
+            self._browser = self._playwright.chromium.connect_over_cdp(f"http://localhost:{self.port}")
             
             # Get the default context (existing browser session)
-            contexts = browser.contexts
+            contexts = self._browser.contexts
             if not contexts:
-                print("❌ No browser contexts found. Make sure Chromium is running.")
-                return False
+                self._disconnect()
+                raise RuntimeError("No browser contexts found. Make sure Chromium is running.")
             
-            context = contexts[0]  # Use first context
+            self._context = contexts[0]  # Use first context
             
             # Create new page or use existing one
-            pages = context.pages
-            if pages:
-                page = pages[0]  # Use first existing page
-            else:
-                page = context.new_page()
+            pages = self._context.pages
+            self._page = pages[0] if pages and not self.new_page else self._context.new_page()
+        
+        self._lean.install(self._page)
+        print("✅ Connected to headless Chromium!" if self.headless else "✅ Connected to existing Chromium browser!")
+        print()
+        return self._page
+    
+    def _disconnect(self):
+        connected = self._browser is not None and self._browser.is_connected()
+        self._lean.uninstall()
+        if connected and self.headless:
+            try:
+                # Keep cookies the site refreshed for the next headless run (and the HTTP submitter)
+                self._context.storage_state(path=self.storage_state)
+            except Exception as e:
+                print(f"⚠️  Could not save storage state: {e}")
+        if self.new_page and self._page is not None and connected:
+            try:
+                self._page.close()
+            except Exception:
+                pass
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception as e:
+                print(f"⚠️  Error disconnecting from Chromium: {e}")
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._page = None
+    
+    def _submit(self, solution_file: str, contest_id: int, problem_letter: str, api_dir: str, on_event) -> SubmissionResult:
+        # Read the solution file
+        if not os.path.exists(solution_file):
+            print(f"❌ Solution file not found: {solution_file}")
+            return SubmissionResult(error=f"Solution file not found: {solution_file}")
+        
+        source_code = read_solution_source(solution_file)
+        
+        print("🚀 **Codeforces Submission via Existing Chromium**")
+        print("=" * 50)
+        print()
+        print(f"📋 Solution file: {solution_file}")
+        print(f"🎯 Target: https://codeforces.com/problemset/problem/{contest_id}/{problem_letter}")
+        print(f"📏 Code length: {len(source_code)} characters")
+        print()
+        
+        try:
+            page = self._connect()
+        except Exception as e:
+            print(f"❌ Failed to connect to Chromium: {e}")
+            print("   Make sure Chromium is running with remote debugging enabled")
+            return SubmissionResult(error=f"Failed to connect to Chromium: {e}")
+        
+        try:
+            self._lean.reset()
+            result = submit_on_page(page, source_code, contest_id, problem_letter, self.no_interactive, api_dir, on_event,
+                                    submit_lock=self._account_lock)
+            result.extra["browsing"] = self._lean.report()
+            print(f"🪶 Browsing ({result.extra['browsing']['mode']}): {format_report(result.extra['browsing'])}")
+            return result
+        except Exception as e:
+            # The page may be in an unknown state; reconnect on the next submission
+            self._disconnect()
+            print(f"❌ Error during automated submission: {e}")
+            return SubmissionResult(error=f"Error during automated submission: {e}")
+
+def submit_on_page(page, source_code: str, contest_id: int, problem_letter: str, no_interactive: bool = True,
+                   api_dir: str = "api_responses", on_event=None, submit_lock=None) -> SubmissionResult:
+    """Run the full submit-and-poll flow on an already connected page.
+    
+    Every step waits for a concrete condition (editor ready, redirect to the
+    status page, submission row present, ...) within its StepTimer budget;
+    the per-step timing is returned in SubmissionResult.timing.
+    
+    submit_lock, if given, is held from the submit click until the submission
+    id is read, so pages sharing one account never pick up each other's row.
+    """
+    
+    def emit(event, **payload):
+        if on_event:
+            on_event({"event": event, **payload})
+    
+    timer = StepTimer()
+    
+    def failed(error):
+        print(f"⏱️  Steps: {timer.summary()}")
+        return SubmissionResult(error=error, timing=timer.report())
+    
+    # Navigate to the problem page
+    problem_url = f"https://codeforces.com/problemset/problem/{contest_id}/{problem_letter}"
+    print(f"🔗 Navigating to: {problem_url}")
+    
+    with timer.step("problem_page"):
+        page.goto(problem_url, wait_until='domcontentloaded', timeout=timer.budget_ms("problem_page"))
+    
+    print("📄 Problem page loaded!")
+    print()
+    
+    # Check if we're logged in
+    page_content = page.content()
+    if "logout" in page_content.lower() or "enter" not in page_content.lower():
+        print("✅ Already logged in to Codeforces!")
+    else:
+        print("⚠️  Not logged in - please login in the browser first")
+        if not no_interactive:
+            print("   I'll wait for you to login...")
+            input("Press Enter after logging in...")
+        else:
+            print("❌ Not logged in and running in non-interactive mode")
+            return failed("Not logged in to Codeforces")
+    
+    print()
+    print("🎯 **Automated submission process starting...**")
+    
+    # Step 1: Find and click submit link
+    print("🔗 Step 1: Looking for Submit button...")
+    
+    # Try multiple selectors for submit link
+    submit_selectors = [
+        'a[href*="submit"]:has-text("Submit")',
+        'a:has-text("Submit")',
+        'ul.nav li:nth-child(3) a',  # Third item in navigation
+        '//*[@id="pageContent"]/div[1]/ul/li[3]/a'  # Your original xpath
+    ]
+    
+    submit_clicked = False
+    with timer.step("submit_link"):
+        for selector in submit_selectors:
+            try:
+                if selector.startswith('//'):
+                    # XPath selector
+                    page.locator(f'xpath={selector}').click(timeout=3000)
+                else:
+                    # CSS selector
+                    page.click(selector, timeout=3000)
+                
+                # The submit page is usable as soon as its editor is there
+                page.wait_for_url(re.compile(r'/submit'), wait_until='domcontentloaded', timeout=timer.budget_ms("submit_link"))
+                page.wait_for_selector(EDITOR_READY_SELECTOR, state='attached', timeout=timer.budget_ms("submit_link"))
+                print(f"✅ Submit link clicked using: {selector}")
+                submit_clicked = True
+                break
+            except:
+                continue
+    
+    if not submit_clicked:
+        print("⚠️  Could not find submit link automatically")
+        if not no_interactive:
+            print("   Please click the Submit button manually in the browser")
+            input("Press Enter after clicking Submit...")
+        else:
+            print("❌ Cannot proceed in non-interactive mode")
+            return failed("Could not find submit link")
+    
+    # Step 2: Paste code in editor
+    print("📝 Step 2: Pasting code in editor...")
+    
+    # Try multiple editor selectors
+    editor_selectors = [
+        'textarea[name="source"]',
+        '#editor textarea',
+        '//*[@id="editor"]/div[2]/div',  # Your original xpath
+        '.CodeMirror textarea',
+        'textarea.form-control'
+    ]
+    
+    code_pasted = False
+    with timer.step("paste_code"):
+        for selector in editor_selectors:
+            try:
+                if selector.startswith('//'):
+                    # XPath - click first then type
+                    editor = page.locator(f'xpath={selector}')
+                    editor.click(timeout=timer.budget_ms("paste_code"))
+                    page.keyboard.press('Control+a')
+                    page.keyboard.type(source_code)
+                else:
+                    # CSS selector - use fill
+                    page.fill(selector, source_code, timeout=timer.budget_ms("paste_code"))
+                
+                print(f"✅ Code pasted using: {selector}")
+                code_pasted = True
+                break
+            except:
+                continue
+    
+    if not code_pasted:
+        print("⚠️  Could not paste code automatically")
+        if not no_interactive:
+            print("   The code is in your clipboard - please paste it manually")
+            print(f"   Code length: {len(source_code)} characters")
+            input("Press Enter after pasting code...")
+        else:
+            print("❌ Cannot proceed in non-interactive mode")
+            return failed("Could not paste code into editor")
+    
+    # Steps 3-5 hold the account lock: the newest row on the status page must be ours
+    with submit_lock or nullcontext():
+        # Step 3: Submit the solution
+        print("🚀 Step 3: Submitting solution...")
             
-            print("✅ Connected to existing Chromium browser!")
-            print()
+        # Try multiple submit button selectors
+        submit_btn_selectors = [
+            '#singlePageSubmitButton',  # Direct ID selector - most reliable
+            'input[type="submit"]',
+            'button:has-text("Submit")',
+            '//*[@id="singlePageSubmitButton"]',  # XPath version
+            '.submit-button',
+            '#submitButton'
+        ]
             
-            # Navigate to the problem page
-            problem_url = f"https://codeforces.com/problemset/problem/{contest_id}/{problem_letter}"
-            print(f"🔗 Navigating to: {problem_url}")
+        submitted = False
+        form_error = None
+        with timer.step("submit_click"):
+            for selector in submit_btn_selectors:
+                try:
+                    if selector.startswith('//'):
+                        page.locator(f'xpath={selector}').click(timeout=5000)
+                    else:
+                        page.click(selector, timeout=5000)
+                    
+                    print(f"✅ Submit button clicked using: {selector}")
+                    submitted = True
+                    submitted_at = time.time()
+                    break
+                except Exception as e:
+                    # Only show error for first selector attempt
+                    if selector == submit_btn_selectors[0]:
+                        print(f"   Trying alternative selectors...")
+                    continue
             
-            page.goto(problem_url, wait_until='domcontentloaded')
-            page.wait_for_load_state('networkidle', timeout=10000)
+            if submitted:
+                # Codeforces redirects to the status page; a rejected form stays with an error under the editor
+                try:
+                    page.wait_for_function(SUBMIT_SETTLED_JS, timeout=timer.budget_ms("submit_click"))
+                except Exception as e:
+                    print(f"⚠️  No redirect to the status page yet: {e}")
+                form_error = page.evaluate(FORM_ERROR_JS)
             
-            print("📄 Problem page loaded!")
-            print()
+        if form_error:
+            print(f"❌ Submission rejected: {form_error}")
+            return failed(f"Submission rejected: {form_error}")
             
-            # Check if we're logged in
-            page_content = page.content()
-            if "logout" in page_content.lower() or "enter" not in page_content.lower():
-                print("✅ Already logged in to Codeforces!")
+        if not submitted:
+            print("⚠️  Could not click submit button automatically")
+            if not no_interactive:
+                print("   Please click the Submit button manually")
+                input("Press Enter after submitting...")
             else:
-                print("⚠️  Not logged in - please login in the browser first")
-                if not no_interactive:
-                    print("   I'll wait for you to login...")
-                    input("Press Enter after logging in...")
-                else:
-                    print("❌ Not logged in and running in non-interactive mode")
-                    return False
+                print("❌ Cannot proceed in non-interactive mode")
+                return failed("Could not click submit button")
+            submitted_at = time.time()
+            
+        # Step 4: Navigate to status page and get submission ID
+        print("⏳ Step 4: Waiting for submission to be recorded...")
             
-            print()
-            print("🎯 **Automated submission process starting...**")
+        current_url = page.url
+        print(f"📍 Current URL: {current_url}")
+        submission_id = None
+            
+        with timer.step("submission_row"):
+            # Navigate to status page to get submission details
+            if 'status' not in current_url:
+                print("🔄 Navigating to status page...")
+                try:
+                    page.goto("https://codeforces.com/problemset/status?my=on", wait_until='domcontentloaded',
+                              timeout=timer.budget_ms("submission_row"))
+                except Exception as e:
+                    print(f"⚠️  Navigation warning: {e}")
+                    # Try alternative navigation
+                    page.goto("https://codeforces.com/submissions", wait_until='domcontentloaded',
+                              timeout=timer.budget_ms("submission_row"))
             
+            # Step 5: Read the submission ID from the newest status row of this problem
             try:
-                # Step 1: Find and click submit link
-                print("🔗 Step 1: Looking for Submit button...")
-                
-                # Wait for page to be fully loaded
-                page.wait_for_load_state('networkidle', timeout=15000)
-                time.sleep(3)
-                
-                # Try multiple selectors for submit link
-                submit_selectors = [
-                    'a[href*="submit"]:has-text("Submit")',
-                    'a:has-text("Submit")',
-                    'ul.nav li:nth-child(3) a',  # Third item in navigation
-                    '//*[@id="pageContent"]/div[1]/ul/li[3]/a'  # Your original xpath
-                ]
-                
-                submit_clicked = False
-                for selector in submit_selectors:
-                    try:
-                        if selector.startswith('//'):
-                            # XPath selector
-                            page.locator(f'xpath={selector}').click(timeout=3000)
-                        else:
-                            # CSS selector
-                            page.click(selector, timeout=3000)
-                        
-                        page.wait_for_load_state('networkidle', timeout=10000)
-                        print(f"✅ Submit link clicked using: {selector}")
-                        submit_clicked = True
-                        break
-                    except:
-                        continue
-                
-                if not submit_clicked:
-                    print("⚠️  Could not find submit link automatically")
-                    if not no_interactive:
-                        print("   Please click the Submit button manually in the browser")
-                        input("Press Enter after clicking Submit...")
-                    else:
-                        print("❌ Cannot proceed in non-interactive mode")
-                        return False
-                
-                # Step 2: Paste code in editor
-                print("📝 Step 2: Pasting code in editor...")
-                time.sleep(2)
-                
-                # Try multiple editor selectors
-                editor_selectors = [
-                    'textarea[name="source"]',
-                    '#editor textarea',
-                    '//*[@id="editor"]/div[2]/div',  # Your original xpath
-                    '.CodeMirror textarea',
-                    'textarea.form-control'
-                ]
-                
-                code_pasted = False
-                for selector in editor_selectors:
-                    try:
-                        if selector.startswith('//'):
-                            # XPath - click first then type
-                            editor = page.locator(f'xpath={selector}')
-                            editor.click()
-                            page.keyboard.press('Control+a')
-                            page.keyboard.type(source_code)
-                        else:
-                            # CSS selector - use fill
-                            page.fill(selector, source_code, timeout=5000)
-                        
-                        print(f"✅ Code pasted using: {selector}")
-                        code_pasted = True
-                        break
-                    except:
-                        continue
-                
-                if not code_pasted:
-                    print("⚠️  Could not paste code automatically")
-                    if not no_interactive:
-                        print("   The code is in your clipboard - please paste it manually")
-                        print(f"   Code length: {len(source_code)} characters")
-                        input("Press Enter after pasting code...")
-                    else:
-                        print("❌ Cannot proceed in non-interactive mode")
-                        return False
-                
-                # Step 3: Submit the solution
-                print("🚀 Step 3: Submitting solution...")
-                time.sleep(1)
-                
-                # Try multiple submit button selectors
-                submit_btn_selectors = [
-                    '#singlePageSubmitButton',  # Direct ID selector - most reliable
-                    'input[type="submit"]',
-                    'button:has-text("Submit")',
-                    '//*[@id="singlePageSubmitButton"]',  # XPath version
-                    '.submit-button',
-                    '#submitButton'
-                ]
-                
-                submitted = False
-                for selector in submit_btn_selectors:
-                    try:
-                        if selector.startswith('//'):
-                            page.locator(f'xpath={selector}').click(timeout=5000)
-                        else:
-                            page.click(selector, timeout=5000)
-                        
-                        print(f"✅ Submit button clicked using: {selector}")
-                        submitted = True
-                        time.sleep(2)  # Wait for submission to process
-                        break
-                    except Exception as e:
-                        # Only show error for first selector attempt
-                        if selector == submit_btn_selectors[0]:
-                            print(f"   Trying alternative selectors...")
-                        continue
-                
-                if not submitted:
-                    print("⚠️  Could not click submit button automatically")
-                    if not no_interactive:
-                        print("   Please click the Submit button manually")
-                        input("Press Enter after submitting...")
-                    else:
-                        print("❌ Cannot proceed in non-interactive mode")
-                        return False
-                
-                # Step 4: Navigate to status page and get submission ID
-                print("⏳ Step 4: Waiting for submission to be recorded...")
-                time.sleep(5)  # Increased wait time for submission to be recorded
-                
-                current_url = page.url
-                print(f"📍 Current URL: {current_url}")
-                submission_id = None
-                
-                # Navigate to status page to get submission details
-                if 'status' not in current_url:
-                    print("🔄 Navigating to status page...")
-                    try:
-                        page.goto("https://codeforces.com/problemset/status?my=on", wait_until='domcontentloaded', timeout=10000)
-                        time.sleep(3)
-                    except Exception as e:
-                        print(f"⚠️  Navigation warning: {e}")
-                        # Try alternative navigation
-                        page.goto("https://codeforces.com/submissions", wait_until='domcontentloaded', timeout=10000)
-                        time.sleep(3)
-                    
-                # Step 5: Extract submission ID using your XPath
+                row_id = page.wait_for_function(SUBMISSION_ROW_JS, arg=[str(contest_id), problem_letter],
+                                                timeout=timer.budget_ms("submission_row"))
+                submission_id = row_id.json_value()
+                print(f"🎯 Submission ID: {submission_id}")
+            except PlaywrightTimeoutError:
+                print(f"⚠️  No status row for {contest_id}{problem_letter}")
+            except Exception as e:
+                print(f"⚠️  Could not extract submission ID: {e}")
+            
+            if not submission_id:
                 try:
                     submission_link = page.locator('//*[@id="pageContent"]/div[4]/div[6]/table/tbody/tr[2]/td[1]/a').first
                     if submission_link.is_visible():
@@ -879,141 +1094,181 @@ def submit_with_existing_chrome(solution_file: str, contest_id: int, problem_let
                                 print(f"🎯 Submission ID (from page): {submission_id}")
                 except Exception as e:
                     print(f"⚠️  Could not extract submission ID: {e}")
+            
+    print("🎉 Solution submitted successfully!")
+    emit("submitted", submission_id=submission_id)
+    
+    # Step 5.5: Set up API interception BEFORE polling (API calls happen during polling!)
+    captured_api_responses = []
+    all_urls_seen = []  # Debug: track all URLs
+    
+    def handle_api_response(response):
+        """Synchronous handler for Playwright's sync API"""
+        try:
+            url = response.url
+            
+            # Debug: Log all URLs from codeforces
+            if 'codeforces.com' in url and '/data/' in url:
+                all_urls_seen.append(url)
+                print(f"🔍 DEBUG: Codeforces /data/ URL seen: {url[:100]}")
+            
+            # Look for submitSource API calls
+            if 'data/submitSource' in url or 'submissionVerdict' in url:
+                print(f"🎯 MATCHED API call: {url}")
                 
-                print("🎉 Solution submitted successfully!")
-                
-                # Step 5.5: Set up API interception BEFORE polling (API calls happen during polling!)
-                captured_api_responses = []
-                all_urls_seen = []  # Debug: track all URLs
-                
-                def handle_api_response(response):
-                    """Synchronous handler for Playwright's sync API"""
-                    try:
-                        url = response.url
-                        
-                        # Debug: Log all URLs from codeforces
-                        if 'codeforces.com' in url and '/data/' in url:
-                            all_urls_seen.append(url)
-                            print(f"🔍 DEBUG: Codeforces /data/ URL seen: {url[:100]}")
-                        
-                        # Look for submitSource API calls
-                        if 'data/submitSource' in url or 'submissionVerdict' in url:
-                            print(f"🎯 MATCHED API call: {url}")
-                            
-                            # Extract rv parameter from URL
-                            rv_match = re.search(r'rv=([a-zA-Z0-9]+)', url)
-                            rv_param = rv_match.group(1) if rv_match else "unknown"
-                            
-                            # Get response text (synchronous in sync Playwright)
-                            try:
-                                response_text = response.text()
-                                print(f"✅ Captured API response ({len(response_text)} chars)")
-                                
-                                captured_api_responses.append({
-                                    "url": url,
-                                    "rv_parameter": rv_param,
-                                    "response_text": response_text,
-                                    "status": response.status,
-                                    "headers": dict(response.headers)
-                                })
-                            except Exception as e:
-                                print(f"⚠️  Could not read response text: {e}")
-                    except Exception as e:
-                        print(f"⚠️  Error handling response: {e}")
-                
-                # Set up response listener BEFORE polling starts
-                page.on("response", handle_api_response)
-                print("🎯 API interception enabled (will capture during verdict polling)")
-                
-                # Step 6: Poll for verdict using your XPath elements
-                verdict = await_verdict(page, submission_id)
-                
-                # Debug: Show what /data/ URLs were seen
-                print(f"\n🔍 DEBUG: Total Codeforces /data/ URLs seen: {len(all_urls_seen)}")
-                if all_urls_seen:
-                    for url in all_urls_seen[:5]:  # Show first 5
-                        print(f"   - {url[:120]}")
-                
-                # Step 7: Get detailed results via API - do this ALWAYS if we have submission_id
-                # (even on timeout, because we may have captured API responses)
-                if submission_id and captured_api_responses:
-                    print(f"📊 Captured {len(captured_api_responses)} API responses during polling")
-                    detailed_results = get_detailed_results(page, submission_id, captured_api_responses)
-                    if detailed_results:
-                        print("📊 Detailed Results Available")
-                
-                if verdict and verdict != "Timeout":
-                    print(f"🏆 Final Verdict: {verdict}")
-                    
-                    # If we didn't save API responses above (no responses during polling), try clicking
-                    if submission_id and not captured_api_responses:
-                        print(f"📊 No API responses during polling, trying click method...")
-                        detailed_results = get_detailed_results(page, submission_id, captured_api_responses)
-                        if detailed_results:
-                            print("📊 Detailed Results Available")
-                            # detailed_results is a dict, convert to JSON for printing
-                            try:
-                                # Print summary from the dict
-                                if 'compilationError' in detailed_results:
-                                    print(f"⚠️  Compilation Error: {detailed_results['compilationError']}")
-                                
-                                # Check for facebox test results
-                                if 'click_results' in detailed_results and isinstance(detailed_results['click_results'], str):
-                                    try:
-                                        click_data = json.loads(detailed_results['click_results'])
-                                        if 'test_results' in click_data:
-                                            test_count = click_data.get('test_count', len(click_data['test_results']))
-                                            print(f"📊 Total Tests (Facebox): {test_count}")
-                                            print(f"📊 Test Results Parsed from Facebox:")
-                                            for i, test in enumerate(click_data['test_results'][:3], 1):  # Show first 3
-                                                print(f"   Test {i}: {test.get('verdict', 'N/A')}")
-                                                if test.get('checker_log'):
-                                                    print(f"      Checker: {test['checker_log'][:80]}")
-                                    except:
-                                        pass
-                                
-                                # Print the FULL JSON for automated_solver to capture
-                                print("\n📦 DETAILED_API_RESPONSE_START")
-                                print(json.dumps(detailed_results, indent=2, ensure_ascii=False))
-                                print("📦 DETAILED_API_RESPONSE_END\n")
-                            except Exception as e:
-                                print(f"⚠️  Error processing results: {e}")
-                                print("📊 Raw Results:")
-                                print(str(detailed_results)[:500])
-                    
-                    # Determine success based on verdict
-                    is_accepted = "accepted" in verdict.lower()
-                    if is_accepted:
-                        print("🎊 CONGRATULATIONS! Solution Accepted! 🎊")
-                    else:
-                        print(f"💭 Try again! Verdict: {verdict}")
+                # Extract rv parameter from URL
+                rv_match = re.search(r'rv=([a-zA-Z0-9]+)', url)
+                rv_param = rv_match.group(1) if rv_match else "unknown"
                 
-                    print()
-                    print("🎉 **Submission process completed!**")
-                    print("   Browser will remain open for your review")
-                    print()
-                    
-                    if not no_interactive:
-                        input("Press Enter to finish (browser will remain open)...")
-                    return is_accepted
-                else:
-                    print("⏰ Could not determine final verdict within timeout")
-                    print("🔍 Browser will remain open for manual inspection")
-                    if not no_interactive:
-                        input("Press Enter to finish...")
-                    return False
+                # Get response text (synchronous in sync Playwright)
+                try:
+                    response_text = response.text()
+                    print(f"✅ Captured API response ({len(response_text)} chars)")
+                    watcher.observe_api_response(response_text)
                     
-            except Exception as e:
-                print(f"❌ Error during automated submission: {e}")
-                print("   You can continue manually in the browser")
-                if not no_interactive:
-                    input("Press Enter to finish...")
-                return False
+                    captured_api_responses.append({
+                        "url": url,
+                        "rv_parameter": rv_param,
+                        "response_text": response_text,
+                        "status": response.status,
+                        "headers": dict(response.headers)
+                    })
+                except Exception as e:
+                    print(f"⚠️  Could not read response text: {e}")
+        except Exception as e:
+            print(f"⚠️  Error handling response: {e}")
+    
+    # Set up response listener BEFORE polling starts
+    # Queue time counts from the submit click, not from when we start watching
+    watcher = VerdictWatcher(page, submission_id, max_wait_time=timer.budget("verdict"), started_at=submitted_at)
+    page.on("response", handle_api_response)
+    print("🎯 API interception enabled (will capture during verdict polling)")
+    
+    try:
+        # Step 6: Watch for the verdict (live status cell + intercepted API responses)
+        with timer.step("verdict"):
+            verdict = watcher.wait()
+        timing = watcher.timing()
+        
+        # Debug: Show what /data/ URLs were seen
+        print(f"\n🔍 DEBUG: Total Codeforces /data/ URLs seen: {len(all_urls_seen)}")
+        if all_urls_seen:
+            for url in all_urls_seen[:5]:  # Show first 5
+                print(f"   - {url[:120]}")
+        
+        detailed_results = None
+        api_response_file = None
+        
+        # Step 7: Get detailed results via API - do this ALWAYS if we have submission_id
+        # (even on timeout, because we may have captured API responses)
+        if submission_id and captured_api_responses:
+            print(f"📊 Captured {len(captured_api_responses)} API responses during polling")
+            detailed_results, api_response_file = get_detailed_results(page, submission_id, captured_api_responses, api_dir, timer)
+            if detailed_results:
+                print("📊 Detailed Results Available")
+        
+        if verdict and verdict != "Timeout":
+            print(f"🏆 Final Verdict: {verdict}")
+            emit("verdict", submission_id=submission_id, verdict=verdict)
             
-    except Exception as e:
-        print(f"❌ Failed to connect to Chromium: {e}")
-        print("   Make sure Chromium is running with remote debugging enabled")
+            # If we didn't save API responses above (no responses during polling), try clicking
+            if submission_id and not captured_api_responses:
+                print(f"📊 No API responses during polling, trying click method...")
+                detailed_results, api_response_file = get_detailed_results(page, submission_id, captured_api_responses, api_dir, timer)
+                if detailed_results:
+                    print("📊 Detailed Results Available")
+                    if detailed_results.get("test_results"):
+                        print(f"📊 Test Results Parsed from Facebox:")
+                        for i, test in enumerate(detailed_results["test_results"][:3], 1):  # Show first 3
+                            print(f"   Test {i}: {test.get('verdict', 'N/A')}")
+                            if test.get('checker_log'):
+                                print(f"      Checker: {test['checker_log'][:80]}")
+            
+            # Determine success based on verdict
+            is_accepted = "accepted" in verdict.lower()
+            if is_accepted:
+                print("🎊 CONGRATULATIONS! Solution Accepted! 🎊")
+            else:
+                print(f"💭 Try again! Verdict: {verdict}")
+        else:
+            is_accepted = False
+            print("⏰ Could not determine final verdict within timeout")
+        
+        print(f"⏱️  Steps: {timer.summary()}")
+        return SubmissionResult(
+            submission_id=submission_id,
+            verdict=verdict,
+            accepted=is_accepted,
+            api_response=detailed_results,
+            api_response_file=api_response_file,
+            queue_seconds=timing["queue_seconds"],
+            judging_seconds=timing["judging_seconds"],
+            timing=timer.report()
+        )
+    finally:
+        # The page outlives this submission; don't keep capturing into a stale list
+        page.remove_listener("response", handle_api_response)
+
+def submit_with_existing_chrome(solution_file: str, contest_id: int, problem_letter: str, port=9222, no_interactive=False,
+                                api_dir="api_responses", result_stream=None, workflow="manual", headless=PLAYWRIGHT_HEADLESS,
+                                spacing=True):
+    """Submit solution using existing Chromium browser.
+    
+    When result_stream is given, progress events and the final SubmissionResult
+    are written to it as JSON lines (see core.submission_result). With spacing
+    off the caller has already waited for the account's submission slot.
+    """
+    
+    def on_event(event):
+        if result_stream:
+            write_event(result_stream, **event)
+    
+    # Read the solution file
+    if not os.path.exists(solution_file):
+        print(f"❌ Solution file not found: {solution_file}")
+        result = SubmissionResult(error=f"Solution file not found: {solution_file}")
+        on_event({"event": "result", "result": result.to_dict()})
+        return False
+    
+    # Copy to clipboard if possible
+    try:
+        import pyperclip
+        pyperclip.copy(read_solution_source(solution_file))
+        print("✅ **Solution code copied to clipboard!**")
+    except ImportError:
+        print("💡 Install 'pyperclip' to auto-copy code: pip install pyperclip")
+    
+    print()
+    
+    with ChromiumSubmitter(port=port, no_interactive=no_interactive, headless=headless) as submitter:
+        # Wait for the account's next slot, shared with every other submitting process
+        spacer = get_submit_spacer() if spacing else None
+        spacing_wait = spacer.acquire(workflow) if spacer else None
+        result = submitter.submit(solution_file, contest_id, problem_letter, api_dir=api_dir, on_event=on_event)
+        result.spacing_wait_seconds = spacing_wait
+    
+    on_event({"event": "result", "result": result.to_dict()})
+    
+    if result.error:
+        print("   You can continue manually in the browser")
+        if not no_interactive:
+            input("Press Enter to finish...")
         return False
+    
+    if result.verdict and result.verdict != "Timeout":
+        print()
+        print("🎉 **Submission process completed!**")
+        print("   Browser will remain open for your review")
+        print()
+        
+        if not no_interactive:
+            input("Press Enter to finish (browser will remain open)...")
+    else:
+        print("🔍 Browser will remain open for manual inspection")
+        if not no_interactive:
+            input("Press Enter to finish...")
+    
+    return result.accepted
 
 def main():
     parser = argparse.ArgumentParser(description="Submit solution using existing Chromium browser")
@@ -1024,6 +1279,11 @@ def main():
     parser.add_argument("--port", type=int, default=9222, help="Chromium debugging port (default: 9222)")
     parser.add_argument("--start-chrome", action="store_true", help="Start Chromium with debugging enabled")
     parser.add_argument("--no-interactive", action="store_true", help="Skip interactive prompts (for automation)")
+    parser.add_argument("--api-dir", default="api_responses", help="Directory for the submission's API response JSON (default: api_responses)")
+    parser.add_argument("--result-fd", type=int, help="File descriptor to stream JSON-lines result events to (for automation)")
+    parser.add_argument("--workflow", default="manual", help="Workflow the submission belongs to, for fair submission spacing (default: manual)")
+    parser.add_argument("--no-spacing", action="store_true", help="Don't wait for the account's submission slot (the caller already did)")
+    parser.add_argument("--headless", action="store_true", default=PLAYWRIGHT_HEADLESS, help="Launch a headless Chromium logged in through PLAYWRIGHT_STORAGE instead of using the running browser")
     
     args = parser.parse_args()
     
@@ -1056,17 +1316,29 @@ def main():
         if not start_chromium_with_debugging(args.profile, args.port):
             return
     
+    # Structured results go to a dedicated pipe so stdout stays free-form
+    result_stream = os.fdopen(args.result_fd, "w", encoding="utf-8") if args.result_fd is not None else None
+    
     # Submit solution
-    success = submit_with_existing_chrome(
-        args.solution_file,
-        contest_id,
-        problem_letter.upper(),
-        args.port,
-        args.no_interactive
-    )
+    try:
+        success = submit_with_existing_chrome(
+            args.solution_file,
+            contest_id,
+            problem_letter.upper(),
+            args.port,
+            args.no_interactive,
+            api_dir=args.api_dir,
+            result_stream=result_stream,
+            workflow=args.workflow,
+            headless=args.headless,
+            spacing=not args.no_spacing
+        )
+    finally:
+        if result_stream:
+            result_stream.close()
     
     # Always return success (0) if submission was made, regardless of verdict
-    # The verdict will be parsed from the output
+    # The verdict is reported on the result channel
     if success or success is not None:  # success can be True (Accepted) or False (other verdict)
         sys.exit(0)
     else:
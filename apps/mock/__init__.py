@@ -0,0 +1 @@
+# Mock Servers Package
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Mock Codeforces server
+
+Stand-in for the pages and endpoints the HTTP submitter (core/http_submitter.py)
+talks to, so the submit path can be exercised and timed offline:
+/enter (login form), /problemset/submit (CSRF token + submit form),
+/problemset/status, /api/user.status and /data/submitSource. Submissions
+sit in queue, then are judged test by test before getting their verdict.
+Point the submitter at it with CF_BASE_URL=http://127.0.0.1:8766.
+"""
+
+import argparse
+import html
+import re
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+
+SESSION_COOKIE = "JSESSIONID"
+
+
+def _page(body: str, csrf_token: str, handle: Optional[str], profile_link: bool = True) -> str:
+    if handle:
+        header = (f'<a href="/profile/{handle}">{handle}</a> | ' if profile_link else "") + \
+            '<a href="/abc123/logout">Logout</a>'
+    else:
+        header = '<a href="/enter">Enter</a>'
+    return (f'<html><head><meta name="X-Csrf-Token" content="{csrf_token}"/></head>'
+            f'<body><div class="lang-chooser">{header}</div><div id="pageContent">{body}</div></body></html>')
+
+
+def create_app(handle: str = "tester", password: str = "secret", queue_seconds: float = 0.5,
+               seconds_per_test: float = 0.2, test_count: int = 3,
+               judge: Optional[Callable[[str, str], str]] = None, submitted_redirect: str = "/problemset/status?my=on",
+               profile_link: bool = True) -> FastAPI:
+    """
+    Build the mock server
+
+    Args:
+        handle: Handle accepted by the login form
+        password: Password accepted by the login form
+        queue_seconds: How long a submission stays "In queue"
+        seconds_per_test: Judging time per test
+        test_count: Tests per problem
+        judge: Returns the API verdict code ("OK", "WRONG_ANSWER", ...) for (problem code, source);
+               default accepts everything
+        submitted_redirect: Where a successful submit redirects ("/submissions/{handle}" works too)
+        profile_link: Show the logged-in handle's /profile/ link in the page header
+
+    Returns:
+        FastAPI app; app.state.submissions lists every accepted form post
+    """
+    app = FastAPI(title="Mock Codeforces")
+    sessions: Dict[str, str] = {}  # session cookie -> csrf token
+    logged_in: set = set()
+    app.state.submissions: List[Dict[str, Any]] = []
+    app.state.requests = {"status_polls": 0, "logins": 0}
+    lock = threading.Lock()
+
+    def session_of(request: Request):
+        """(session cookie, csrf token) of the caller, creating a session if it has none"""
+        cookie = request.cookies.get(SESSION_COOKIE)
+        with lock:
+            if cookie not in sessions:
+                cookie = uuid.uuid4().hex
+                sessions[cookie] = uuid.uuid4().hex[:32]
+            return cookie, sessions[cookie]
+
+    def html_response(body: str, cookie: str, csrf_token: str) -> HTMLResponse:
+        response = HTMLResponse(_page(body, csrf_token, handle if cookie in logged_in else None, profile_link))
+        response.set_cookie(SESSION_COOKIE, cookie)
+        return response
+
+    async def form_of(request: Request) -> Dict[str, str]:
+        return {key: values[0] for key, values in parse_qs((await request.body()).decode("utf-8")).items()}
+
+    def state_of(submission: Dict[str, Any]) -> Dict[str, Any]:
+        """The submission as user.status reports it right now"""
+        elapsed = time.time() - submission["created_at"]
+        result = {
+            "id": submission["id"],
+            "creationTimeSeconds": int(submission["created_at"]),
+            "problem": {"contestId": submission["contest_id"], "index": submission["index"]},
+            "programmingLanguage": submission["program_type_id"],
+            "passedTestCount": 0,
+        }
+        if elapsed < queue_seconds:
+            return result  # in queue: no verdict yet
+        judged = int((elapsed - queue_seconds) / seconds_per_test)
+        failed_on = submission["failed_on"]
+        if judged < failed_on:
+            return {**result, "verdict": "TESTING", "passedTestCount": judged}
+        passed = test_count if submission["verdict"] == "OK" else max(0, failed_on - 1)
+        return {**result, "verdict": submission["verdict"], "passedTestCount": passed}
+
+    @app.get("/")
+    @app.get("/enter")
+    async def enter_page(request: Request):
+        cookie, csrf_token = session_of(request)
+        form = ('<form method="post" action="/enter"><input name="handleOrEmail"/>'
+                '<input name="password" type="password"/></form>')
+        return html_response(form, cookie, csrf_token)
+
+    @app.post("/enter")
+    async def enter(request: Request):
+        cookie, csrf_token = session_of(request)
+        form = await form_of(request)
+        if form.get("csrf_token") != csrf_token or form.get("handleOrEmail") != handle \
+                or form.get("password") != password:
+            return html_response('<span class="error for__password">Invalid handle/email or password</span>',
+                                 cookie, csrf_token)
+        with lock:
+            logged_in.add(cookie)
+            app.state.requests["logins"] += 1
+        response = RedirectResponse("/", status_code=302)
+        response.set_cookie(SESSION_COOKIE, cookie)
+        return response
+
+    @app.get("/problemset/submit")
+    async def submit_page(request: Request):
+        cookie, csrf_token = session_of(request)
+        if cookie not in logged_in:
+            return RedirectResponse("/enter", status_code=302)
+        return html_response('<form class="submit-form" method="post"><textarea name="source"></textarea></form>',
+                             cookie, csrf_token)
+
+    @app.post("/problemset/submit")
+    async def submit(request: Request):
+        cookie, csrf_token = session_of(request)
+        form = await form_of(request)
+        if cookie not in logged_in or request.query_params.get("csrf_token") != csrf_token \
+                or form.get("csrf_token") != csrf_token:
+            return RedirectResponse("/enter", status_code=302)
+
+        code = form.get("submittedProblemCode", "")
+        source = form.get("source", "")
+        match = re.fullmatch(r"(\d+)([A-Z]\d?)", code)
+        error = None
+        if not match:
+            error = "Choose valid problem"
+        elif not source.strip():
+            error = "Source should not be empty"
+        elif any(s["problem"] == code and s["source"] == source for s in app.state.submissions):
+            error = "You have submitted exactly the same code before"
+        if error:
+            return html_response(f'<span class="error for__source">{html.escape(error)}</span>', cookie, csrf_token)
+
+        verdict = judge(code, source) if judge else "OK"
+        with lock:
+            submission_id = 300000000 + len(app.state.submissions) + 1
+            app.state.submissions.append({
+                "id": submission_id,
+                "problem": code,
+                "contest_id": int(match.group(1)),
+                "index": match.group(2),
+                "program_type_id": form.get("programTypeId"),
+                "source": source,
+                "verdict": verdict,
+                # Last test judged: all of them, the second one for a rejection, none on a compilation error
+                "failed_on": {"OK": test_count, "COMPILATION_ERROR": 0}.get(verdict, min(2, test_count)),
+                "created_at": time.time(),
+            })
+        return RedirectResponse(submitted_redirect.format(handle=handle), status_code=302)
+
+    @app.get("/problemset/status")
+    @app.get("/submissions/{user}")
+    async def status_page(request: Request):
+        cookie, csrf_token = session_of(request)
+        rows = "".join(
+            f'<tr data-submission-id="{s["id"]}"><td>{s["id"]}</td><td>{s["problem"]}</td>'
+            f'<td class="status-verdict-cell" submissionid="{s["id"]}">{state_of(s).get("verdict", "In queue")}</td></tr>'
+            for s in reversed(app.state.submissions)
+        )
+        return html_response(f'<table class="status-frame-datatable">{rows}</table>', cookie, csrf_token)
+
+    @app.get("/api/user.status")
+    async def user_status(request: Request):
+        params = request.query_params
+        if params.get("handle") != handle:
+            return JSONResponse(status_code=400, content={"status": "FAILED",
+                                                          "comment": f"handle: User with handle {params.get('handle')} not found"})
+        start = int(params.get("from", 1)) - 1
+        count = int(params.get("count", 10))
+        with lock:
+            app.state.requests["status_polls"] += 1
+        submissions = list(reversed(app.state.submissions))[start:start + count]
+        return {"status": "OK", "result": [state_of(s) for s in submissions]}
+
+    @app.post("/data/submitSource")
+    async def submit_source(request: Request):
+        cookie, csrf_token = session_of(request)
+        form = await form_of(request)
+        if form.get("csrf_token") != csrf_token:
+            return JSONResponse(status_code=403, content={"error": "csrf"})
+        submission = next((s for s in app.state.submissions if str(s["id"]) == form.get("submissionId")), None)
+        if submission is None:
+            return JSONResponse(status_code=404, content={"error": "not found"})
+
+        state = state_of(submission)
+        final = state.get("verdict") not in (None, "TESTING")
+        judged = submission["failed_on"] if final else state["passedTestCount"]
+        details: Dict[str, str] = {"testCount": str(judged), "source": submission["source"],
+                                   "verdict": state.get("verdict", "")}
+        for i in range(1, judged + 1):
+            failed = i == submission["failed_on"] and submission["verdict"] != "OK"
+            details.update({
+                f"input#{i}": f"{i} {i}",
+                f"answer#{i}": str(2 * i),
+                f"output#{i}": str(2 * i + (1 if failed else 0)),
+                f"verdict#{i}": submission["verdict"] if failed else "OK",
+                f"accepted#{i}": "false" if failed else "true",
+                f"timeConsumed#{i}": "15",
+                f"memoryConsumed#{i}": "256",
+                f"checkerStdoutAndStderr#{i}": (f"wrong answer expected '{2 * i}', found '{2 * i + 1}'"
+                                                if failed else "ok 1 number(s)"),
+            })
+        return JSONResponse(content=details)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "submissions": len(app.state.submissions)}
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the mock Codeforces server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--handle", default="tester")
+    parser.add_argument("--password", default="secret")
+    parser.add_argument("--verdict", default="OK", help="API verdict code given to every submission (default: OK)")
+    args = parser.parse_args()
+
+    app = create_app(handle=args.handle, password=args.password, judge=lambda code, source: args.verdict)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Fake LLM providers and Codeforces judge
+
+In-process stand-ins used by the throughput benchmark
+(scripts/bench_feedback_loop.py): providers answer after a sampled latency
+with a canned solution or hint, the judge waits a sampled queue + judging
+delay and returns a verdict drawn from a configurable mix. Randomness is
+seeded per request content, so a run is reproducible whatever the thread
+interleaving. All simulated waiting is added to a WaitClock, which lets the
+benchmark separate waiting from orchestration overhead.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.llm_providers.base import ProviderResponse
+from core.llm_providers.context_policy import count_message_tokens, count_tokens
+from core.llm_providers.deepseek_provider import DeepSeekProvider
+from core.llm_providers.usage import normalize_usage
+from core.replay import parse_submission
+from core.submission_result import SubmissionResult
+
+FAKE_SOLUTION = """Read both numbers and print their sum.
+
+```cpp
+#include <bits/stdc++.h>
+using namespace std;
+
+int main() {
+    ios::sync_with_stdio(false);
+    cin.tie(nullptr);
+    long long a, b;
+    cin >> a >> b;
+    cout << a + b << endl;
+    return 0;
+}
+```"""
+
+FAKE_HINT = """The solution fails on large inputs: the sum overflows a 32-bit integer and the
+loop re-reads the input. Use long long for the accumulator and read each value once."""
+
+# Timestamps (e.g. in generated solution headers) are left out of the seed
+TIMESTAMP_RE = re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(\.\d+)?")
+
+DEFAULT_VERDICTS = {
+    "Accepted": 0.35,
+    "Wrong answer on test 2": 0.35,
+    "Time limit exceeded on test 7": 0.15,
+    "Runtime error on test 4": 0.1,
+    "Compilation error": 0.05,
+}
+
+
+@dataclass
+class LatencyModel:
+    """Log-normal delay given its median and 95th percentile (seconds)"""
+    median: float
+    p95: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """'median,p95' or a single fixed value"""
+        parts = [float(p) for p in spec.split(",")]
+        return cls(parts[0], parts[-1])
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median <= 0:
+            return 0.0
+        sigma = math.log(max(self.p95, self.median) / self.median) / 1.645
+        return self.median * math.exp(sigma * rng.gauss(0.0, 1.0))
+
+
+class WaitClock:
+    """Thread-safe totals of simulated waiting by kind (solution, hint, queue, judging)"""
+
+    def __init__(self):
+        self.totals: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, seconds: float) -> None:
+        with self._lock:
+            self.totals[kind] = self.totals.get(kind, 0.0) + seconds
+
+    def total(self, *kinds: str) -> float:
+        with self._lock:
+            return sum(self.totals.get(kind, 0.0) for kind in kinds)
+
+
+def _rng(seed: int, *key: Any) -> random.Random:
+    """Generator seeded by request content (same request -> same draws)"""
+    digest = hashlib.sha256(json.dumps([seed, *key], default=str).encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+class _FakeProvider:
+    """Answers every request after a sampled delay instead of calling the API"""
+
+    latency: LatencyModel
+    clock: WaitClock
+    kind: str
+    time_scale: float
+    seed: int
+
+    def __init__(self, model_name: str, client: Optional[Any] = None):
+        super().__init__(api_key="fake", model_name=model_name, client=client or object())
+
+    def _fake_reply(self, messages: List[Dict[str, str]]) -> Tuple[Any, float]:
+        last = TIMESTAMP_RE.sub("", messages[-1]["content"]) if messages else ""
+        rng = _rng(self.seed, self.model_name, len(messages), last)
+        delay = self.latency.sample(rng) * self.time_scale
+        self.clock.add(self.kind, delay)
+        text = FAKE_SOLUTION if self.kind == "solution" else FAKE_HINT
+        usage = normalize_usage({"prompt_tokens": count_message_tokens(messages), "completion_tokens": count_tokens(text)})
+        response = ProviderResponse(text, usage=usage)
+        if isinstance(self, DeepSeekProvider):
+            return (response, text), delay  # (combined, final answer)
+        return response, delay
+
+    def _make_api_call(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        response, delay = self._fake_reply(messages)
+        time.sleep(delay)
+        return response
+
+    async def _amake_api_call(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        response, delay = self._fake_reply(messages)
+        await asyncio.sleep(delay)
+        return response
+
+    def _open_stream(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        return None
+
+    async def _aopen_stream(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        return None
+
+
+def fake_provider_class(provider_class: type, kind: str, latency: LatencyModel, clock: WaitClock,
+                        time_scale: float = 1.0, seed: int = 0) -> type:
+    """
+    Fake subclass of a provider class
+
+    Args:
+        provider_class: Real provider (prompt building and context handling are kept)
+        kind: "solution" or "hint" (what to answer, and where the wait is booked)
+        latency: Response delay distribution
+        clock: Collects the simulated waiting
+        time_scale: Multiplier applied to every sampled delay
+        seed: Base seed of the delay draws
+    """
+    label = provider_class.__name__.replace("Provider", "").lower()
+
+    def __init__(self, model_name: str, client: Optional[Any] = None):
+        _FakeProvider.__init__(self, model_name, client)
+        self.provider_name = label  # derived from the class name otherwise
+
+    return type(f"Fake{provider_class.__name__}", (_FakeProvider, provider_class), {
+        "__init__": __init__, "kind": kind, "latency": latency, "clock": clock,
+        "time_scale": time_scale, "seed": seed,
+    })
+
+
+class FakeJudge:
+    """Drop-in for ChromiumSubmitter with sampled queue/judging delays and verdicts"""
+
+    def __init__(self, verdicts: Optional[Dict[str, float]] = None, queue: Optional[LatencyModel] = None,
+                 judging: Optional[LatencyModel] = None, clock: Optional[WaitClock] = None,
+                 time_scale: float = 1.0, seed: int = 0):
+        self.verdicts = verdicts or DEFAULT_VERDICTS
+        self.queue = queue or LatencyModel(5.0, 30.0)
+        self.judging = judging or LatencyModel(3.0, 10.0)
+        self.clock = clock or WaitClock()
+        self.time_scale = time_scale
+        self.seed = seed
+
+    def submit(self, solution_file: str, contest_id: int, problem_letter: str,
+               api_dir: Optional[str] = None, **kwargs) -> SubmissionResult:
+        problem_id = f"{contest_id}_{problem_letter}"
+        workflow, attempt = parse_submission(solution_file, api_dir)
+        rng = _rng(self.seed, problem_id, workflow, attempt)
+        verdict = rng.choices(list(self.verdicts), weights=list(self.verdicts.values()))[0]
+        queue_seconds = self.queue.sample(rng) * self.time_scale
+        judging_seconds = self.judging.sample(rng) * self.time_scale
+
+        time.sleep(queue_seconds + judging_seconds)
+        self.clock.add("queue", queue_seconds)
+        self.clock.add("judging", judging_seconds)
+
+        submission_id = str(900000000 + rng.randrange(100000000))
+        api_response = {"submission_id": submission_id, "parsed_api_response": _parsed_response(verdict)}
+        api_response_file = None
+        if api_dir:
+            api_response_file = str(Path(api_dir) / f"submission_{submission_id}.json")
+            with open(api_response_file, "w", encoding="utf-8") as f:
+                json.dump(api_response, f, indent=2)
+
+        return SubmissionResult(
+            submission_id=submission_id,
+            verdict=verdict,
+            accepted=verdict == "Accepted",
+            api_response=api_response,
+            api_response_file=api_response_file,
+            queue_seconds=queue_seconds,
+            judging_seconds=judging_seconds,
+        )
+
+    def close(self):
+        pass
+
+
+def _parsed_response(verdict: str) -> Dict[str, str]:
+    """Codeforces-style per-test fields up to the failing test"""
+    failed = int(verdict.rsplit(" ", 1)[-1]) if verdict.rsplit(" ", 1)[-1].isdigit() else None
+    test_count = failed or 10
+    parsed = {"testCount": str(test_count), "verdict": verdict, "compilationError": str(verdict == "Compilation error").lower()}
+    for i in range(1, test_count + 1):
+        parsed[f"verdict#{i}"] = "WRONG_ANSWER" if i == failed else "OK"
+        parsed[f"timeConsumed#{i}"] = "15"
+    return parsed
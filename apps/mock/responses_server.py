@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Mock OpenAI Responses API server
+
+Stand-in for POST /v1/responses so GPT-5 conversation chaining can be
+exercised and benchmarked offline. It stores every response, honours
+previous_response_id and models cost the way the real service bills it:
+input tokens of the stored conversation are reported as cached and processed
+faster than new input. Point the OpenAI client at it with
+base_url="http://127.0.0.1:8765/v1".
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_SOLUTION = """#include <bits/stdc++.h>
+using namespace std;
+
+int main() {
+    ios::sync_with_stdio(false);
+    cin.tie(nullptr);
+    long long a, b;
+    cin >> a >> b;
+    cout << a + b << endl;
+    return 0;
+}"""
+
+
+def count_tokens(text: str) -> int:
+    """Same ~4 characters per token estimate the providers use"""
+    return len(text) // 4 + 1 if text else 0
+
+
+def _input_text(value: Any) -> str:
+    """Flatten a string or list of input items to text for token counting"""
+    if isinstance(value, str):
+        return value
+    parts = []
+    for item in value or []:
+        content = item.get("content", "")
+        if isinstance(content, list):
+            content = "".join(part.get("text", "") for part in content)
+        parts.append(content)
+    return "\n".join(parts)
+
+
+def create_app(seconds_per_1k_input: float = 0.05, seconds_per_1k_cached: float = 0.005,
+               seconds_per_1k_output: float = 0.2,
+               responder: Optional[Callable[[Dict[str, Any]], str]] = None) -> FastAPI:
+    """
+    Build the mock server
+
+    Args:
+        seconds_per_1k_input: Simulated prefill time per 1k new input tokens
+        seconds_per_1k_cached: Prefill time per 1k tokens of the chained conversation
+        seconds_per_1k_output: Simulated decode time per 1k output tokens
+        responder: Returns the output text for a request body (default: an A+B solution)
+
+    Returns:
+        FastAPI app; app.state.requests records usage of every request
+    """
+    app = FastAPI(title="Mock Responses API")
+    # response id -> tokens of the whole conversation up to and including that response
+    conversations: Dict[str, int] = {}
+    app.state.requests = []
+    lock = threading.Lock()
+
+    def respond(body: Dict[str, Any]):
+        previous_id = body.get("previous_response_id")
+        with lock:
+            if previous_id and previous_id not in conversations:
+                return None, None
+            cached = conversations.get(previous_id, 0) if previous_id else 0
+
+        new_input = count_tokens(body.get("instructions") or "") + count_tokens(_input_text(body.get("input")))
+        text = responder(body) if responder else DEFAULT_SOLUTION
+        output_tokens = count_tokens(text)
+        response_id = f"resp_{uuid.uuid4().hex}"
+        usage = {
+            "input_tokens": cached + new_input,
+            "input_tokens_details": {"cached_tokens": cached},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": cached + new_input + output_tokens,
+        }
+        with lock:
+            if body.get("store", True):
+                conversations[response_id] = cached + new_input + output_tokens
+            app.state.requests.append({"id": response_id, "chained": bool(previous_id), **usage})
+
+        delay = (new_input * seconds_per_1k_input + cached * seconds_per_1k_cached
+                 + output_tokens * seconds_per_1k_output) / 1000
+        return _response_object(response_id, body.get("model", "gpt-5"), text, usage), delay
+
+    @app.post("/v1/responses")
+    async def create_response(request: Request):
+        body = await request.json()
+        response, delay = respond(body)
+        if response is None:
+            return JSONResponse(status_code=404, content={"error": {
+                "message": f"Previous response with id '{body.get('previous_response_id')}' not found.",
+                "type": "invalid_request_error", "param": "previous_response_id", "code": None
+            }})
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay)
+            return JSONResponse(response)
+        return StreamingResponse(_stream_events(response, delay), media_type="text/event-stream")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "stored_responses": len(conversations)}
+
+    return app
+
+
+def _response_object(response_id: str, model: str, text: str, usage: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": response_id,
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": "completed",
+        "output": [{
+            "type": "message",
+            "id": f"msg_{uuid.uuid4().hex}",
+            "status": "completed",
+            "role": "assistant",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": usage,
+    }
+
+
+async def _stream_events(response: Dict[str, Any], delay: float):
+    """Server-sent events in the order the real API emits them"""
+    text = response["output"][0]["content"][0]["text"]
+    lines = text.splitlines(keepends=True)
+
+    def event(kind: str, **payload) -> str:
+        return f"event: {kind}\ndata: {json.dumps({'type': kind, **payload})}\n\n"
+
+    yield event("response.created", response={**response, "status": "in_progress", "output": []})
+    for line in lines:
+        await asyncio.sleep(delay / max(1, len(lines)))
+        yield event("response.output_text.delta", item_id=response["output"][0]["id"],
+                    output_index=0, content_index=0, delta=line)
+    yield event("response.completed", response=response)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the mock OpenAI Responses API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
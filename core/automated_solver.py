@@ -10,30 +10,85 @@ This module handles the complete automated feedback loop for competitive program
 """
 
 import os
+import sys
 import json
-import re
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
 from sqlmodel import Session, select
+from core.browser_pool import BrowserPool, pool_enabled
+from core.config import CF_CHROMIUM_PORT, CF_SUBMIT_METHOD, LOCAL_JUDGE_ENABLED, REPLAY_MODE
 from core.db import engine
+from core.hidden_tests import ingest_hidden_tests, load_hidden_tests
+from core.http_submitter import HttpSubmitter, http_submit_enabled
 from core.models import Problem, TestCase
+from core.replay import create_submitter, replay_output_dir, resume_by_default
+from core.runner_local import LocalJudge, LocalJudgeResult, allows_multiple_answers, output_ignores_case
+from core.submission_result import SubmissionResult, read_events
+from core.submit_spacer import SubmitSpacer, get_submit_spacer
+from core.metrics import JOBS, JOBS_INFLIGHT, SUBMISSION_QUEUE, SUBMISSIONS, record_attempt, verdict_code
+from core.tracing import record_span, span
+from core.llm_providers.usage import merge_usage
 from core.workflow_manager import WorkflowManager, WorkflowType
 
 
+def is_finished(solving_log: Dict, max_attempts: int) -> bool:
+    """Whether a solving log needs no more attempts (accepted, or out of attempts)"""
+    attempts = solving_log.get("attempts", [])
+    return (solving_log.get("final_status") == "accepted" or any(a.get("accepted") for a in attempts)
+            or len(attempts) >= max_attempts)
+
+
+def create_chromium_submitter():
+    """In-process submitter driving the already logged-in Chromium (headless with PLAYWRIGHT_HEADLESS, or the browser pool, if configured)"""
+    if pool_enabled():
+        return BrowserPool().start()
+    from apps.cli.submit_existing_chromium import ChromiumSubmitter
+    return ChromiumSubmitter(port=CF_CHROMIUM_PORT, no_interactive=True)
+
+
+def create_live_submitter():
+    """Real Codeforces submitter for CF_SUBMIT_METHOD: plain HTTP (cloudscraper) or Chromium (playwright)"""
+    if http_submit_enabled():
+        return HttpSubmitter()
+    if CF_SUBMIT_METHOD == "cloudscraper":
+        print("⚠️  CF_SUBMIT_METHOD=cloudscraper needs a cookie jar or CF_USERNAME/CF_PASSWORD - using Chromium")
+    return create_chromium_submitter()
+
+
 class AutomatedProblemSolver:
     """Complete automated problem solving system with feedback loop"""
     
-    def __init__(self, base_dir: str = "problems_solved", workflow_type: WorkflowType = WorkflowType.GPT_MISTRAL, interactive: bool = True):
-        self.base_dir = Path(base_dir)
-        self.base_dir.mkdir(exist_ok=True)
-        self.workflow_manager = WorkflowManager()
+    def __init__(self, base_dir: str = "problems_solved", workflow_type: WorkflowType = WorkflowType.GPT_MISTRAL, interactive: bool = True,
+                 submit_lock: Optional[threading.Lock] = None, workflow_manager: Optional[WorkflowManager] = None,
+                 submitter=None, use_subprocess_submitter: bool = False, local_judge: Optional[LocalJudge] = None,
+                 resume: Optional[bool] = None, submit_spacer: Optional[SubmitSpacer] = None):
+        self.base_dir = Path(replay_output_dir(base_dir))
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        # A shared manager lets several solvers reuse provider instances and SDK clients
+        self.workflow_manager = workflow_manager or WorkflowManager()
         self.workflow_type = workflow_type
         self.interactive = interactive
-        
-    def solve_problem(self, problem_id: str, max_attempts: int = 3, chromium_profile: str = "Sifat") -> Dict:
+        # Shared by batch runs so concurrent solvers don't drive the same browser tab at once
+        self.submit_lock = submit_lock or threading.Lock()
+        # Long-lived in-process submitter (created on first submission, reused across attempts/problems)
+        self.submitter = submitter
+        self.use_subprocess_submitter = use_subprocess_submitter
+        # Compile + sample tests before spending a Codeforces submission (None disables it)
+        self.local_judge = local_judge or (LocalJudge() if LOCAL_JUDGE_ENABLED else None)
+        # Continue from problem_dir/solving_log.json instead of starting at attempt 1
+        self.resume = resume_by_default() if resume is None else resume
+        # Paces submissions of the account across processes and workflows (None in replay mode)
+        self.submit_spacer = submit_spacer or get_submit_spacer()
+        
+    def solve_problem(self, problem_id: str, max_attempts: int = 3, chromium_profile: str = "Sifat",
+                      problem_data: Optional[Dict] = None) -> Dict:
         """
         Main solving function - orchestrates the complete feedback loop
         
@@ -41,20 +96,38 @@ class AutomatedProblemSolver:
             problem_id: Problem identifier like "2045_A"
             max_attempts: Maximum number of solution attempts (default: 3)
             chromium_profile: Chromium profile for Codeforces submission
+            problem_data: Already loaded problem data (skips reading problems/<id>.json)
             
         Returns:
             Dict with complete solving results and statistics
         """
+        with JOBS_INFLIGHT.track(), span("solve", problem=problem_id, workflow=self.workflow_type.value) as attrs:
+            result = self._solve_problem(problem_id, max_attempts, chromium_profile, problem_data)
+            attrs["status"] = result.get("status", "error")
+        JOBS.inc(status=attrs["status"])
+        return result
+    
+    def _solve_problem(self, problem_id: str, max_attempts: int, chromium_profile: str,
+                       problem_data: Optional[Dict]) -> Dict:
+        """solve_problem() inside its trace span"""
         print(f"🚀 Starting automated solving for problem {problem_id}")
         
         # Setup problem directory structure
         problem_dir = self._setup_problem_directory(problem_id)
         
         # Load problem from database
-        problem_data = self._load_problem_data(problem_id)
+        with span("problem_load"):
+            problem_data = problem_data or self._load_problem_data(problem_id)
         if not problem_data:
             return {"error": f"Problem {problem_id} not found in database"}
         
+        # Pick up an earlier run of this problem/workflow where it stopped
+        checkpoint = self.load_checkpoint(problem_dir) if self.resume else None
+        if checkpoint and is_finished(checkpoint, max_attempts):
+            final_result = self._checkpoint_result(checkpoint)
+            print(f"⏭️ {problem_id} ({self.workflow_type.value}) already finished: {final_result['status']}")
+            return final_result
+        
         # Save problem info
         self._save_problem_info(problem_dir, problem_data)
         
@@ -62,28 +135,41 @@ class AutomatedProblemSolver:
         workflow_session = self.workflow_manager.create_session(self.workflow_type, problem_id)
         
         # Initialize solving log
-        solving_log = {
-            "problem_id": problem_id,
-            "workflow_type": self.workflow_type.value,
-            "workflow_session": workflow_session,
-            "start_time": datetime.now().isoformat(),
-            "max_attempts": max_attempts,
-            "attempts": [],
-            "final_status": "in_progress"
-        }
+        if checkpoint:
+            solving_log = checkpoint
+            print(f"♻️ Resuming after attempt {len(solving_log['attempts'])}/{max_attempts} from solving_log.json")
+            solving_log.setdefault("resumed_at", []).append(datetime.now().isoformat())
+            solving_log["previous_llm_usage"] = solving_log.pop("llm_usage", {})
+            solving_log.pop("end_time", None)
+            solving_log.update(workflow_session=workflow_session, max_attempts=max_attempts, final_status="in_progress")
+            self._add_missing_hint(problem_data, solving_log, problem_dir, max_attempts)
+        else:
+            solving_log = {
+                "problem_id": problem_id,
+                "workflow_type": self.workflow_type.value,
+                "workflow_session": workflow_session,
+                "start_time": datetime.now().isoformat(),
+                "max_attempts": max_attempts,
+                "attempts": [],
+                "final_status": "in_progress"
+            }
         
         # Solving loop
-        for attempt in range(1, max_attempts + 1):
+        for attempt in range(len(solving_log["attempts"]) + 1, max_attempts + 1):
             print(f"\n🔄 Attempt {attempt}/{max_attempts}")
             
-            attempt_result = self._solve_attempt(
-                problem_dir=problem_dir,
-                problem_data=problem_data,
-                attempt_number=attempt,
-                previous_attempts=solving_log["attempts"],
-                chromium_profile=chromium_profile,
-                workflow_session=solving_log["workflow_session"]
-            )
+            with span("attempt", attempt=attempt) as attrs:
+                attempt_result = self._solve_attempt(
+                    problem_dir=problem_dir,
+                    problem_data=problem_data,
+                    attempt_number=attempt,
+                    previous_attempts=solving_log["attempts"],
+                    chromium_profile=chromium_profile,
+                    workflow_session=solving_log["workflow_session"]
+                )
+                attrs["verdict"] = attempt_result.get("verdict") or attempt_result.get("error") \
+                    or attempt_result.get("submission_error")
+            record_attempt(self.workflow_type.value, attempt_result.get("verdict"))
             
             solving_log["attempts"].append(attempt_result)
             
@@ -104,21 +190,7 @@ class AutomatedProblemSolver:
                 print(f"🔄 Preparing for attempt {attempt + 1}...")
                 
                 # Generate hint for next attempt using the configured hint provider
-                if attempt_result.get("solution_code") and attempt_result.get("verdict"):
-                    print(f"💡 Generating debugging hint...")
-                    try:
-                        hint = self._generate_hint(
-                            problem_data, 
-                            attempt_result, 
-                            solving_log["workflow_session"],
-                            problem_dir,
-                            attempt
-                        )
-                        attempt_result["hint"] = hint
-                        print(f"💡 Hint: {hint[:200]}..." if len(hint) > 200 else f"💡 Hint: {hint}")
-                    except Exception as e:
-                        print(f"⚠️ Failed to generate hint: {str(e)}")
-                        attempt_result["hint_error"] = str(e)
+                self._add_hint(problem_data, attempt_result, solving_log, problem_dir)
         
         else:
             # All attempts failed
@@ -126,14 +198,169 @@ class AutomatedProblemSolver:
             solving_log["final_status"] = "failed"
             solving_log["end_time"] = datetime.now().isoformat()
         
+        # Provider-reported tokens and prompt-cache hits (of every run, when resumed)
+        solving_log["llm_usage"] = self.workflow_manager.get_session_usage(workflow_session)
+        for role, totals in solving_log.pop("previous_llm_usage", {}).items():
+            merge_usage(solving_log["llm_usage"].setdefault(role, {}), totals)
+        self._save_solving_log(problem_dir, solving_log)
+        
         # Save final result
         final_result = self._create_final_result(solving_log)
         self._save_final_result(problem_dir, final_result)
         
         return final_result
     
-    def _setup_problem_directory(self, problem_id: str) -> Path:
-        """Create and return problem directory structure with workflow subfolder"""
+    def compare_workflows(self, problem_id: str, workflows: Optional[List[WorkflowType]] = None,
+                          max_attempts: int = 3, chromium_profile: str = "Sifat") -> Dict:
+        """
+        Solve one problem with several workflows in parallel
+        
+        The problem is loaded once and every workflow shares this solver's
+        WorkflowManager, so provider instances and SDK clients (e.g. the OpenAI
+        client behind gpt-4 and gpt-5) are created only once.
+        
+        Args:
+            problem_id: Problem identifier like "2045_A"
+            workflows: Workflows to compare (default: all workflows)
+            max_attempts: Maximum number of solution attempts per workflow
+            chromium_profile: Chromium profile for Codeforces submission
+            
+        Returns:
+            Dict with the final result of every workflow plus timing totals
+        """
+        workflows = workflows or list(WorkflowType)
+        print(f"⚖️  Comparing {len(workflows)} workflows on problem {problem_id}")
+        
+        problem_data = self._load_problem_data(problem_id)
+        if not problem_data:
+            return {"error": f"Problem {problem_id} not found in database"}
+        
+        def run_workflow(workflow_type: WorkflowType) -> Tuple[WorkflowType, Dict, float]:
+            workflow_start = time.time()
+            solver = AutomatedProblemSolver(
+                base_dir=str(self.base_dir),
+                workflow_type=workflow_type,
+                interactive=self.interactive,
+                submit_lock=self.submit_lock,
+                workflow_manager=self.workflow_manager,
+                submitter=submitter,
+                use_subprocess_submitter=self.use_subprocess_submitter,
+                local_judge=self.local_judge,
+                resume=self.resume,
+                submit_spacer=self.submit_spacer
+            )
+            try:
+                result = solver.solve_problem(problem_id, max_attempts, chromium_profile, problem_data=problem_data)
+            except Exception as e:
+                print(f"⚠️ Workflow {workflow_type.value} crashed: {e}")
+                result = {"problem_id": problem_id, "error": str(e)}
+            return workflow_type, result, time.time() - workflow_start
+        
+        # All workflows submit through the same browser session
+        submitter = None if self.use_subprocess_submitter else self._get_submitter()
+        
+        compare_start = time.time()
+        with ThreadPoolExecutor(max_workers=len(workflows), thread_name_prefix="compare") as executor:
+            outcomes = list(executor.map(run_workflow, workflows))
+        wall_seconds = time.time() - compare_start
+        
+        results = {workflow_type.value: result for workflow_type, result, _ in outcomes}
+        workflow_seconds = {workflow_type.value: seconds for workflow_type, _, seconds in outcomes}
+        
+        print(f"⚖️  Comparison finished in {wall_seconds:.1f}s "
+              f"(sequential would take ~{sum(workflow_seconds.values()):.1f}s)")
+        
+        return {
+            "problem_id": problem_id,
+            "workflows": [wf.value for wf in workflows],
+            "accepted_by": [wf for wf, result in results.items() if result.get("accepted")],
+            "results": results,
+            "workflow_seconds": workflow_seconds,
+            "wall_seconds": wall_seconds
+        }
+    
+    def _add_hint(self, problem_data: Dict, attempt_result: Dict, solving_log: Dict, problem_dir: Path):
+        """Generate the debugging hint for a failed attempt and checkpoint it in the solving log"""
+        
+        if not (attempt_result.get("solution_code") and attempt_result.get("verdict")):
+            return
+        
+        attempt = attempt_result["attempt"]
+        print(f"💡 Generating debugging hint...")
+        try:
+            with span("hint", attempt=attempt):
+                hint = self._generate_hint(
+                    problem_data, 
+                    attempt_result, 
+                    solving_log["workflow_session"],
+                    problem_dir,
+                    attempt
+                )
+            attempt_result["hint"] = hint
+            print(f"💡 Hint: {hint[:200]}..." if len(hint) > 200 else f"💡 Hint: {hint}")
+        except Exception as e:
+            print(f"⚠️ Failed to generate hint: {str(e)}")
+            attempt_result["hint_error"] = str(e)
+        
+        # A restart after this point reuses the hint instead of asking for it again
+        self._save_solving_log(problem_dir, solving_log)
+    
+    def _add_missing_hint(self, problem_data: Dict, solving_log: Dict, problem_dir: Path, max_attempts: int):
+        """On resume: the run may have stopped between an attempt and its hint"""
+        
+        attempts = solving_log["attempts"]
+        if not attempts or len(attempts) >= max_attempts:
+            return
+        last = attempts[-1]
+        if not last.get("accepted") and not last.get("hint") and not last.get("hint_error"):
+            self._add_hint(problem_data, last, solving_log, problem_dir)
+    
+    def load_checkpoint(self, problem_dir: Path) -> Optional[Dict]:
+        """
+        Solving log of an earlier run in problem_dir, with the attempt context rebuilt
+        
+        Solution code and hints missing from solving_log.json (e.g. the run died
+        right after writing them) are read back from solutions/ and llm_responses/.
+        
+        Returns:
+            The solving log, or None if there is no usable one
+        """
+        try:
+            with open(problem_dir / "solving_log.json", encoding="utf-8") as f:
+                solving_log = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if solving_log.get("workflow_type") != self.workflow_type.value or not isinstance(solving_log.get("attempts"), list):
+            return None
+        
+        for attempt in solving_log["attempts"]:
+            solution_file = problem_dir / "solutions" / attempt.get("solution_file", "")
+            if not attempt.get("solution_code") and solution_file.is_file():
+                attempt["solution_code"] = solution_file.read_text(encoding="utf-8")
+            hint_file = problem_dir / "llm_responses" / f"hint_after_attempt_{attempt.get('attempt')}_RESPONSE.txt"
+            if not attempt.get("accepted") and not attempt.get("hint") and hint_file.is_file():
+                text = hint_file.read_text(encoding="utf-8")
+                attempt["hint"] = text.split("=" * 70 + "\n\n", 1)[-1]
+        return solving_log
+    
+    def finished_result(self, problem_id: str, max_attempts: int) -> Optional[Dict]:
+        """Final result of an earlier run that needs no more attempts (None if there is work left)"""
+        
+        checkpoint = self.load_checkpoint(self.problem_directory(problem_id))
+        if checkpoint and is_finished(checkpoint, max_attempts):
+            return self._checkpoint_result(checkpoint)
+        return None
+    
+    def _checkpoint_result(self, checkpoint: Dict) -> Dict:
+        """Final result of a finished checkpoint (one that died before recording its final status)"""
+        
+        if checkpoint.get("final_status") not in ("accepted", "failed"):
+            accepted = any(a.get("accepted") for a in checkpoint["attempts"])
+            checkpoint["final_status"] = "accepted" if accepted else "failed"
+        return self._create_final_result(checkpoint)
+    
+    def problem_directory(self, problem_id: str) -> Path:
+        """problems_solved/<id>/<workflow folder> of this solver (not created)"""
         # Get workflow name for folder structure
         workflow_config = self.workflow_manager.WORKFLOWS[self.workflow_type]
         
@@ -145,8 +372,12 @@ class AutomatedProblemSolver:
             .replace("gpt_4", "gpt4")\
             .replace("gpt_5", "gpt5")
         
-        # Create directory structure: problems_solved/2046_B/gpt4_codestral/
-        problem_dir = self.base_dir / problem_id / workflow_folder
+        # Directory structure: problems_solved/2046_B/gpt4_codestral/
+        return self.base_dir / problem_id / workflow_folder
+    
+    def _setup_problem_directory(self, problem_id: str) -> Path:
+        """Create and return problem directory structure with workflow subfolder"""
+        problem_dir = self.problem_directory(problem_id)
         
         # Create subdirectories
         (problem_dir / "solutions").mkdir(parents=True, exist_ok=True)
@@ -249,7 +480,7 @@ class AutomatedProblemSolver:
             "created_at": datetime.now().isoformat()
         }
         
-        with open(problem_dir / "problem_info.json", "w", encoding="utf-8") as f:
+        with span("persist", file="problem_info.json"), open(problem_dir / "problem_info.json", "w", encoding="utf-8") as f:
             json.dump(problem_info, f, indent=2, ensure_ascii=False)
     
     def _solve_attempt(self, problem_dir: Path, problem_data: Dict, attempt_number: int, 
@@ -277,33 +508,59 @@ class AutomatedProblemSolver:
         solution_filename = f"{problem.contest_id}_{problem.letter}_Solution_{attempt_number}.cpp"
         solution_path = problem_dir / "solutions" / solution_filename
         
-        with open(solution_path, "w", encoding="utf-8") as f:
+        with span("persist", file=solution_filename), open(solution_path, "w", encoding="utf-8") as f:
             f.write(solution_result["solution"])
         
         print(f"💾 Solution saved: {solution_path}")
         
-        # Step 3: Submit to Codeforces
-        print(f"📤 Submitting to Codeforces...")
-        submission_result = self._submit_solution(solution_path, chromium_profile)
+        # Step 3: Local judge - broken code goes straight to the hint stage
+        with span("local_judge") as attrs:
+            local_result = self._run_local_judge(solution_result["solution"], problem_data)
+            attrs["verdict"] = local_result.verdict if local_result is not None else "SKIPPED"
+        if local_result is not None and local_result.blocks_submission:
+            verdict = local_result.describe()
+            print(f"🚫 {verdict} - skipping Codeforces submission")
+            return {
+                "attempt": attempt_number,
+                "timestamp": attempt_start.isoformat(),
+                "duration_seconds": (datetime.now() - attempt_start).total_seconds(),
+                "solution_file": solution_filename,
+                "solution_code": solution_result["solution"],
+                "context_tokens": solution_result.get("context_tokens"),
+                "verdict": verdict,
+                "accepted": False,
+                "submission_skipped": True,
+                "local_judge": local_result.to_dict(),
+                "test_results": [asdict(t) for t in local_result.tests if t.verdict != "AC"]
+            }
         
-        if "error" in submission_result:
+        # Step 4: Submit to Codeforces
+        print(f"📤 Submitting to Codeforces...")
+        with span("submit") as attrs, SUBMISSION_QUEUE.track():
+            submission_result = self._submit_in_turn(solution_path, chromium_profile, problem,
+                                                     problem_dir / "api_responses", attrs)
+            attrs["verdict"] = submission_result.verdict or submission_result.error
+        SUBMISSIONS.inc(result="error" if submission_result.error else verdict_code(submission_result.verdict).value)
+        self._trace_judge_phases(submission_result)
+        
+        if submission_result.error:
             return {
                 "attempt": attempt_number,
                 "timestamp": attempt_start.isoformat(),
                 "duration_seconds": (datetime.now() - attempt_start).total_seconds(),
                 "solution_file": solution_filename,
                 "solution_code": solution_result["solution"],
-                "submission_error": submission_result["error"],
+                "context_tokens": solution_result.get("context_tokens"),
+                "submission_error": submission_result.error,
                 "accepted": False
             }
         
-        # Step 4: Move API response to problem directory
-        if "api_response_file" in submission_result:
-            self._move_api_response(submission_result["api_response_file"], problem_dir / "api_responses")
+        # Keep the tests Codeforces revealed so later attempts can replay them locally
+        self._harvest_hidden_tests(problem.id, submission_result)
         
         # Step 5: Analyze result
-        verdict = submission_result.get("verdict", "Unknown")
-        accepted = "accepted" in verdict.lower() or verdict == "OK"
+        verdict = submission_result.verdict or "Unknown"
+        accepted = submission_result.accepted or "accepted" in verdict.lower() or verdict == "OK"
         
         return {
             "attempt": attempt_number,
@@ -311,27 +568,87 @@ class AutomatedProblemSolver:
             "duration_seconds": (datetime.now() - attempt_start).total_seconds(),
             "solution_file": solution_filename,
             "solution_code": solution_result["solution"],
-            "submission_id": submission_result.get("submission_id"),
+            "context_tokens": solution_result.get("context_tokens"),
+            "submission_id": submission_result.submission_id,
             "verdict": verdict,
             "accepted": accepted,
-            "api_response": submission_result.get("api_response"),
-            "detailed_api_response": submission_result.get("detailed_api_response"),  # Facebox data
-            "test_results": submission_result.get("test_results", [])
+            "api_response": submission_result.api_response,
+            "api_response_file": submission_result.api_response_file,
+            "test_results": submission_result.test_results,
+            "queue_seconds": submission_result.queue_seconds,
+            "judging_seconds": submission_result.judging_seconds,
+            "spacing_wait_seconds": submission_result.spacing_wait_seconds,
+            "submit_timing": submission_result.timing,
+            "local_judge": local_result.to_dict() if local_result is not None else None
         }
     
+    def _trace_judge_phases(self, submission_result: SubmissionResult):
+        """Queue wait and judging reported by the submitter, as spans ending with the submission"""
+        
+        end = time.time()
+        judging = submission_result.judging_seconds or 0.0
+        if submission_result.queue_seconds is not None:
+            record_span("queue_wait", end - judging - submission_result.queue_seconds, end - judging)
+        if submission_result.judging_seconds is not None:
+            record_span("judging", end - judging, end, verdict=submission_result.verdict)
+    
+    def _harvest_hidden_tests(self, problem_id: str, submission_result: SubmissionResult):
+        """Store revealed hidden tests of a submission in the TestCase table"""
+        
+        try:
+            added = ingest_hidden_tests(problem_id, submission_result.api_response, submission_result.submission_id)
+        except Exception as e:
+            print(f"⚠️  Could not store hidden tests: {e}")
+            return
+        if added:
+            print(f"🗃️  Stored {added} new hidden test(s) for {problem_id}")
+    
+    def _run_local_judge(self, source: str, problem_data: Dict) -> Optional[LocalJudgeResult]:
+        """Compile and run the solution on the sample tests (None when disabled or unavailable)"""
+        
+        if self.local_judge is None:
+            return None
+        
+        problem = problem_data["problem"]
+        statement = f"{problem.statement_md}\n{getattr(problem, 'output_spec', '') or ''}"
+        if "interactive problem" in statement.lower():
+            print("⏭️  Interactive problem - local judge skipped")
+            return None
+        
+        tests = [(tc.input_text, tc.expected_output_text, "sample") for tc in problem_data["test_cases"]
+                 if tc.kind.value == "sample"]
+        sample_count = len(tests)
+        
+        # Hidden tests revealed by earlier submissions (any workflow) of this problem
+        try:
+            tests += [(tc.input_text, tc.expected_output_text, "hidden") for tc in load_hidden_tests(problem.id)]
+        except Exception as e:
+            print(f"⚠️  Could not load hidden tests: {e}")
+        
+        print(f"🧪 Local judge: compiling and running {sample_count} sample + "
+              f"{len(tests) - sample_count} known hidden test(s)...")
+        result = self.local_judge.judge(source, tests, allow_multiple_answers=allows_multiple_answers(statement),
+                                        ignore_case=output_ignores_case(statement))
+        
+        if result.verdict == "SKIPPED":
+            print(f"⏭️  Local judge skipped: {result.skip_reason}")
+            return None
+        if result.verdict == "AC":
+            build = "cached build" if result.compile_cache_hit else f"compile {result.compile_seconds:.1f}s"
+            print(f"✅ Passed {len(tests)} local test(s) ({build}, run {result.run_seconds:.1f}s)")
+        elif result.inconclusive and result.failed_test.case_mismatch:
+            print(f"⚠️  {result.describe()}, but the output differs only in letter case - submitting anyway")
+        elif result.inconclusive:
+            print(f"⚠️  {result.describe()}, but several answers may be valid - submitting anyway")
+        elif not result.blocks_submission:
+            print(f"⚠️  {result.describe()} - submitting anyway, Codeforces limits may differ")
+        return result
+    
     def _generate_solution(self, problem_data: Dict, previous_attempts: List[Dict], workflow_session: str, problem_dir: Path, attempt_number: int) -> Dict:
         """Generate solution using GPT with context from previous attempts"""
         
+        build_start = time.time()
         problem = problem_data["problem"]
-        test_cases = problem_data["test_cases"]
-        
-        # Prepare sample tests text
-        sample_tests_text = ""
-        sample_tests = []
-        for i, tc in enumerate([tc for tc in test_cases if tc.kind.value == "sample"], 1):
-            sample_tests_text += f"Sample Input {i}:\n{tc.input_text}\n\n"
-            sample_tests_text += f"Sample Output {i}:\n{tc.expected_output_text}\n\n"
-            sample_tests.append({"input": tc.input_text, "output": tc.expected_output_text})
         
         # Prepare previous attempt context if available (ONLY THE MOST RECENT)
         previous_context = []
@@ -341,6 +658,8 @@ class AutomatedProblemSolver:
             if not most_recent.get("accepted", False):
                 # Parse API response for detailed test results
                 test_results = self._extract_test_results_from_api(most_recent.get("api_response"))
+                if not test_results and most_recent.get("submission_skipped"):
+                    test_results = most_recent.get("test_results", [])
                 
                 previous_context.append({
                     "attempt": most_recent["attempt"],
@@ -351,11 +670,7 @@ class AutomatedProblemSolver:
                 })
         
         try:
-            # Build complete problem statement (statement_md already contains formatted problem)
-            problem_statement = f"""{problem.statement_md}
-
-Sample Tests:
-{sample_tests_text}"""
+            problem_statement = self._problem_statement(problem_data)
             
             # Save the FULL prompt being sent
             prompt_file = problem_dir / "llm_responses" / f"solution_attempt_{attempt_number}_PROMPT.txt"
@@ -385,12 +700,15 @@ Sample Tests:
                 f.write(f"\n\n{'='*70}\n")
             print(f"💾 Prompt saved: {prompt_file}")
             
+            record_span("prompt_build", build_start, role="solution")
+            
             # Use workflow manager to generate solution
-            raw_solution = self.workflow_manager.generate_solution(
-                workflow_session,
-                problem_statement,
-                previous_context if previous_context else None
-            )
+            with span("llm_solution", model=self.workflow_manager.WORKFLOWS[self.workflow_type].solution_model):
+                raw_solution = self.workflow_manager.generate_solution(
+                    workflow_session,
+                    problem_statement,
+                    previous_context if previous_context else None
+                )
             
             # Save raw LLM response
             llm_response_file = problem_dir / "llm_responses" / f"solution_attempt_{attempt_number}_RESPONSE.txt"
@@ -408,28 +726,42 @@ Sample Tests:
             header_comment = self._generate_solution_header(problem, len(previous_attempts) + 1)
             final_solution = header_comment + "\n\n" + raw_solution
             
-            return {"solution": final_solution, "raw_response": raw_solution}
+            # Token counts of this request (shows what the context policy saved)
+            turns = self.workflow_manager.get_solution_turns(workflow_session)
+            
+            return {"solution": final_solution, "raw_response": raw_solution,
+                    "context_tokens": turns[-1] if turns else None}
             
         except Exception as e:
             return {"error": f"Solution generation failed: {str(e)}"}
     
-    def _generate_hint(self, problem_data: Dict, failed_attempt: Dict, workflow_session: str, problem_dir: Path, attempt_number: int) -> str:
-        """Generate debugging hint using the configured hint provider"""
+    def _problem_statement(self, problem_data: Dict) -> str:
+        """Statement plus samples, byte-identical for every attempt, workflow and role.
         
+        It is the first thing after the system prompt in every conversation, so
+        providers can serve it from their prompt prefix cache.
+        """
         problem = problem_data["problem"]
-        test_cases = problem_data["test_cases"]
         
         # Prepare sample tests text
         sample_tests_text = ""
-        for i, tc in enumerate([tc for tc in test_cases if tc.kind.value == "sample"], 1):
+        for i, tc in enumerate([tc for tc in problem_data["test_cases"] if tc.kind.value == "sample"], 1):
             sample_tests_text += f"Sample Input {i}:\n{tc.input_text}\n\n"
             sample_tests_text += f"Sample Output {i}:\n{tc.expected_output_text}\n\n"
         
         # Build complete problem statement (statement_md already contains formatted problem)
-        problem_statement = f"""{problem.statement_md}
+        statement = f"""{problem.statement_md}
 
 Sample Tests:
 {sample_tests_text}"""
+        # Line endings / trailing spaces differ between scrapes of the same problem
+        return "\n".join(line.rstrip() for line in statement.replace("\r\n", "\n").split("\n"))
+    
+    def _generate_hint(self, problem_data: Dict, failed_attempt: Dict, workflow_session: str, problem_dir: Path, attempt_number: int) -> str:
+        """Generate debugging hint using the configured hint provider"""
+        
+        build_start = time.time()
+        problem_statement = self._problem_statement(problem_data)
         
         # Extract error details from API response or facebox
         error_details = ""
@@ -501,6 +833,25 @@ Sample Tests:
                 
                 error_details += f"{'='*50}\n\n"
         
+        # Local judge caught it before submission
+        elif failed_attempt.get("local_judge") and failed_attempt.get("submission_skipped"):
+            local = failed_attempt["local_judge"]
+            error_details += "Local Judge Results (not submitted to Codeforces):\n\n"
+            if local.get("verdict") == "CE":
+                error_details += f"Compiler Output:\n{local.get('compile_output', '')[:4000]}\n"
+            for test in local.get("tests", []):
+                if test.get("verdict") == "AC":
+                    continue
+                error_details += f"{'='*50}\n"
+                error_details += f"{test.get('kind', 'sample').capitalize()} Test {test.get('index')}:\n"
+                error_details += f"Verdict: {test.get('verdict')}\n"
+                error_details += f"\nInput:\n{test.get('input', '')}\n"
+                error_details += f"\nYour Output:\n{test.get('output', '')}\n"
+                error_details += f"\nExpected Answer:\n{test.get('expected', '')}\n"
+                if test.get("stderr"):
+                    error_details += f"\nStderr:\n{test['stderr'][:1000]}\n"
+                error_details += f"{'='*50}\n\n"
+        
         # Fallback to old test_results format
         elif failed_attempt.get("test_results"):
             error_details += "Test Results:\n"
@@ -540,14 +891,17 @@ Sample Tests:
             f.write(f"{'='*70}\n")
         print(f"💾 Hint prompt saved: {hint_prompt_file}")
         
+        record_span("prompt_build", build_start, role="hint")
+        
         # Use workflow manager to generate hint
-        raw_hint = self.workflow_manager.generate_hint(
-            workflow_session,
-            problem_statement,
-            failed_attempt.get("solution_code", ""),
-            failed_attempt.get("verdict", "Unknown"),
-            error_details
-        )
+        with span("llm_hint", model=self.workflow_manager.WORKFLOWS[self.workflow_type].hint_model):
+            raw_hint = self.workflow_manager.generate_hint(
+                workflow_session,
+                problem_statement,
+                failed_attempt.get("solution_code", ""),
+                failed_attempt.get("verdict", "Unknown"),
+                error_details
+            )
         
         # Save raw LLM hint response
         llm_hint_file = problem_dir / "llm_responses" / f"hint_after_attempt_{attempt_number}_RESPONSE.txt"
@@ -607,18 +961,67 @@ Sample Tests:
  * Rating: {problem.rating or "Unrated"}
  */"""
     
-    def _submit_solution(self, solution_path: Path, chromium_profile: str) -> Dict:
-        """Submit solution using existing Chromium-based submission system"""
+    def _get_submitter(self):
+        """Return the in-process submitter (HTTP or Chromium), connecting lazily on first use"""
+        
+        if self.submitter is None:
+            self.submitter = create_submitter(create_live_submitter)
+        return self.submitter
+    
+    def _submit_in_turn(self, solution_path: Path, chromium_profile: str, problem, api_dir: Path,
+                        attrs: Dict) -> SubmissionResult:
+        """Wait for the account's submission slot, then for the submit lock, then submit
+        
+        The slot is taken before the lock so every waiting solver sits in the
+        spacer's queue, which serves workflows fairly; behind the lock only
+        one of them would be waiting there and lock order would decide.
+        """
+        
+        spacing_wait = self.submit_spacer.acquire(self.workflow_type.value) if self.submit_spacer else None
+        if spacing_wait is not None:
+            attrs["spacing_wait_seconds"] = round(spacing_wait, 3)
+        
+        lock_start = time.time()
+        with self.submit_lock:
+            attrs["lock_wait_seconds"] = round(time.time() - lock_start, 3)
+            submission_result = self._submit_solution(solution_path, chromium_profile, problem, api_dir)
+        
+        if spacing_wait is not None:
+            submission_result.spacing_wait_seconds = spacing_wait
+        return submission_result
+    
+    def _submit_solution(self, solution_path: Path, chromium_profile: str, problem, api_dir: Path) -> SubmissionResult:
+        """Submit solution through the long-lived Chromium session"""
+        
+        if self.use_subprocess_submitter and REPLAY_MODE != "replay":
+            return self._submit_solution_subprocess(solution_path, chromium_profile, api_dir)
+        
+        try:
+            submitter = self._get_submitter()
+            return submitter.submit(
+                str(solution_path),
+                int(problem.contest_id),
+                problem.letter.upper(),
+                api_dir=str(api_dir)
+            )
+        except Exception as e:
+            return SubmissionResult(error=f"Submission error: {str(e)}")
+    
+    def _submit_solution_subprocess(self, solution_path: Path, chromium_profile: str, api_dir: Path) -> SubmissionResult:
+        """Submit solution by spawning submit_existing_chromium.py and reading its JSON-lines result pipe"""
         
+        read_fd, write_fd = os.pipe()
         try:
-            # Use the existing submit_existing_chromium.py script
-            import sys
             python_executable = sys.executable  # Use the same Python that's running this script
             cmd = [
                 python_executable, 
                 "apps/cli/submit_existing_chromium.py",
                 str(solution_path),
                 "--profile", chromium_profile,
+                "--api-dir", str(api_dir),
+                "--result-fd", str(write_fd),
+                "--workflow", self.workflow_type.value,
+                "--no-spacing",  # _submit_in_turn already waited for the account's slot
                 "--no-interactive"  # Always use --no-interactive when running as subprocess
             ]
             
@@ -627,126 +1030,42 @@ Sample Tests:
             
             print(f"🔧 Running: {' '.join(cmd)}")
             
-            # Capture output
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=300  # 5 minute timeout
-            )
-            
-            if result.returncode != 0:
-                return {
-                    "error": f"Submission failed with code {result.returncode}",
-                    "stdout": result.stdout,
-                    "stderr": result.stderr
-                }
-            
-            # Parse output to extract key information
-            output_lines = result.stdout.strip().split('\n')
-            submission_info = self._parse_submission_output(output_lines)
-            
-            return submission_info
-            
-        except subprocess.TimeoutExpired:
-            return {"error": "Submission timed out after 5 minutes"}
+            process = subprocess.Popen(cmd, pass_fds=(write_fd,))
         except Exception as e:
-            return {"error": f"Submission error: {str(e)}"}
-    
-    def _parse_submission_output(self, output_lines: List[str]) -> Dict:
-        """Parse submission script output to extract key information"""
-        
-        info = {}
-        found_api_response = None
-        capturing_detailed_response = False
-        detailed_response_lines = []
-        
-        for line in output_lines:
-            # Capture detailed API response between markers
-            if "📦 DETAILED_API_RESPONSE_START" in line:
-                capturing_detailed_response = True
-                detailed_response_lines = []
-                continue
-            elif "📦 DETAILED_API_RESPONSE_END" in line:
-                capturing_detailed_response = False
-                if detailed_response_lines:
-                    try:
-                        detailed_json = '\n'.join(detailed_response_lines)
-                        info["detailed_api_response"] = json.loads(detailed_json)
-                        print(f"✅ Captured detailed facebox data with {info['detailed_api_response'].get('test_count', 0)} tests")
-                    except Exception as e:
-                        print(f"⚠️  Could not parse detailed API response: {e}")
-                continue
-            
-            if capturing_detailed_response:
-                detailed_response_lines.append(line)
-                continue
-            
-            # Extract submission ID
-            if "Submission ID:" in line or "submission ID:" in line:
-                match = re.search(r'(?:S|s)ubmission ID:\s*(\d+)', line)
-                if match:
-                    info["submission_id"] = match.group(1)
-            
-            # Extract verdict
-            if "Final verdict:" in line or "Verdict:" in line or "final verdict:" in line:
-                parts = line.split(":", 1)
-                if len(parts) > 1:
-                    verdict = parts[1].strip()
-                    # Clean up verdict text
-                    verdict = re.sub(r'[^\w\s]', ' ', verdict).strip()
-                    info["verdict"] = verdict
-            
-            # Extract API response file
-            if "saved to:" in line and ("api_responses/" in line or ".json" in line):
-                match = re.search(r'saved to:\s*([^\s]+\.json)', line)
-                if match:
-                    info["api_response_file"] = match.group(1)
-            
-            # Look for comprehensive results data
-            if "Comprehensive results saved to:" in line:
-                match = re.search(r'saved to:\s*([^\s]+\.json)', line)
-                if match:
-                    info["api_response_file"] = match.group(1)
-        
-        # Try to load API response if file path was found
-        if "api_response_file" in info:
-            try:
-                api_file = Path(info["api_response_file"])
-                if api_file.exists():
-                    with open(api_file, 'r', encoding='utf-8') as f:
-                        api_data = json.load(f)
-                        info["api_response"] = api_data
-                        
-                        # Extract verdict from API response if not found in output
-                        if "verdict" not in info and "parsed_api_response" in api_data:
-                            parsed = api_data["parsed_api_response"]
-                            if "verdict" in parsed:
-                                verdict_html = parsed["verdict"]
-                                if "accepted" in verdict_html.lower():
-                                    info["verdict"] = "ACCEPTED"
-                                else:
-                                    # Extract text from HTML
-                                    clean_verdict = re.sub(r'<[^>]+>', ' ', verdict_html).strip()
-                                    info["verdict"] = clean_verdict
-            except Exception as e:
-                print(f"⚠️  Could not load API response file: {e}")
+            os.close(read_fd)
+            os.close(write_fd)
+            return SubmissionResult(error=f"Submission error: {str(e)}")
         
-        return info
-    
-    def _move_api_response(self, source_file: str, target_dir: Path):
-        """Move API response file to problem directory"""
-        
-        source_path = Path(source_file)
-        if source_path.exists():
-            target_path = target_dir / source_path.name
-            source_path.rename(target_path)
-            print(f"📁 Moved API response: {target_path}")
+        # Only the child may hold the write end, so EOF means the child is done
+        os.close(write_fd)
+        
+        # Kill the child if it hangs; reading the pipe then hits EOF
+        watchdog = threading.Timer(300, process.kill)  # 5 minute timeout
+        watchdog.start()
+        
+        result = None
+        try:
+            with os.fdopen(read_fd, "r", encoding="utf-8") as result_pipe:
+                for event in read_events(result_pipe):
+                    if event.get("event") == "submitted":
+                        print(f"📨 Submitted: {event.get('submission_id')}")
+                    elif event.get("event") == "result":
+                        result = SubmissionResult.from_dict(event.get("result", {}))
+            returncode = process.wait()
+        finally:
+            timed_out = not watchdog.is_alive()
+            watchdog.cancel()
+        
+        if result is not None:
+            return result
+        if timed_out:
+            return SubmissionResult(error="Submission timed out after 5 minutes")
+        return SubmissionResult(error=f"Submission failed with code {returncode}")
     
     def _save_solving_log(self, problem_dir: Path, solving_log: Dict):
         """Save current solving progress"""
         
-        with open(problem_dir / "solving_log.json", "w", encoding="utf-8") as f:
+        with span("persist", file="solving_log.json"), open(problem_dir / "solving_log.json", "w", encoding="utf-8") as f:
             json.dump(solving_log, f, indent=2, ensure_ascii=False)
     
     def _create_final_result(self, solving_log: Dict) -> Dict:
@@ -765,6 +1084,7 @@ Sample Tests:
             "total_duration_minutes": 0,
             "successful_attempt": None,
             "best_verdict": None,
+            "llm_usage": solving_log.get("llm_usage", {}),
             "statistics": {
                 "compilation_errors": 0,
                 "runtime_errors": 0,
@@ -805,7 +1125,7 @@ Sample Tests:
     def _save_final_result(self, problem_dir: Path, final_result: Dict):
         """Save final solving result"""
         
-        with open(problem_dir / "final_result.json", "w", encoding="utf-8") as f:
+        with span("persist", file="final_result.json"), open(problem_dir / "final_result.json", "w", encoding="utf-8") as f:
             json.dump(final_result, f, indent=2, ensure_ascii=False)
 
 
@@ -0,0 +1,212 @@
+"""
+Batch Solver Module
+
+Runs many automated feedback loops at once:
+1. Expand a list of problem ids x workflows into (problem, workflow) jobs
+2. Drive each job through AutomatedProblemSolver on a bounded thread pool
+3. Keep results in the usual problems_solved/<id>/<workflow>/ layout
+4. Write a batch summary next to the per-problem folders
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.automated_solver import AutomatedProblemSolver, create_live_submitter
+from core.browser_pool import pool_enabled
+from core.config import BATCH_CONCURRENCY, LOCAL_JUDGE_ENABLED, METRICS_PORT
+from core.http_submitter import http_submit_enabled
+from core.metrics import start_metrics_server
+from core.replay import create_submitter, replay_output_dir, resume_by_default
+from core.runner_local import LocalJudge
+from core.tracing import get_tracer
+from core.workflow_manager import WorkflowManager, WorkflowType
+
+
+@dataclass
+class BatchJob:
+    """A single (problem, workflow) pair to solve"""
+    problem_id: str
+    workflow_type: WorkflowType
+
+
+def list_problem_ids(problems_dir: str = "problems") -> List[str]:
+    """List problem ids (e.g. "2041_A") for every problems/<contest>-<letter>.json file"""
+    problem_ids = []
+    for json_path in sorted(Path(problems_dir).glob("*.json")):
+        contest_id, sep, letter = json_path.stem.partition("-")
+        if sep and contest_id.isdigit():
+            problem_ids.append(f"{contest_id}_{letter}")
+    return problem_ids
+
+
+class BatchSolver:
+    """Runs many solve loops concurrently with a global concurrency limit"""
+
+    def __init__(self, base_dir: str = "problems_solved", max_concurrency: int = BATCH_CONCURRENCY,
+                 interactive: bool = False, metrics_port: Optional[int] = METRICS_PORT, resume: Optional[bool] = None):
+        self.base_dir = Path(replay_output_dir(base_dir))
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.max_concurrency = max(1, max_concurrency)
+        self.interactive = interactive
+        # Skip finished (problem, workflow) pairs and continue interrupted ones (off by default in replay mode)
+        self.resume = resume_by_default() if resume is None else resume
+        # All jobs share one Chromium tab, so submissions are serialized while
+        # LLM calls of other jobs keep running (a browser pool leases each job a tab instead,
+        # and the HTTP submitter only serializes the form post)
+        self._submit_lock = None if pool_enabled() or http_submit_enabled() else threading.Lock()
+        # One manager for the whole batch so provider clients are created once
+        self._workflow_manager = WorkflowManager()
+        # Shared so identical sources from different workflows hit the same compile cache
+        self._local_judge = LocalJudge() if LOCAL_JUDGE_ENABLED else None
+        # Live counters for long sweeps (scraped from /metrics while the batch runs)
+        self._metrics_server = start_metrics_server(metrics_port)[0] if metrics_port is not None else None
+
+    def solve_batch(self, problem_ids: List[str], workflows: Optional[List[WorkflowType]] = None,
+                    max_attempts: int = 3, chromium_profile: str = "Sifat") -> Dict:
+        """
+        Solve every problem with every workflow, running up to max_concurrency loops at once
+
+        Args:
+            problem_ids: Problem identifiers like "2045_A"
+            workflows: Workflows to run for each problem (default: all workflows)
+            max_attempts: Maximum number of solution attempts per job
+            chromium_profile: Chromium profile for Codeforces submission
+
+        Returns:
+            Dict with per-job results and aggregate statistics
+        """
+        workflows = workflows or list(WorkflowType)
+        jobs = [BatchJob(problem_id, workflow) for problem_id in problem_ids for workflow in workflows]
+
+        print(f"📦 Starting batch: {len(problem_ids)} problems x {len(workflows)} workflows "
+              f"= {len(jobs)} jobs (concurrency {self.max_concurrency})")
+
+        batch_start = datetime.now()
+        job_results = []
+
+        # Pairs an earlier batch already finished keep their result and cost nothing
+        if self.resume:
+            pending = []
+            for job in jobs:
+                finished = self._finished_result(job, max_attempts)
+                if finished is None:
+                    pending.append(job)
+                else:
+                    job_results.append(finished)
+            if job_results:
+                print(f"⏭️ Skipping {len(job_results)} finished job(s), {len(pending)} left")
+            jobs = pending
+
+        # One browser session for every submission of the batch (recorded verdicts in replay mode)
+        submitter = create_submitter(create_live_submitter)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="solver") as executor:
+                futures = {
+                    executor.submit(self._run_job, job, max_attempts, chromium_profile, submitter): job
+                    for job in jobs
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    job_result = future.result()
+                    job_results.append(job_result)
+                    status = "✅" if job_result.get("accepted") else "❌"
+                    print(f"{status} [{done}/{len(jobs)}] {job_result['problem_id']} "
+                          f"({job_result['workflow_type']}): {job_result.get('status', 'error')}")
+        finally:
+            submitter.close()
+
+        summary = self._create_batch_summary(job_results, batch_start, max_attempts)
+        self._save_batch_summary(summary)
+        trace_file = get_tracer().write_chrome_trace()
+        if trace_file:
+            print(f"🧵 Batch trace: {trace_file}")
+
+        print(f"🏁 Batch finished: {summary['accepted']}/{summary['total_jobs']} accepted "
+              f"in {summary['total_duration_minutes']:.1f} minutes")
+
+        return summary
+
+    def _finished_result(self, job: BatchJob, max_attempts: int) -> Optional[Dict]:
+        """Saved result of a job that needs no more attempts (None if it still has to run)"""
+
+        solver = AutomatedProblemSolver(base_dir=str(self.base_dir), workflow_type=job.workflow_type,
+                                        workflow_manager=self._workflow_manager, local_judge=self._local_judge)
+        result = solver.finished_result(job.problem_id, max_attempts)
+        if result is None:
+            return None
+        result.update(workflow_type=job.workflow_type.value, wall_seconds=0.0, skipped=True)
+        return result
+
+    def _run_job(self, job: BatchJob, max_attempts: int, chromium_profile: str, submitter) -> Dict:
+        """Run a single solve loop, never letting one failure stop the batch"""
+
+        job_start = time.time()
+        try:
+            solver = AutomatedProblemSolver(
+                base_dir=str(self.base_dir),
+                workflow_type=job.workflow_type,
+                interactive=self.interactive,
+                submit_lock=self._submit_lock,
+                workflow_manager=self._workflow_manager,
+                submitter=submitter,
+                local_judge=self._local_judge,
+                resume=self.resume
+            )
+            result = solver.solve_problem(
+                problem_id=job.problem_id,
+                max_attempts=max_attempts,
+                chromium_profile=chromium_profile
+            )
+        except Exception as e:
+            print(f"⚠️ Job {job.problem_id} ({job.workflow_type.value}) crashed: {e}")
+            result = {"problem_id": job.problem_id, "error": str(e)}
+
+        result = dict(result)
+        result.setdefault("problem_id", job.problem_id)
+        result["workflow_type"] = job.workflow_type.value
+        result["wall_seconds"] = time.time() - job_start
+        return result
+
+    def _create_batch_summary(self, job_results: List[Dict], batch_start: datetime, max_attempts: int) -> Dict:
+        """Create aggregate batch statistics"""
+
+        batch_end = datetime.now()
+        job_results = sorted(job_results, key=lambda r: (r["problem_id"], r["workflow_type"]))
+
+        per_workflow: Dict[str, Dict[str, int]] = {}
+        for result in job_results:
+            stats = per_workflow.setdefault(result["workflow_type"], {"jobs": 0, "accepted": 0, "errors": 0})
+            stats["jobs"] += 1
+            if result.get("accepted"):
+                stats["accepted"] += 1
+            if "error" in result:
+                stats["errors"] += 1
+
+        return {
+            "start_time": batch_start.isoformat(),
+            "end_time": batch_end.isoformat(),
+            "total_duration_minutes": (batch_end - batch_start).total_seconds() / 60,
+            "max_concurrency": self.max_concurrency,
+            "max_attempts": max_attempts,
+            "total_jobs": len(job_results),
+            "accepted": sum(1 for r in job_results if r.get("accepted")),
+            "errors": sum(1 for r in job_results if "error" in r),
+            "skipped": sum(1 for r in job_results if r.get("skipped")),
+            "per_workflow": per_workflow,
+            "jobs": job_results
+        }
+
+    def _save_batch_summary(self, summary: Dict):
+        """Save batch summary to base_dir/batch_results_<timestamp>.json"""
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        summary_path = self.base_dir / f"batch_results_{timestamp}.json"
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"💾 Batch summary saved: {summary_path}")
@@ -0,0 +1,233 @@
+"""
+Browser Pool Module
+
+Several Chromium instances for parallel Codeforces submissions:
+1. One browser per profile in CHROMIUM_POOL_PROFILES, on CF_CHROMIUM_PORT,
+   CF_CHROMIUM_PORT + 1, ... (a browser already listening on its port is adopted)
+2. Each browser gets CHROMIUM_POOL_PAGES tabs of its own; every tab is a
+   ChromiumSubmitter with its own Playwright thread, so tabs submit and poll
+   verdicts in parallel
+3. submit() leases an idle tab of a healthy browser for one submission
+4. A monitor thread health-checks every browser over CDP (/json/version) and
+   relaunches the ones that stopped answering; their tabs reconnect on next use
+
+Browsers keep running after close(), like a single launch_chromium.py browser,
+so logins in the profiles survive between runs.
+"""
+
+import json
+import platform
+import subprocess
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from core.config import CF_CHROMIUM_PORT, CHROMIUM_HEALTH_CHECK_SEC, CHROMIUM_POOL_PAGES, CHROMIUM_POOL_PROFILES
+from core.submission_result import SubmissionResult
+
+# How long a (re)launched browser may take to open its debugging port
+LAUNCH_TIMEOUT_SEC = 15
+
+
+def cdp_version(port: int, timeout: float = 2.0) -> Optional[Dict[str, Any]]:
+    """Browser info from the CDP HTTP endpoint, or None if nothing healthy answers on the port"""
+    try:
+        with urllib.request.urlopen(f"http://localhost:{port}/json/version", timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+@dataclass
+class BrowserSlot:
+    """One Chromium instance of the pool and its tabs"""
+    profile: str
+    port: int
+    process: Optional[subprocess.Popen] = None  # None for a browser the pool adopted
+    healthy: bool = False
+    restarts: int = 0
+    pages: List[Any] = field(default_factory=list)  # ChromiumSubmitter per tab
+    idle: List[Any] = field(default_factory=list)
+
+
+class BrowserPool:
+    """Launches, health-checks and leases out tabs of several Chromium instances"""
+
+    def __init__(self, profiles: Optional[List[str]] = None, base_port: int = CF_CHROMIUM_PORT,
+                 pages_per_browser: int = CHROMIUM_POOL_PAGES, health_check_seconds: float = CHROMIUM_HEALTH_CHECK_SEC,
+                 url: str = "https://codeforces.com"):
+        profiles = profiles or CHROMIUM_POOL_PROFILES
+        self.slots = [BrowserSlot(profile, base_port + i) for i, profile in enumerate(profiles)]
+        self.pages_per_browser = max(1, pages_per_browser)
+        self.health_check_seconds = health_check_seconds
+        self.url = url
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._health_lock = threading.Lock()  # one check (and restart) at a time
+        self._monitor: Optional[threading.Thread] = None
+
+    def start(self) -> "BrowserPool":
+        """Bring up every browser, open its tabs lazily and start the health monitor"""
+        from apps.cli.submit_existing_chromium import ChromiumSubmitter
+
+        for slot in self.slots:
+            self._ensure_running(slot)
+            slot.pages = [ChromiumSubmitter(port=slot.port, no_interactive=True, new_page=True, headless=False)
+                          for _ in range(self.pages_per_browser)]
+            slot.idle = list(slot.pages)
+
+        healthy = sum(slot.healthy for slot in self.slots)
+        print(f"🌐 Browser pool: {healthy}/{len(self.slots)} browsers up, "
+              f"{self.pages_per_browser} tab(s) each on ports {self.slots[0].port}-{self.slots[-1].port}")
+        self._monitor = threading.Thread(target=self._monitor_loop, daemon=True, name="browser-pool-monitor")
+        self._monitor.start()
+        return self
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Borrow an idle tab (a ChromiumSubmitter) of a healthy browser
+
+        Args:
+            timeout: Seconds to wait for a free tab (None waits forever)
+
+        Raises:
+            TimeoutError: If no tab became free in time
+            RuntimeError: If no browser of the pool is up, even after trying to restart them
+        """
+        if not any(slot.healthy for slot in self.slots):
+            self.check_health()
+            if not any(slot.healthy for slot in self.slots):
+                raise RuntimeError("No browser of the pool is running")
+
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while True:
+                candidates = [slot for slot in self.slots if slot.healthy and slot.idle]
+                if candidates:
+                    # Spread submissions over browsers: take the one with most free tabs
+                    slot = max(candidates, key=lambda s: len(s.idle))
+                    page = slot.idle.pop()
+                    break
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("No healthy browser tab became free")
+                self._cond.wait(remaining if remaining is not None else self.health_check_seconds)
+        try:
+            yield page
+        finally:
+            with self._cond:
+                slot.idle.append(page)
+                self._cond.notify()
+
+    def submit(self, solution_file: str, contest_id: int, problem_letter: str, api_dir: str = "api_responses",
+               on_event=None) -> SubmissionResult:
+        """Submit on a leased tab and wait for the verdict (same interface as ChromiumSubmitter)"""
+        try:
+            with self.lease() as page:
+                result = page.submit(solution_file, contest_id, problem_letter, api_dir=api_dir, on_event=on_event)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return SubmissionResult(error=str(e))
+        if result.error:
+            # Don't hand out tabs of a browser that just died until the monitor restarted it
+            self.check_health()
+        return result
+
+    def check_health(self) -> None:
+        """Health-check every browser now, relaunching the ones that stopped answering"""
+        with self._health_lock:
+            for slot in self.slots:
+                self._check_slot(slot)
+
+    def _check_slot(self, slot: BrowserSlot) -> None:
+        alive = cdp_version(slot.port) is not None
+        if not alive and not self._stop.is_set():
+            with self._cond:
+                slot.healthy = False
+            print(f"💥 Chromium '{slot.profile}' on port {slot.port} is not responding - restarting")
+            slot.restarts += 1
+            alive = self._ensure_running(slot)
+        with self._cond:
+            slot.healthy = alive
+            self._cond.notify_all()
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Per-browser health, restarts and tab usage"""
+        with self._cond:
+            return [{
+                "profile": slot.profile,
+                "port": slot.port,
+                "healthy": slot.healthy,
+                "restarts": slot.restarts,
+                "launched": slot.process is not None,
+                "tabs": len(slot.pages),
+                "busy_tabs": len(slot.pages) - len(slot.idle),
+            } for slot in self.slots]
+
+    def close(self) -> None:
+        """Stop the monitor and disconnect every tab (the browsers keep running)"""
+        self._stop.set()
+        for slot in self.slots:
+            for page in slot.pages:
+                page.close()
+
+    def _monitor_loop(self) -> None:
+        while not self._stop.wait(self.health_check_seconds):
+            self.check_health()
+
+    def _ensure_running(self, slot: BrowserSlot) -> bool:
+        """Adopt the browser on the slot's port, or (re)launch it; returns whether it answers"""
+        if cdp_version(slot.port) is not None:
+            slot.healthy = True
+            return True
+
+        if slot.process is not None and slot.process.poll() is None:
+            slot.process.kill()  # hung: running but not answering
+            slot.process.wait()
+
+        from launch_chromium import find_chromium_executable, get_user_data_dir
+
+        chromium_path = find_chromium_executable()
+        if not chromium_path:
+            print("❌ Chromium/Chrome not found - cannot launch the browser pool")
+            slot.healthy = False
+            return False
+
+        user_data_dir = get_user_data_dir(slot.profile)
+        user_data_dir.mkdir(parents=True, exist_ok=True)
+        cmd = [
+            chromium_path,
+            f"--remote-debugging-port={slot.port}",
+            f"--user-data-dir={user_data_dir}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            self.url
+        ]
+        print(f"🚀 Launching Chromium '{slot.profile}' on port {slot.port}...")
+        if platform.system() == "Windows":
+            slot.process = subprocess.Popen(cmd, creationflags=subprocess.CREATE_NEW_PROCESS_GROUP,
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            slot.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                            start_new_session=True)
+
+        deadline = time.time() + LAUNCH_TIMEOUT_SEC
+        while time.time() < deadline:
+            if cdp_version(slot.port) is not None:
+                slot.healthy = True
+                return True
+            if slot.process.poll() is not None:
+                break
+            time.sleep(0.5)
+        print(f"❌ Chromium '{slot.profile}' did not open port {slot.port}")
+        slot.healthy = False
+        return False
+
+
+def pool_enabled() -> bool:
+    """Whether submissions go through a BrowserPool (CHROMIUM_POOL_PROFILES is set)"""
+    return bool(CHROMIUM_POOL_PROFILES)
@@ -0,0 +1,232 @@
+"""
+Compile Cache Module
+
+Content-addressed cache for local C++ builds:
+1. Normalize the source (generated header comment, line endings, trailing spaces)
+2. Key = sha256(normalized source + compiler flags + compiler version)
+3. Store binaries (and compile errors) on disk, evicting least recently used
+   entries once the cache grows past its size bound
+4. Keep a precompiled bits/stdc++.h per toolchain + flags, built once and
+   picked up by g++ through -I
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from core.config import COMPILE_CACHE_DIR, COMPILE_CACHE_MAX_MB
+
+# Leading /* ... */ block written by AutomatedProblemSolver._generate_solution_header
+HEADER_COMMENT_RE = re.compile(r"\A\s*/\*.*?\*/", re.DOTALL)
+PCH_HEADER = "bits/stdc++.h"
+COMPILE_TIMEOUT_MESSAGE = "Compilation timed out"
+PCH_INCLUDE_RE = re.compile(r"^\s*#\s*include\s*<bits/stdc\+\+\.h>", re.MULTILINE)
+
+
+def normalize_source(source: str) -> str:
+    """Normalize a solution so cosmetic differences don't change its cache key.
+
+    The generated header comment (with its timestamp and workflow names) is
+    replaced by the same number of blank lines, so compiler messages keep
+    pointing at the right line of the saved solution file.
+    """
+    source = source.replace("\r\n", "\n").replace("\r", "\n")
+    match = HEADER_COMMENT_RE.match(source)
+    if match and "Generated:" in match.group(0):
+        source = "\n" * match.group(0).count("\n") + source[match.end():]
+    lines = [line.rstrip() for line in source.split("\n")]
+    while lines and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines) + "\n"
+
+
+@lru_cache(maxsize=None)
+def compiler_version(compiler: str) -> str:
+    """Full version banner of the compiler (part of every cache key)"""
+    try:
+        p = subprocess.run([compiler, "--version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                           text=True, timeout=30)
+        return p.stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        return "unknown"
+
+
+class CompileCache:
+    """Disk cache of compiled binaries keyed by normalized source + flags + toolchain"""
+
+    def __init__(self, cache_dir: str = COMPILE_CACHE_DIR, max_size_mb: int = COMPILE_CACHE_MAX_MB,
+                 compiler: str = "g++", use_pch: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.bin_dir = self.cache_dir / "bin"
+        self.pch_root = self.cache_dir / "pch"
+        self.bin_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.compiler = compiler
+        self.use_pch = use_pch
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._pch_locks = {}
+
+    def key(self, source: str, flags: Sequence[str]) -> str:
+        """Cache key for an already normalized source"""
+        h = hashlib.sha256()
+        for part in (source, "\0".join(flags), compiler_version(self.compiler)):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0\0")
+        return h.hexdigest()
+
+    def compile(self, source: str, flags: Sequence[str], output_path: str) -> Tuple[bool, str, bool]:
+        """
+        Compile source to output_path, reusing a cached build when possible
+
+        Args:
+            source: C++ source (normalized here)
+            flags: Compiler flags
+            output_path: Where the binary should end up
+
+        Returns:
+            (ok, compiler output, cache_hit)
+        """
+        source = normalize_source(source)
+        key = self.key(source, flags)
+        binary = self.bin_dir / key
+        error_file = self.bin_dir / f"{key}.ce"
+
+        # Another process may evict the entry between the lookup and its use: build it again then
+        try:
+            if binary.exists():
+                self._touch(binary)
+                self._place(binary, output_path)
+                self.hits += 1
+                return True, "", True
+            if error_file.exists():
+                self._touch(error_file)
+                output = error_file.read_text(encoding="utf-8")
+                self.hits += 1
+                return False, output, True
+        except FileNotFoundError:
+            pass
+
+        self.misses += 1
+        ok, output = self._build(source, flags, output_path)
+
+        # Publish atomically so concurrent solvers never see half-written entries
+        fd, tmp = tempfile.mkstemp(dir=self.bin_dir, prefix=".tmp_")
+        os.close(fd)
+        if ok:
+            shutil.copy2(output_path, tmp)
+            os.replace(tmp, binary)
+        elif output != COMPILE_TIMEOUT_MESSAGE:
+            Path(tmp).write_text(output, encoding="utf-8")
+            os.replace(tmp, error_file)
+        else:
+            os.unlink(tmp)
+
+        self._evict()
+        return ok, output, False
+
+    def pch_include_dir(self, flags: Sequence[str]) -> Optional[Path]:
+        """Directory holding a precompiled bits/stdc++.h for these flags, building it once"""
+        h = hashlib.sha256("\0".join([compiler_version(self.compiler), *flags]).encode("utf-8")).hexdigest()[:16]
+        pch_dir = self.pch_root / h
+        gch = pch_dir / f"{PCH_HEADER}.gch"
+        failed_marker = pch_dir / "FAILED"
+
+        with self._lock:
+            lock = self._pch_locks.setdefault(h, threading.Lock())
+        with lock:
+            if gch.exists():
+                return pch_dir
+            if failed_marker.exists():
+                return None
+
+            header = pch_dir / PCH_HEADER
+            header.parent.mkdir(parents=True, exist_ok=True)
+            # Forwarding header: if the .gch is ever rejected, g++ falls through to the real one
+            header.write_text("#include_next <bits/stdc++.h>\n", encoding="utf-8")
+
+            print(f"🧱 Building precompiled {PCH_HEADER} (once per toolchain)...")
+            tmp = pch_dir / f".{os.getpid()}_{threading.get_ident()}.gch"
+            p = subprocess.run([self.compiler, *flags, "-x", "c++-header", str(header), "-o", str(tmp)],
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, timeout=300)
+            if p.returncode != 0:
+                tmp.unlink(missing_ok=True)
+                failed_marker.write_text(p.stdout, encoding="utf-8")
+                print("⚠️  Precompiled header unavailable, compiling without it")
+                return None
+            os.replace(tmp, gch)
+            return pch_dir
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size on disk"""
+        return {"hits": self.hits, "misses": self.misses, "size_bytes": self._size()}
+
+    def _build(self, source: str, flags: Sequence[str], output_path: str) -> Tuple[bool, str]:
+        workdir = os.path.dirname(output_path)
+        src = os.path.join(workdir, "main.cpp")
+        with open(src, "w", encoding="utf-8") as f:
+            f.write(source)
+
+        command: List[str] = [self.compiler, *flags]
+        if self.use_pch and PCH_INCLUDE_RE.search(source):
+            pch_dir = self.pch_include_dir(flags)
+            if pch_dir is not None:
+                command += ["-I", str(pch_dir)]
+        command += [src, "-o", output_path]
+
+        try:
+            p = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, timeout=120)
+        except subprocess.TimeoutExpired:
+            return False, COMPILE_TIMEOUT_MESSAGE
+        return p.returncode == 0, p.stdout
+
+    def _place(self, binary: Path, output_path: str):
+        """Hard-link the cached binary into place (copy across filesystems)"""
+        try:
+            os.link(binary, output_path)
+        except OSError:
+            shutil.copy2(binary, output_path)
+
+    def _touch(self, path: Path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _entries(self) -> List[Tuple[Path, os.stat_result]]:
+        entries = []
+        for path in self.bin_dir.iterdir():
+            if path.name.startswith(".tmp_"):
+                continue
+            try:
+                entries.append((path, path.stat()))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def _size(self) -> int:
+        return sum(st.st_size for _, st in self._entries())
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its size bound"""
+        with self._lock:
+            entries = self._entries()
+            total = sum(st.st_size for _, st in entries)
+            if total <= self.max_size_bytes:
+                return
+            for path, st in sorted(entries, key=lambda e: e[1].st_mtime):
+                if total <= self.max_size_bytes:
+                    break
+                try:
+                    path.unlink()
+                    total -= st.st_size
+                except FileNotFoundError:
+                    continue
@@ -7,10 +7,64 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
 PLAYWRIGHT_STORAGE = os.getenv("PLAYWRIGHT_STORAGE","infra/playwright/storageState.json")
 MAX_ATTEMPTS = int(os.getenv("MAX_ATTEMPTS","3"))
-CF_SUBMIT_SPACING_SEC = int(os.getenv("CF_SUBMIT_SPACING_SEC","10"))
+CF_SUBMIT_SPACING_SEC = float(os.getenv("CF_SUBMIT_SPACING_SEC","10"))
+CF_SUBMIT_BURST = int(os.getenv("CF_SUBMIT_BURST","1"))  # submissions allowed back to back after an idle spell
+SUBMIT_SPACER_DB = os.getenv("SUBMIT_SPACER_DB",".cache/submit_spacer.db")  # shared by every submitting process
 CF_POLL_TIMEOUT_SEC = int(os.getenv("CF_POLL_TIMEOUT_SEC","900"))
 CF_DEFAULT_LANG_ID = int(os.getenv("CF_DEFAULT_LANG_ID","54"))
 
+# Batch solving
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY","4"))  # max solve loops running at once
+
+# Local judge (compile + sample tests before submitting); problem files carry no limits
+LOCAL_JUDGE_ENABLED = os.getenv("LOCAL_JUDGE_ENABLED", "true").lower() == "true"
+LOCAL_JUDGE_TIME_LIMIT_SEC = float(os.getenv("LOCAL_JUDGE_TIME_LIMIT_SEC", "2"))
+LOCAL_JUDGE_MEMORY_MB = int(os.getenv("LOCAL_JUDGE_MEMORY_MB", "256"))
+LOCAL_JUDGE_WORKERS = int(os.getenv("LOCAL_JUDGE_WORKERS", str(os.cpu_count() or 2)))
+
+# Content-addressed cache of local builds (+ precompiled bits/stdc++.h)
+COMPILE_CACHE_ENABLED = os.getenv("COMPILE_CACHE_ENABLED", "true").lower() == "true"
+COMPILE_CACHE_DIR = os.getenv("COMPILE_CACHE_DIR", ".cache/compile")
+COMPILE_CACHE_MAX_MB = int(os.getenv("COMPILE_CACHE_MAX_MB", "512"))
+
+# Shared keep-alive HTTP pools used by the LLM providers
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "200"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "50"))
+LLM_HTTP_KEEPALIVE_EXPIRY_SEC = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY_SEC", "60"))
+LLM_HTTP_TIMEOUT_SEC = float(os.getenv("LLM_HTTP_TIMEOUT_SEC", "600"))
+
+# Per provider / "provider/model" rate limits, JSON, e.g.
+# {"openai/gpt-5": {"requests_per_minute": 500, "tokens_per_minute": 800000}, "groq": {"requests_per_minute": 30}}
+LLM_RATE_LIMITS = os.getenv("LLM_RATE_LIMITS", "")
+
+# Chat history budget: older solutions are summarized/dropped to stay under it
+LLM_CONTEXT_MAX_TOKENS = int(os.getenv("LLM_CONTEXT_MAX_TOKENS", "12000"))
+LLM_CONTEXT_KEEP_RECENT = int(os.getenv("LLM_CONTEXT_KEEP_RECENT", "3"))
+
+# GPT-5: chain turns with previous_response_id (responses are stored server-side)
+OPENAI_CHAIN_RESPONSES = os.getenv("OPENAI_CHAIN_RESPONSES", "true").lower() == "true"
+
+# Stream solution generation and stop once the C++ program is complete
+LLM_STREAM_SOLUTIONS = os.getenv("LLM_STREAM_SOLUTIONS", "true").lower() == "true"
+
+# Record/replay: "record" saves live LLM responses and verdicts to REPLAY_DIR,
+# "replay" serves them (and problems_solved/ runs) without APIs or Chromium
+REPLAY_MODE = os.getenv("REPLAY_MODE", "off").lower()  # "off", "record", "replay"
+REPLAY_DIR = os.getenv("REPLAY_DIR", ".cache/replay")
+REPLAY_SOURCE_DIR = os.getenv("REPLAY_SOURCE_DIR", "problems_solved")
+
+# Span tracing of the solve stages: <TRACE_DIR>/<run>.jsonl + Chrome trace-event <run>.trace.json
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "false").lower() == "true"
+TRACE_DIR = os.getenv("TRACE_DIR", "traces")
+
+# Prometheus-format /metrics endpoint of batch runs (unset: no server)
+METRICS_PORT = int(os.getenv("METRICS_PORT")) if os.getenv("METRICS_PORT") else None
+
+# Persistent job queue (apps/cli/solve_worker.py): lease length, claims before a job is failed, idle poll
+JOB_LEASE_SEC = float(os.getenv("JOB_LEASE_SEC", "120"))
+JOB_MAX_CLAIMS = int(os.getenv("JOB_MAX_CLAIMS", "3"))
+JOB_POLL_SEC = float(os.getenv("JOB_POLL_SEC", "10"))
+
 # Codeforces authentication
 CF_USERNAME = os.getenv("CF_USERNAME")
 CF_PASSWORD = os.getenv("CF_PASSWORD")
@@ -19,5 +73,21 @@ CF_PASSWORD = os.getenv("CF_PASSWORD")
 CAPTCHA_SERVICE = os.getenv("CAPTCHA_SERVICE", "none")  # "2captcha", "anticaptcha", "none"
 CAPTCHA_API_KEY = os.getenv("CAPTCHA_API_KEY")
 
+# Chromium remote debugging port used by the in-process submitter
+CF_CHROMIUM_PORT = int(os.getenv("CF_CHROMIUM_PORT", "9222"))
+
+# Browser pool: one Chromium per profile on CF_CHROMIUM_PORT, +1, ... (unset: the single browser above)
+CHROMIUM_POOL_PROFILES = [p.strip() for p in os.getenv("CHROMIUM_POOL_PROFILES", "").split(",") if p.strip()]
+CHROMIUM_POOL_PAGES = int(os.getenv("CHROMIUM_POOL_PAGES", "2"))  # tabs submitting in parallel per browser
+CHROMIUM_HEALTH_CHECK_SEC = float(os.getenv("CHROMIUM_HEALTH_CHECK_SEC", "15"))
+
+# Playwright submitter: block images, fonts, media and third-party requests; launch a
+# headless Chromium logged in through PLAYWRIGHT_STORAGE instead of attaching over CDP
+PLAYWRIGHT_LEAN = os.getenv("PLAYWRIGHT_LEAN", "true").lower() == "true"
+PLAYWRIGHT_HEADLESS = os.getenv("PLAYWRIGHT_HEADLESS", "false").lower() == "true"
+# Per-step latency budgets of the browser submission in seconds (JSON; see core/step_timer.py)
+SUBMIT_STEP_BUDGETS = os.getenv("SUBMIT_STEP_BUDGETS", "")
+
 # Submission method preference
 CF_SUBMIT_METHOD = os.getenv("CF_SUBMIT_METHOD", "cloudscraper")  # "cloudscraper", "playwright"
+CF_BASE_URL = os.getenv("CF_BASE_URL", "https://codeforces.com")  # target of the HTTP submitter
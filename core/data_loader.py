@@ -132,9 +132,11 @@ def load_problem_from_json(problem_data: Dict[str, Any], contest_id: int, letter
         else:
             session.add(problem)
         
-        # Remove existing test cases and add new ones
+        # Replace sample tests; harvested hidden tests are kept
         from sqlmodel import select
-        existing_tests = session.exec(select(TestCase).where(TestCase.problem_id == problem_id)).all()
+        existing_tests = session.exec(select(TestCase).where(
+            TestCase.problem_id == problem_id, TestCase.kind == TestKind.SAMPLE
+        )).all()
         for test in existing_tests:
             session.delete(test)
         
@@ -1,10 +1,29 @@
+from sqlalchemy import inspect, text
 from sqlmodel import SQLModel, create_engine, Session
 from core.config import DATABASE_URL
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 
+# Columns added after the first release: (table, column, DDL type + default)
+ADDED_COLUMNS = [
+    ("testcase", "truncated", "BOOLEAN NOT NULL DEFAULT 0"),
+    ("testcase", "source_submission_id", "VARCHAR"),
+]
+
 def init_db():
     SQLModel.metadata.create_all(engine)
+    migrate_db()
+
+def migrate_db():
+    """Add columns that create_all() won't add to already existing tables"""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table, column, ddl in ADDED_COLUMNS:
+            if not inspector.has_table(table):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table)}
+            if column not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
 
 def get_session():
     return Session(engine)
@@ -0,0 +1,178 @@
+"""
+Hidden Tests Module
+
+Harvests the tests Codeforces reveals in submission details:
+1. Extract input#i / answer#i pairs from a parsed_api_response
+2. Flag inputs or answers that Codeforces truncated ("...")
+3. Dedupe per problem by input hash and store them as TestKind.HIDDEN TestCase rows
+4. Load the complete ones back so the local judge can replay them
+"""
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from core.db import get_session, init_db
+from core.models import TestCase, TestKind
+
+TRUNCATION_MARKER = "..."
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+@dataclass
+class HiddenTest:
+    """A test revealed in a Codeforces submission"""
+    test_number: int
+    input_text: str
+    answer_text: str
+    verdict: Optional[str]
+    truncated: bool
+
+
+def _normalize(text: str) -> str:
+    return text.replace("\r\n", "\n").strip() + "\n"
+
+
+def _is_truncated(text: str) -> bool:
+    return text.rstrip().endswith(TRUNCATION_MARKER)
+
+
+def extract_hidden_tests(api_response: Optional[Dict[str, Any]]) -> List[HiddenTest]:
+    """
+    Extract revealed tests from saved submission data
+
+    Args:
+        api_response: Either the saved submission JSON (with "parsed_api_response")
+                      or a parsed_api_response dict itself
+
+    Returns:
+        Tests that carry an input, in test-number order
+    """
+    if not api_response:
+        return []
+    parsed = api_response.get("parsed_api_response", api_response)
+    if not isinstance(parsed, dict):
+        return []
+
+    tests = []
+    for key, input_text in parsed.items():
+        if not key.startswith("input#") or not input_text:
+            continue
+        number = key.split("#", 1)[1]
+        if not number.isdigit():
+            continue
+        answer_text = parsed.get(f"answer#{number}", "")
+        tests.append(HiddenTest(
+            test_number=int(number),
+            input_text=_normalize(input_text),
+            answer_text=_normalize(answer_text),
+            verdict=parsed.get(f"verdict#{number}"),
+            truncated=_is_truncated(input_text) or _is_truncated(answer_text) or not answer_text
+        ))
+    return sorted(tests, key=lambda t: t.test_number)
+
+
+def hidden_test_id(problem_id: str, input_text: str) -> str:
+    """Stable TestCase id: the same input revealed twice maps to one row"""
+    digest = hashlib.sha256(_normalize(input_text).encode("utf-8")).hexdigest()[:16]
+    return f"{problem_id}_hidden_{digest}"
+
+
+def ensure_schema():
+    """Create/migrate tables once per process (adds TestCase.truncated on old databases)"""
+    global _schema_ready
+    with _schema_lock:
+        if not _schema_ready:
+            init_db()
+            _schema_ready = True
+
+
+def ingest_hidden_tests(problem_id: str, api_response: Optional[Dict[str, Any]],
+                        submission_id: Optional[str] = None) -> int:
+    """
+    Store the tests revealed by one submission
+
+    Args:
+        problem_id: Problem identifier like "2045_A"
+        api_response: Saved submission data (see extract_hidden_tests)
+        submission_id: Codeforces submission that revealed the tests
+
+    Returns:
+        Number of newly stored tests
+    """
+    tests = extract_hidden_tests(api_response)
+    if not tests:
+        return 0
+
+    ensure_schema()
+    added = 0
+    with get_session() as session:
+        for test in tests:
+            test_id = hidden_test_id(problem_id, test.input_text)
+            if session.get(TestCase, test_id) is not None:
+                continue
+            session.add(TestCase(
+                id=test_id,
+                problem_id=problem_id,
+                kind=TestKind.HIDDEN,
+                idx=test.test_number,
+                input_text=test.input_text,
+                expected_output_text=test.answer_text,
+                truncated=test.truncated,
+                source_submission_id=str(submission_id) if submission_id else None
+            ))
+            try:
+                session.commit()
+                added += 1
+            except IntegrityError:
+                # Another solver stored the same test first
+                session.rollback()
+    return added
+
+
+def ingest_api_response_file(path: Path, problem_id: Optional[str] = None) -> int:
+    """Ingest one api_responses/submission_*.json file (problem id taken from its path if not given)"""
+    path = Path(path)
+    # problems_solved/<problem_id>/<workflow>/api_responses/submission_*.json
+    problem_id = problem_id or path.parents[2].name
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return ingest_hidden_tests(problem_id, data, data.get("submission_id"))
+
+
+def harvest_directory(base_dir: str = "problems_solved") -> Dict[str, int]:
+    """
+    Ingest every saved submission response under base_dir
+
+    Returns:
+        Dict of problem_id -> number of newly stored tests
+    """
+    added: Dict[str, int] = {}
+    for path in sorted(Path(base_dir).glob("*/*/api_responses/submission_*.json")):
+        try:
+            count = ingest_api_response_file(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Skipping {path}: {e}")
+            continue
+        if count:
+            problem_id = path.parents[2].name
+            added[problem_id] = added.get(problem_id, 0) + count
+    return added
+
+
+def load_hidden_tests(problem_id: str, include_truncated: bool = False) -> List[TestCase]:
+    """Known hidden tests of a problem; truncated ones can't be replayed and are skipped by default"""
+    ensure_schema()
+    with get_session() as session:
+        query = select(TestCase).where(TestCase.problem_id == problem_id, TestCase.kind == TestKind.HIDDEN)
+        if not include_truncated:
+            query = query.where(TestCase.truncated == False)  # noqa: E712
+        return list(session.exec(query.order_by(TestCase.idx)).all())
@@ -0,0 +1,385 @@
+"""
+HTTP Submitter Module
+
+Submits to Codeforces without a browser (CF_SUBMIT_METHOD=cloudscraper):
+1. A cloudscraper session reuses the cookie jar in PLAYWRIGHT_STORAGE (a
+   Playwright storageState file); when it holds no live login, the session
+   logs in with CF_USERNAME/CF_PASSWORD and writes the cookies back
+2. The CSRF token is read from the submit page and the submit form is posted
+3. The verdict is polled through the user.status API, a small JSON response
+   per check instead of a status page
+4. Test details come from data/submitSource and are saved like the browser
+   path saves them, so submit() returns the same SubmissionResult
+
+Only the form post and the lookup of the new submission id hold the
+submitter's lock; verdicts of several submissions are polled in parallel.
+Point CF_BASE_URL at apps/mock/codeforces_server.py to run it offline.
+"""
+
+import json
+import os
+import random
+import re
+import string
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import cloudscraper
+
+from core.config import (CF_BASE_URL, CF_DEFAULT_LANG_ID, CF_PASSWORD, CF_POLL_TIMEOUT_SEC, CF_SUBMIT_METHOD,
+                         CF_USERNAME, PLAYWRIGHT_STORAGE)
+from core.submission_result import SubmissionResult
+
+# Codeforces API verdict codes -> the texts the status page shows
+VERDICT_TEXTS = {
+    "OK": "Accepted",
+    "WRONG_ANSWER": "Wrong answer",
+    "TIME_LIMIT_EXCEEDED": "Time limit exceeded",
+    "MEMORY_LIMIT_EXCEEDED": "Memory limit exceeded",
+    "RUNTIME_ERROR": "Runtime error",
+    "PRESENTATION_ERROR": "Presentation error",
+    "IDLENESS_LIMIT_EXCEEDED": "Idleness limit exceeded",
+    "SECURITY_VIOLATED": "Security violated",
+    "COMPILATION_ERROR": "Compilation error",
+    "CRASHED": "Denial of judgement",
+    "FAILED": "Denial of judgement",
+    "CHALLENGED": "Hacked",
+    "SKIPPED": "Skipped",
+    "REJECTED": "Rejected",
+    "PARTIAL": "Partial result",
+}
+# Verdicts reported together with the test they happened on
+PER_TEST_VERDICTS = {"WRONG_ANSWER", "TIME_LIMIT_EXCEEDED", "MEMORY_LIMIT_EXCEEDED", "RUNTIME_ERROR",
+                     "PRESENTATION_ERROR", "IDLENESS_LIMIT_EXCEEDED", "SECURITY_VIOLATED"}
+
+CSRF_PATTERNS = [
+    r'<meta name="X-Csrf-Token" content="([a-f0-9]+)"',
+    r'data-csrf=[\'"]([a-f0-9]+)[\'"]',
+    r'name=[\'"]csrf_token[\'"] value=[\'"]([a-f0-9]+)[\'"]',
+]
+# The API allows about one call every two seconds
+MIN_POLL_SEC = 2.0
+MAX_POLL_SEC = 10.0
+
+
+def verdict_text(submission: Dict[str, Any]) -> Optional[str]:
+    """Status-page text for a user.status entry; None while it is not judged yet"""
+    verdict = submission.get("verdict")
+    if verdict in (None, "TESTING"):
+        return None
+    text = VERDICT_TEXTS.get(verdict, verdict.replace("_", " ").capitalize())
+    if verdict in PER_TEST_VERDICTS:
+        text += f" on test {submission.get('passedTestCount', 0) + 1}"
+    return text
+
+
+def find_csrf_token(html: str) -> Optional[str]:
+    for pattern in CSRF_PATTERNS:
+        match = re.search(pattern, html)
+        if match:
+            return match.group(1)
+    return None
+
+
+class HttpSubmitter:
+    """Codeforces submitter speaking plain HTTP through one authenticated session"""
+
+    def __init__(self, base_url: str = CF_BASE_URL, storage_path: str = PLAYWRIGHT_STORAGE,
+                 username: Optional[str] = CF_USERNAME, password: Optional[str] = CF_PASSWORD,
+                 lang_id: int = CF_DEFAULT_LANG_ID, poll_timeout: float = CF_POLL_TIMEOUT_SEC):
+        self.base_url = base_url.rstrip("/")
+        self.storage_path = Path(storage_path)
+        self.username = username
+        self.password = password
+        self.lang_id = lang_id
+        self.poll_timeout = poll_timeout
+        self.session = cloudscraper.create_scraper()
+        self._csrf_token: Optional[str] = None
+        self._logged_in = False
+        self._lock = threading.Lock()
+        self._load_cookies()
+
+    def submit(self, solution_file: str, contest_id: int, problem_letter: str, api_dir: str = "api_responses",
+               on_event=None) -> SubmissionResult:
+        """Submit a solution file and wait for the verdict (same interface as ChromiumSubmitter)"""
+        def emit(event, **payload):
+            if on_event:
+                on_event({"event": event, **payload})
+
+        if not os.path.exists(solution_file):
+            print(f"❌ Solution file not found: {solution_file}")
+            return SubmissionResult(error=f"Solution file not found: {solution_file}")
+
+        from apps.cli.submit_existing_chromium import parse_api_response, read_solution_source
+        source_code = read_solution_source(solution_file)
+        problem = f"{contest_id}{problem_letter}"
+        print(f"🚀 Submitting {problem} over HTTP ({len(source_code)} characters) to {self.base_url}")
+
+        try:
+            with self._lock:
+                self._ensure_login()
+                submitted_at = time.time()
+                submission_id = self._post_submission(source_code, contest_id, problem_letter)
+        except Exception as e:
+            print(f"❌ HTTP submission failed: {e}")
+            return SubmissionResult(error=f"HTTP submission failed: {e}")
+
+        print(f"✅ Submitted: #{submission_id}")
+        emit("submitted", submission_id=submission_id, contest_id=contest_id, problem=problem_letter)
+
+        verdict, timing = self._poll_verdict(submission_id, submitted_at)
+        detailed_results, api_response_file = None, None
+        if verdict != "Timeout":
+            print(f"🏆 Final Verdict: {verdict}")
+            emit("verdict", submission_id=submission_id, verdict=verdict)
+            detailed_results, api_response_file = self._save_details(submission_id, api_dir, parse_api_response)
+        else:
+            print("⏰ Could not determine final verdict within timeout")
+
+        return SubmissionResult(
+            submission_id=submission_id,
+            verdict=verdict,
+            accepted=verdict == "Accepted",
+            api_response=detailed_results,
+            api_response_file=api_response_file,
+            queue_seconds=timing["queue_seconds"],
+            judging_seconds=timing["judging_seconds"],
+            extra={"submit_method": "http", "status_polls": timing["polls"]}
+        )
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def _load_cookies(self) -> None:
+        """Add the storageState cookies to the session jar"""
+        if not self.storage_path.exists():
+            return
+        try:
+            state = json.loads(self.storage_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not read cookie jar {self.storage_path}: {e}")
+            return
+        for cookie in state.get("cookies", []):
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""),
+                                     path=cookie.get("path", "/"))
+
+    def _save_cookies(self) -> None:
+        """Write the session cookies back as a storageState file (keeping its origins)"""
+        state = {"cookies": [], "origins": []}
+        if self.storage_path.exists():
+            try:
+                state = json.loads(self.storage_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                pass
+        state["cookies"] = [{
+            "name": cookie.name,
+            "value": cookie.value,
+            "domain": cookie.domain,
+            "path": cookie.path,
+            "expires": cookie.expires if cookie.expires is not None else -1,
+            "httpOnly": bool(cookie.has_nonstandard_attr("HttpOnly")),
+            "secure": cookie.secure,
+            "sameSite": "Lax",
+        } for cookie in self.session.cookies]
+        self.storage_path.parent.mkdir(parents=True, exist_ok=True)
+        self.storage_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+
+    def _get_page(self, path: str) -> str:
+        """GET a page, remembering its CSRF token and whether the session is logged in"""
+        response = self.session.get(self._url(path), timeout=30)
+        response.raise_for_status()
+        self._remember_page(response.text)
+        return response.text
+
+    def _remember_page(self, html: str) -> None:
+        self._csrf_token = find_csrf_token(html) or self._csrf_token
+        self._logged_in = "/logout" in html
+        if self._logged_in and not self.username:
+            # Session from the cookie jar: the handle for user.status is in the page header
+            match = re.search(r'href="/profile/([^"]+)"', html)
+            self.username = match.group(1) if match else None
+
+    def _ensure_login(self) -> None:
+        """Log in with CF_USERNAME/CF_PASSWORD unless the cookie jar already holds a session"""
+        if self._logged_in:
+            return
+        self._get_page("/enter")
+        if self._logged_in:
+            if not self.username:
+                # user.status needs the handle; polling without it would only time out
+                self._logged_in = False
+                raise RuntimeError(f"session in {self.storage_path} is logged in, but its handle was not found "
+                                   "on the page - set CF_USERNAME")
+            print("🍪 Reusing Codeforces session from the cookie jar")
+            return
+        if not self.username or not self.password:
+            raise RuntimeError(f"not logged in: no session in {self.storage_path} and no CF_USERNAME/CF_PASSWORD")
+
+        print(f"🔐 Logging in to Codeforces as {self.username}...")
+        response = self.session.post(self._url("/enter"), data={
+            "csrf_token": self._csrf_token,
+            "action": "enter",
+            "ftaa": "".join(random.choices(string.ascii_lowercase + string.digits, k=18)),
+            "bfaa": "".join(random.choices("0123456789abcdef", k=32)),
+            "handleOrEmail": self.username,
+            "password": self.password,
+            "remember": "on",
+        }, timeout=30)
+        response.raise_for_status()
+        self._remember_page(response.text)
+        if not self._logged_in:
+            raise RuntimeError("login failed (check CF_USERNAME/CF_PASSWORD)")
+        self._save_cookies()
+        print("✅ Logged in, cookies saved")
+
+    def _post_submission(self, source_code: str, contest_id: int, problem_letter: str) -> str:
+        """Post the submit form; returns the new submission's id"""
+        self._get_page("/problemset/submit")
+        if not self._csrf_token:
+            raise RuntimeError("no CSRF token on the submit page")
+
+        response = self.session.post(self._url(f"/problemset/submit?csrf_token={self._csrf_token}"), data={
+            "csrf_token": self._csrf_token,
+            "action": "submitSolutionFormSubmitted",
+            "submittedProblemCode": f"{contest_id}{problem_letter}",
+            "programTypeId": str(self.lang_id),
+            "source": source_code,
+            "tabSize": "4",
+            "sourceFile": "",
+        }, timeout=30)
+        response.raise_for_status()
+
+        # Success redirects to the status page; a rejected form comes back with an error
+        path = urlsplit(response.url).path.rstrip("/")
+        if path.endswith("/enter"):
+            self._logged_in = False
+            raise RuntimeError("session expired, log in again")
+        # Only the submit page itself means a rejection; /submissions/<handle> is a success
+        if path.endswith("/submit"):
+            error = re.search(r'<span class="error[^"]*">([^<]+)</span>', response.text)
+            raise RuntimeError(error.group(1).strip() if error else "submit form was rejected")
+
+        match = re.search(r'data-submission-id="(\d+)"', response.text)
+        if match:
+            return match.group(1)
+        # Status page without rows we recognize: ask the API for our newest submission of the problem
+        for submission in self._user_status(count=10):
+            problem = submission.get("problem", {})
+            if problem.get("contestId") == contest_id and problem.get("index") == problem_letter:
+                return str(submission["id"])
+        raise RuntimeError("submission id not found after submitting")
+
+    def _user_status(self, count: int = 10) -> List[Dict[str, Any]]:
+        response = self.session.get(self._url("/api/user.status"),
+                                    params={"handle": self.username, "from": 1, "count": count}, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        if data.get("status") != "OK":
+            raise RuntimeError(data.get("comment", "user.status failed"))
+        return data["result"]
+
+    def _poll_verdict(self, submission_id: str, submitted_at: float):
+        """Poll user.status until the submission has a final verdict; returns (verdict, timing)"""
+        deadline = submitted_at + self.poll_timeout
+        interval = MIN_POLL_SEC
+        judging_started_at = None
+        polls = 0
+        last_state = None
+
+        while time.time() < deadline:
+            time.sleep(interval)
+            polls += 1
+            try:
+                submission = next((s for s in self._user_status() if str(s.get("id")) == submission_id), None)
+            except Exception as e:
+                print(f"⚠️  Error checking verdict: {e}")
+                submission = None
+
+            if submission is not None:
+                verdict = verdict_text(submission)
+                if verdict is not None:
+                    finished_at = time.time()
+                    judging_start = judging_started_at or finished_at
+                    print(f"⏱️  Verdict after {finished_at - submitted_at:.1f}s ({polls} status checks)")
+                    return verdict, {
+                        "queue_seconds": judging_start - submitted_at,
+                        "judging_seconds": finished_at - judging_started_at if judging_started_at else None,
+                        "polls": polls,
+                    }
+                state = (submission.get("verdict"), submission.get("passedTestCount"))
+                if state != last_state:
+                    last_state = state
+                    interval = MIN_POLL_SEC
+                    if judging_started_at is None and submission.get("verdict") == "TESTING":
+                        judging_started_at = time.time()
+                    print(f"📊 Current Status: {submission.get('verdict') or 'In queue'} "
+                          f"({submission.get('passedTestCount', 0)} tests passed)")
+                    continue
+            # Nothing changed: check less often
+            interval = min(interval * 1.5, MAX_POLL_SEC)
+
+        print("⏰ Timeout waiting for verdict")
+        return "Timeout", {
+            "queue_seconds": (judging_started_at or time.time()) - submitted_at,
+            "judging_seconds": time.time() - judging_started_at if judging_started_at else None,
+            "polls": polls,
+        }
+
+    def _save_details(self, submission_id: str, api_dir: str, parse_api_response):
+        """Fetch per-test details from data/submitSource and save them like the browser path does"""
+        try:
+            response = self.session.post(self._url("/data/submitSource"), data={
+                "submissionId": submission_id,
+                "csrf_token": self._csrf_token,
+            }, headers={"X-Requested-With": "XMLHttpRequest"}, timeout=30)
+        except Exception as e:
+            print(f"⚠️  Could not fetch submission details: {e}")
+            return None, None
+        if not response.ok:
+            print(f"⚠️  Could not fetch submission details: HTTP {response.status_code}")
+            return None, None
+
+        api_response = {"url": response.url, "response_text": response.text, "status": response.status_code}
+        comprehensive_data = {
+            "submission_id": submission_id,
+            "timestamp": datetime.now().isoformat(),
+            "collection_methods": ["http_submit_source"],
+            "api_response": api_response,
+        }
+        parsed_api = parse_api_response(api_response)
+        if parsed_api is not None:
+            comprehensive_data["parsed_api_response"] = parsed_api
+
+        os.makedirs(api_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = os.path.join(api_dir, f"submission_{submission_id}_{timestamp}.json")
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(comprehensive_data, f, indent=2, ensure_ascii=False)
+        print(f"💾 Comprehensive results saved to: {filename}")
+        return comprehensive_data, filename
+
+
+def has_stored_session(storage_path: str = PLAYWRIGHT_STORAGE) -> bool:
+    """Whether the storageState file holds any cookies"""
+    try:
+        return bool(json.loads(Path(storage_path).read_text(encoding="utf-8")).get("cookies"))
+    except (OSError, ValueError):
+        return False
+
+
+def http_submit_enabled() -> bool:
+    """Whether submissions go over HTTP: CF_SUBMIT_METHOD=cloudscraper and a cookie jar or credentials to log in"""
+    return CF_SUBMIT_METHOD == "cloudscraper" and (has_stored_session() or bool(CF_USERNAME and CF_PASSWORD))
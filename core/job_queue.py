@@ -0,0 +1,282 @@
+"""
+Job Queue Module
+
+Persistent (problem, workflow) job queue in the solver database, so several
+worker processes - on one box, or on several boxes sharing the SQLite file
+over a network filesystem - can drain one queue and a crash loses nothing:
+1. enqueue() adds SolveJob rows (existing jobs are left alone)
+2. claim() hands the oldest pending job to a worker under a lease; a job whose
+   lease expired (worker crashed or lost its connection) is reclaimed the same way
+3. The worker heartbeats while solve_problem() runs, extending its lease
+4. complete()/fail() only apply while the caller still owns the lease
+
+Every claim runs in a BEGIN IMMEDIATE transaction, which takes SQLite's write
+lock before reading, so two workers can never pick the same job. The journal
+mode is left alone: WAL needs shared memory and does not work over network
+filesystems. Leases compare each worker's wall clock, so keep the boxes in NTP
+sync and JOB_LEASE_SEC well above the clock skew.
+"""
+
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import and_, func, or_, update
+from sqlmodel import Session, select
+
+from core.automated_solver import AutomatedProblemSolver, create_live_submitter
+from core.config import JOB_LEASE_SEC, JOB_MAX_CLAIMS, JOB_POLL_SEC, LOCAL_JUDGE_ENABLED
+from core.db import engine as default_engine
+from core.models import JobStatus, SolveJob
+from core.replay import create_submitter
+from core.runner_local import LocalJudge
+from core.workflow_manager import WorkflowManager, WorkflowType
+
+# How long a worker waits for another worker's write transaction (ms)
+BUSY_TIMEOUT_MS = 30000
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def job_id(problem_id: str, workflow: str) -> str:
+    return f"{problem_id}:{workflow}"
+
+
+class JobQueue:
+    """SolveJob table operations with claim leases"""
+
+    def __init__(self, engine=None, lease_seconds: float = JOB_LEASE_SEC, max_claims: int = JOB_MAX_CLAIMS):
+        self.engine = engine or default_engine
+        self.lease_seconds = lease_seconds
+        # A job whose lease expired this many times is marked failed instead of reclaimed
+        self.max_claims = max_claims
+
+    @contextmanager
+    def _write(self) -> Iterator[Session]:
+        """Session whose transaction holds the database write lock from the start"""
+        with Session(self.engine, expire_on_commit=False) as session:
+            connection = session.connection()
+            connection.exec_driver_sql(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            yield session
+            session.commit()
+
+    def enqueue(self, problem_ids: List[str], workflows: List[WorkflowType], max_attempts: int = 3) -> int:
+        """
+        Add a job for every (problem, workflow) pair not queued yet
+
+        Args:
+            problem_ids: Problem identifiers like "2045_A"
+            workflows: Workflows to run for each problem
+            max_attempts: Solution attempts per job
+
+        Returns:
+            Number of jobs added
+        """
+        wanted = {job_id(problem_id, workflow.value): (problem_id, workflow.value)
+                  for problem_id in problem_ids for workflow in workflows}
+        with self._write() as session:
+            existing = set(session.exec(select(SolveJob.id).where(SolveJob.id.in_(list(wanted)))).all())
+            for id_, (problem_id, workflow) in wanted.items():
+                if id_ not in existing:
+                    session.add(SolveJob(id=id_, problem_id=problem_id, workflow=workflow, max_attempts=max_attempts))
+        return len(wanted) - len(existing)
+
+    def claim(self, worker_id: str) -> Optional[SolveJob]:
+        """Lease the oldest pending (or lease-expired) job to worker_id; None if there is none"""
+        with self._write() as session:
+            while True:
+                now = _utcnow()
+                job = session.exec(
+                    select(SolveJob)
+                    .where(or_(SolveJob.status == JobStatus.PENDING,
+                               and_(SolveJob.status == JobStatus.RUNNING, SolveJob.lease_expires_at < now)))
+                    .order_by(SolveJob.created_at, SolveJob.id)
+                    .limit(1)
+                ).first()
+                if job is None:
+                    return None
+
+                if job.status == JobStatus.RUNNING:
+                    print(f"♻️ Reclaiming {job.id}: lease of {job.lease_owner} expired at {job.lease_expires_at}")
+                    if job.claims >= self.max_claims:
+                        job.status = JobStatus.FAILED
+                        job.error = f"lease expired {job.claims} times"
+                        job.lease_owner = job.lease_expires_at = None
+                        job.finished_at = now
+                        session.add(job)
+                        continue
+
+                job.status = JobStatus.RUNNING
+                job.claims += 1
+                job.lease_owner = worker_id
+                job.lease_expires_at = now + timedelta(seconds=self.lease_seconds)
+                job.heartbeat_at = now
+                job.started_at = now
+                session.add(job)
+                return job
+
+    def _update_owned(self, job_id_: str, worker_id: str, **values) -> bool:
+        """Update a job only while worker_id holds its lease"""
+        with self._write() as session:
+            result = session.connection().execute(
+                update(SolveJob)
+                .where(SolveJob.id == job_id_, SolveJob.lease_owner == worker_id,
+                       SolveJob.status == JobStatus.RUNNING)
+                .values(**values)
+            )
+            return result.rowcount > 0
+
+    def heartbeat(self, job_id_: str, worker_id: str) -> bool:
+        """Extend the lease; False if it was lost (expired and reclaimed by another worker)"""
+        now = _utcnow()
+        return self._update_owned(job_id_, worker_id, heartbeat_at=now,
+                                  lease_expires_at=now + timedelta(seconds=self.lease_seconds))
+
+    def complete(self, job_id_: str, worker_id: str, result_status: Optional[str]) -> bool:
+        """Mark a job done with the solve's final status"""
+        return self._update_owned(job_id_, worker_id, status=JobStatus.DONE, result_status=result_status,
+                                  error=None, lease_owner=None, lease_expires_at=None,
+                                  finished_at=_utcnow())
+
+    def fail(self, job_id_: str, worker_id: str, error: str, retry: bool = True) -> bool:
+        """Record a failed run; the job goes back to pending unless retry is off or claims ran out"""
+        with self._write() as session:
+            job = session.get(SolveJob, job_id_)
+            if job is None or job.lease_owner != worker_id or job.status != JobStatus.RUNNING:
+                return False
+            job.error = error
+            job.lease_owner = job.lease_expires_at = None
+            if retry and job.claims < self.max_claims:
+                job.status = JobStatus.PENDING
+            else:
+                job.status = JobStatus.FAILED
+                job.finished_at = _utcnow()
+            session.add(job)
+            return True
+
+    def release(self, job_id_: str, worker_id: str) -> bool:
+        """Hand a job back untouched (worker shutting down); the claim isn't counted"""
+        with self._write() as session:
+            job = session.get(SolveJob, job_id_)
+            if job is None or job.lease_owner != worker_id or job.status != JobStatus.RUNNING:
+                return False
+            job.status = JobStatus.PENDING
+            job.claims = max(0, job.claims - 1)
+            job.lease_owner = job.lease_expires_at = None
+            session.add(job)
+            return True
+
+    def requeue(self, statuses: List[JobStatus] = (JobStatus.FAILED,)) -> int:
+        """Put jobs in the given states back to pending with a fresh claim count"""
+        with self._write() as session:
+            result = session.connection().execute(
+                update(SolveJob)
+                .where(SolveJob.status.in_(list(statuses)))
+                .values(status=JobStatus.PENDING, claims=0, lease_owner=None, lease_expires_at=None,
+                        finished_at=None)
+            )
+            return result.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Job counts by status, plus running jobs whose lease has expired"""
+        with Session(self.engine) as session:
+            counts = {status.value: 0 for status in JobStatus}
+            for status, count in session.exec(select(SolveJob.status, func.count()).group_by(SolveJob.status)):
+                counts[JobStatus(status).value] = count
+            counts["expired_leases"] = session.exec(
+                select(func.count()).select_from(SolveJob)
+                .where(SolveJob.status == JobStatus.RUNNING, SolveJob.lease_expires_at < _utcnow())
+            ).one()
+            return counts
+
+
+class QueueWorker:
+    """Claims jobs one at a time and runs each through AutomatedProblemSolver"""
+
+    def __init__(self, queue: JobQueue, base_dir: str = "problems_solved", chromium_profile: str = "Sifat",
+                 worker_id: Optional[str] = None, poll_seconds: float = JOB_POLL_SEC):
+        self.queue = queue
+        self.base_dir = base_dir
+        self.chromium_profile = chromium_profile
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_seconds = poll_seconds
+        # Reused across jobs so provider clients and the compile cache are set up once
+        self._workflow_manager = WorkflowManager()
+        self._local_judge = LocalJudge() if LOCAL_JUDGE_ENABLED else None
+
+    def run(self, max_jobs: Optional[int] = None, exit_when_empty: bool = False) -> Dict[str, int]:
+        """
+        Work the queue until it is empty (exit_when_empty) or max_jobs were run
+
+        Returns:
+            Counts of jobs by outcome: done, failed, lost (lease taken over by another worker)
+        """
+        counts = {"done": 0, "failed": 0, "lost": 0}
+        print(f"👷 Worker {self.worker_id} started (lease {self.queue.lease_seconds:.0f}s)")
+
+        # One browser session for every submission of this worker (recorded verdicts in replay mode)
+        submitter = create_submitter(create_live_submitter)
+        try:
+            while max_jobs is None or sum(counts.values()) < max_jobs:
+                job = self.queue.claim(self.worker_id)
+                if job is None:
+                    if exit_when_empty:
+                        break
+                    time.sleep(self.poll_seconds)
+                    continue
+                outcome = self._run_job(job, submitter)
+                counts[outcome] += 1
+        finally:
+            submitter.close()
+
+        print(f"👷 Worker {self.worker_id} stopped: {counts}")
+        return counts
+
+    def _run_job(self, job: SolveJob, submitter) -> str:
+        """Solve one claimed job while a background thread keeps its lease alive"""
+        print(f"📥 Claimed {job.id} (claim {job.claims})")
+        stop = threading.Event()
+
+        def keep_lease():
+            while not stop.wait(self.queue.lease_seconds / 3):
+                if not self.queue.heartbeat(job.id, self.worker_id):
+                    print(f"⚠️ Lost the lease on {job.id}; its result will not be recorded")
+                    return
+
+        heartbeat = threading.Thread(target=keep_lease, daemon=True, name=f"heartbeat-{job.id}")
+        heartbeat.start()
+        try:
+            solver = AutomatedProblemSolver(
+                base_dir=self.base_dir,
+                workflow_type=WorkflowType(job.workflow),
+                interactive=False,
+                workflow_manager=self._workflow_manager,
+                submitter=submitter,
+                local_judge=self._local_judge
+            )
+            result = solver.solve_problem(job.problem_id, job.max_attempts, self.chromium_profile)
+        except KeyboardInterrupt:
+            self.queue.release(job.id, self.worker_id)
+            raise
+        except Exception as e:
+            print(f"⚠️ Job {job.id} crashed: {e}")
+            recorded = self.queue.fail(job.id, self.worker_id, f"{type(e).__name__}: {e}")
+            return "failed" if recorded else "lost"
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        if "error" in result:
+            # e.g. problem not found - running it again won't help
+            recorded = self.queue.fail(job.id, self.worker_id, result["error"], retry=False)
+            return "failed" if recorded else "lost"
+        recorded = self.queue.complete(job.id, self.worker_id, result.get("status"))
+        print(f"{'✅' if result.get('accepted') else '❌'} {job.id}: {result.get('status')}")
+        return "done" if recorded else "lost"
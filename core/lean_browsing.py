@@ -0,0 +1,218 @@
+"""
+Lean Browsing Module
+
+Request routing for the Playwright submitter (PLAYWRIGHT_LEAN):
+1. Images, fonts and media are aborted, and so is everything from hosts
+   other than Codeforces and Cloudflare (ads, analytics, social widgets)
+2. Documents, stylesheets, first-party scripts and the submitSource /
+   submissionVerdict XHRs the verdict watcher reads always go through
+3. Every page is measured, lean or not: bytes loaded per request and the
+   load time of each document (problem, submit and status pages)
+
+The sizes of loaded resources and the average load time per page kind are
+kept in STATS_FILE. A lean submission reports the known sizes of what it
+blocked as bytes saved, and its page loads against the full-mode averages
+as time saved - run one submission with PLAYWRIGHT_LEAN=false to seed them.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+STATS_FILE = ".cache/lean_browsing.json"
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+FIRST_PARTY_HOSTS = ("codeforces.com", "codeforces.org", "cloudflare.com")
+KEEP_URL_MARKERS = ("data/submitSource", "submissionVerdict")
+# Remembered resource sizes (oldest are dropped) and samples behind each load time average
+MAX_SIZES = 5000
+MAX_LOAD_SAMPLES = 20
+
+_stats_lock = threading.Lock()
+
+
+def is_first_party(url: str) -> bool:
+    host = urlsplit(url).hostname or ""
+    return any(host == domain or host.endswith("." + domain) for domain in FIRST_PARTY_HOSTS)
+
+
+def should_block(url: str, resource_type: str) -> bool:
+    """Whether lean mode aborts a request"""
+    if any(marker in url for marker in KEEP_URL_MARKERS):
+        return False
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    return not is_first_party(url) and not url.startswith(("data:", "blob:", "about:"))
+
+
+def page_kind(url: str) -> str:
+    path = urlsplit(url).path
+    if "/problem/" in path:
+        return "problem"
+    if path.endswith("/submit"):
+        return "submit"
+    if "status" in path or "submissions" in path:
+        return "status"
+    return "other"
+
+
+def _resource_key(url: str) -> str:
+    # Static assets carry cache-busting query strings
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
+
+
+class LeanBrowsing:
+    """Routes and measures the requests of one Playwright page"""
+
+    def __init__(self, enabled: bool = True, stats_file: str = STATS_FILE):
+        self.enabled = enabled
+        self.stats_file = Path(stats_file)
+        self._page = None
+        self._stats = self._load_stats()
+        self.reset()
+
+    def install(self, page) -> "LeanBrowsing":
+        """Start routing (lean mode) and measuring the page's requests"""
+        self._page = page
+        if self.enabled:
+            page.route("**/*", self._route)
+        page.on("requestfinished", self._on_request_finished)
+        page.on("load", self._on_load)
+        return self
+
+    def uninstall(self) -> None:
+        """Stop routing and measuring; flushes what was learned to STATS_FILE"""
+        page, self._page = self._page, None
+        if page is not None and not page.is_closed():
+            try:
+                if self.enabled:
+                    page.unroute("**/*", self._route)
+                page.remove_listener("requestfinished", self._on_request_finished)
+                page.remove_listener("load", self._on_load)
+            except Exception:
+                pass
+        self._save_stats()
+
+    def reset(self) -> None:
+        """Start counting a new submission"""
+        self.requests = 0
+        self.bytes_loaded = 0
+        self.blocked: Dict[str, int] = {}
+        self.bytes_saved = 0
+        self.unmeasured_blocked = 0
+        self.loads = []  # (page kind, seconds)
+
+    def report(self) -> Dict[str, Any]:
+        """Requests, bytes and page load times since reset(), with the savings of lean mode"""
+        mode = "lean" if self.enabled else "full"
+        full_loads = self._stats["load_seconds"].get("full", {})
+        time_saved = None
+        if self.enabled:
+            savings = [full_loads[kind][0] - seconds for kind, seconds in self.loads if kind in full_loads]
+            time_saved = round(sum(savings), 3) if savings else None
+        report = {
+            "mode": mode,
+            "requests": self.requests,
+            "bytes_loaded": self.bytes_loaded,
+            "blocked_requests": sum(self.blocked.values()),
+            "blocked_by_type": dict(self.blocked),
+            "bytes_saved": self.bytes_saved,
+            "unmeasured_blocked": self.unmeasured_blocked,
+            "page_load_seconds": round(sum(seconds for _, seconds in self.loads), 3),
+            "time_saved_seconds": time_saved,
+        }
+        self._save_stats()
+        return report
+
+    def _route(self, route) -> None:
+        request = route.request
+        try:
+            if should_block(request.url, request.resource_type):
+                self.blocked[request.resource_type] = self.blocked.get(request.resource_type, 0) + 1
+                size = self._stats["sizes"].get(_resource_key(request.url))
+                if size is None:
+                    self.unmeasured_blocked += 1
+                else:
+                    self.bytes_saved += size
+                route.abort()
+            else:
+                route.continue_()
+        except Exception:
+            # Page closed or request already handled
+            pass
+
+    def _on_request_finished(self, request) -> None:
+        try:
+            sizes = request.sizes()
+        except Exception:
+            return
+        size = sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+        self.requests += 1
+        self.bytes_loaded += size
+        with _stats_lock:
+            self._stats["sizes"][_resource_key(request.url)] = size
+
+    def _on_load(self, page) -> None:
+        try:
+            load_ms = page.evaluate(
+                "() => { const n = performance.getEntriesByType('navigation')[0]; return n ? n.loadEventStart : null; }"
+            )
+        except Exception:
+            return
+        if not load_ms:
+            return
+        kind = page_kind(page.url)
+        seconds = load_ms / 1000
+        self.loads.append((kind, seconds))
+        with _stats_lock:
+            per_kind = self._stats["load_seconds"].setdefault("lean" if self.enabled else "full", {})
+            average, samples = per_kind.get(kind, (0.0, 0))
+            samples = min(samples + 1, MAX_LOAD_SAMPLES)
+            per_kind[kind] = (average + (seconds - average) / samples, samples)
+
+    def _load_stats(self) -> Dict[str, Any]:
+        try:
+            stats = json.loads(self.stats_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            stats = {}
+        stats.setdefault("sizes", {})
+        stats.setdefault("load_seconds", {})
+        return stats
+
+    def _save_stats(self) -> None:
+        with _stats_lock:
+            # Merge with what other submitters wrote since we loaded
+            on_disk = self._load_stats()
+            on_disk["sizes"].update(self._stats["sizes"])
+            for mode, per_kind in self._stats["load_seconds"].items():
+                on_disk["load_seconds"].setdefault(mode, {}).update(per_kind)
+            sizes = on_disk["sizes"]
+            if len(sizes) > MAX_SIZES:
+                on_disk["sizes"] = dict(list(sizes.items())[-MAX_SIZES:])
+            self._stats = on_disk
+            try:
+                self.stats_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.stats_file.with_name(f"{self.stats_file.name}.{os.getpid()}.tmp")
+                tmp.write_text(json.dumps(on_disk), encoding="utf-8")
+                os.replace(tmp, self.stats_file)
+            except OSError as e:
+                print(f"⚠️  Could not save lean browsing stats: {e}")
+
+
+def format_report(report: Optional[Dict[str, Any]]) -> str:
+    """One-line summary of a LeanBrowsing report"""
+    if not report:
+        return ""
+    line = (f"{report['requests']} requests, {report['bytes_loaded'] / 1024:.0f} KB loaded, "
+            f"{report['page_load_seconds']:.1f}s page loads")
+    if report["mode"] == "lean":
+        line += f"; blocked {report['blocked_requests']} ({report['bytes_saved'] / 1024:.0f} KB saved"
+        if report["unmeasured_blocked"]:
+            line += f", {report['unmeasured_blocked']} of unknown size"
+        line += ")"
+        if report["time_saved_seconds"] is not None:
+            line += f", ~{report['time_saved_seconds']:.1f}s faster than full pages"
+    return line
@@ -1,8 +1,8 @@
 import os
 import re
 from typing import Optional
-import httpx
 from core.config import OPENAI_API_KEY, DEEPSEEK_API_KEY
+from core.llm_providers.http_pool import get_http_client
 
 def load_prompt_template(filename: str) -> str:
     """Load a prompt template from the prompts directory."""
@@ -111,37 +111,38 @@ COMMON ISSUES TO AVOID:
 - Logic errors in conditions"""
         
         # Call OpenAI API
-        with httpx.Client() as client:
-            response = client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENAI_API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "gpt-4",
-                    "messages": [
-                        {"role": "system", "content": system_message},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "max_tokens": 2000,
-                    "temperature": 0.1  # Lower temp for fixes
-                },
-                timeout=60.0
-            )
+        # Shared keep-alive pool instead of a new connection per call
+        client = get_http_client()
+        response = client.post(
+            "https://api.openai.com/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {OPENAI_API_KEY}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "gpt-4",
+                "messages": [
+                    {"role": "system", "content": system_message},
+                    {"role": "user", "content": prompt}
+                ],
+                "max_tokens": 2000,
+                "temperature": 0.1  # Lower temp for fixes
+            },
+            timeout=60.0
+        )
+        
+        if response.status_code == 200:
+            result = response.json()
+            code = result["choices"][0]["message"]["content"].strip()
+            
+            # Clean markdown code blocks if present
+            code = clean_code_response(code)
+            
+            return code
+        else:
+            print(f"OpenAI API error: {response.status_code} - {response.text}")
+            return f"// ERROR: OpenAI API call failed with status {response.status_code}"
             
-            if response.status_code == 200:
-                result = response.json()
-                code = result["choices"][0]["message"]["content"].strip()
-                
-                # Clean markdown code blocks if present
-                code = clean_code_response(code)
-                
-                return code
-            else:
-                print(f"OpenAI API error: {response.status_code} - {response.text}")
-                return f"// ERROR: OpenAI API call failed with status {response.status_code}"
-                
     except Exception as e:
         print(f"Error calling OpenAI API: {e}")
         return f"// ERROR: {str(e)}"
@@ -163,31 +164,32 @@ def deepseek_diagnose(problem_md: str, code_cpp: str, cf_verdict: str, local_fai
         )
         
         # Call DeepSeek API
-        with httpx.Client() as client:
-            response = client.post(
-                "https://api.deepseek.com/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "deepseek-chat",
-                    "messages": [
-                        {"role": "user", "content": prompt}
-                    ],
-                    "max_tokens": 1000,
-                    "temperature": 0.1
-                },
-                timeout=60.0
-            )
+        # Shared keep-alive pool instead of a new connection per call
+        client = get_http_client()
+        response = client.post(
+            "https://api.deepseek.com/chat/completions",
+            headers={
+                "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "deepseek-chat",
+                "messages": [
+                    {"role": "user", "content": prompt}
+                ],
+                "max_tokens": 1000,
+                "temperature": 0.1
+            },
+            timeout=60.0
+        )
+        
+        if response.status_code == 200:
+            result = response.json()
+            return result["choices"][0]["message"]["content"].strip()
+        else:
+            print(f"DeepSeek API error: {response.status_code} - {response.text}")
+            return f"- ERROR: DeepSeek API call failed with status {response.status_code}"
             
-            if response.status_code == 200:
-                result = response.json()
-                return result["choices"][0]["message"]["content"].strip()
-            else:
-                print(f"DeepSeek API error: {response.status_code} - {response.text}")
-                return f"- ERROR: DeepSeek API call failed with status {response.status_code}"
-                
     except Exception as e:
         print(f"Error calling DeepSeek API: {e}")
         return f"- ERROR: {str(e)}"
@@ -2,9 +2,39 @@
 Base LLM Provider Interface
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, Tuple
+from dataclasses import dataclass, field
+import asyncio
+import threading
 import time
+import weakref
+
+from .context_policy import ContextPolicy, count_message_tokens, count_tokens
+from .http_pool import get_async_http_client
+from .middleware import ProviderAPIError, ProviderMiddleware
+
+class ProviderResponse(str):
+    """Response text that also carries the provider's response id and token usage (when reported)"""
+    
+    def __new__(cls, text: str, response_id: Optional[str] = None, usage: Optional[Dict[str, Any]] = None):
+        response = super().__new__(cls, text)
+        response.response_id = response_id
+        response.usage = usage
+        return response
+
+def measure_turn(turn: int, history: List[Dict[str, str]], sent: List[Dict[str, str]], response: str) -> Dict[str, Any]:
+    """Token counts of one request: what was sent against resending the whole history"""
+    history_tokens = count_message_tokens(history)
+    prompt_tokens = count_message_tokens(sent)
+    return {
+        "turn": turn,
+        "prompt_tokens": prompt_tokens,
+        "history_tokens": history_tokens,  # what resending the whole history would cost
+        "saved_tokens": history_tokens - prompt_tokens,
+        "completion_tokens": count_tokens(response),
+        # Provider-reported input/cached/output tokens (None when not reported, e.g. stream stopped early)
+        "usage": getattr(response, "usage", None),
+    }
 
 @dataclass
 class ChatMessage:
@@ -25,6 +55,11 @@ class ChatContext:
     model_name: str
     provider_name: str
     created_at: float
+    policy: Optional[ContextPolicy] = None
+    turn_stats: List[Dict[str, Any]] = field(default_factory=list)  # token counts per request
+    # Server-side conversation state (OpenAI Responses API chaining)
+    response_id: Optional[str] = None
+    chained_count: int = 0  # messages the server already holds under response_id
     
     def __post_init__(self):
         if not hasattr(self, 'created_at') or self.created_at is None:
@@ -35,8 +70,16 @@ class ChatContext:
         self.messages.append(ChatMessage(role=role, content=content))
     
     def get_messages_for_api(self) -> List[Dict[str, str]]:
-        """Convert messages to API format"""
-        return [{"role": msg.role, "content": msg.content} for msg in self.messages]
+        """Convert messages to API format, trimmed to the policy's token budget"""
+        messages = [{"role": msg.role, "content": msg.content} for msg in self.messages]
+        return self.policy.apply(messages) if self.policy else messages
+    
+    def record_turn(self, sent: List[Dict[str, str]], response: str) -> Dict[str, Any]:
+        """Record token counts of one request (call before adding the response)"""
+        stats = measure_turn(len(self.turn_stats) + 1, [{"content": msg.content} for msg in self.messages],
+                             sent, response)
+        self.turn_stats.append(stats)
+        return stats
 
 class BaseLLMProvider(ABC):
     """Base class for all LLM providers"""
@@ -46,12 +89,73 @@ class BaseLLMProvider(ABC):
         self.model_name = model_name
         self.provider_name = self.__class__.__name__.replace("Provider", "").lower()
         self._contexts: Dict[str, ChatContext] = {}
+        # Async SDK clients are bound to an event loop, so keep one per loop
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
+        # Rate limiting / retries / circuit breaker, attached by WorkflowManager
+        self.middleware: Optional[ProviderMiddleware] = None
+        # Token budget applied to every context this provider creates (None = send full history)
+        self.context_policy: Optional[ContextPolicy] = ContextPolicy()
     
     @abstractmethod
     def _make_api_call(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Make the actual API call to the provider"""
         pass
     
+    async def _amake_api_call(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Async API call; providers without an async SDK client run the sync call in a thread"""
+        return await asyncio.to_thread(self._make_api_call, messages, **kwargs)
+    
+    def _call_api(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        """_make_api_call behind the middleware (if one is attached)"""
+        if self.middleware is None:
+            return self._make_api_call(messages, **kwargs)
+        return self.middleware.call(self._make_api_call, messages, **kwargs)
+    
+    async def _acall_api(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        """_amake_api_call behind the middleware (if one is attached)"""
+        if self.middleware is None:
+            return await self._amake_api_call(messages, **kwargs)
+        return await self.middleware.acall(self._amake_api_call, messages, **kwargs)
+    
+    def _open_stream(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        """Start a streaming request and return the SDK stream (None = provider can't stream)"""
+        return None
+    
+    async def _aopen_stream(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        """Async version of _open_stream()"""
+        return None
+    
+    def _stream_text(self, stream: Any, meta: Dict[str, Any]) -> Iterator[str]:
+        """Text deltas of an SDK stream; response_id/usage found on the way go into meta"""
+        raise NotImplementedError
+    
+    async def _astream_text(self, stream: Any, meta: Dict[str, Any]) -> AsyncIterator[str]:
+        """Text deltas of an async SDK stream"""
+        raise NotImplementedError
+        yield  # pragma: no cover - makes this an async generator
+    
+    def _create_async_client(self, http_client) -> Any:
+        """Build the async SDK client on top of the pooled httpx.AsyncClient"""
+        raise NotImplementedError
+    
+    def _get_async_client(self) -> Any:
+        """Async SDK client for the running event loop (shares its keep-alive pool)"""
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = self._create_async_client(get_async_http_client())
+                self._async_clients[loop] = client
+            return client
+    
+    @staticmethod
+    def _statement_section(problem_statement: str, first_turn: bool) -> str:
+        """The full statement on a session's first request, a back-reference afterwards"""
+        if first_turn:
+            return f"Problem Statement:\n{problem_statement}"
+        return "Problem Statement: same problem as in the first message of this conversation."
+    
     def create_context(self, session_id: str, system_message: Optional[str] = None) -> ChatContext:
         """Create a new chat context"""
         context = ChatContext(
@@ -59,7 +163,8 @@ class BaseLLMProvider(ABC):
             messages=[],
             model_name=self.model_name,
             provider_name=self.provider_name,
-            created_at=time.time()
+            created_at=time.time(),
+            policy=self.context_policy
         )
         
         if system_message:
@@ -74,21 +179,193 @@ class BaseLLMProvider(ABC):
     
     def chat(self, session_id: str, user_message: str, **kwargs) -> str:
         """Send a message and get response, maintaining context"""
-        context = self.get_context(session_id)
-        if not context:
-            raise ValueError(f"No context found for session {session_id}. Create context first.")
+        context = self._require_context(session_id)
         
         # Add user message to context
         context.add_message("user", user_message)
         
-        # Make API call
-        response = self._make_api_call(context.get_messages_for_api(), **kwargs)
+        # Make API call; the response is added to the context
+        return self._send(context, lambda messages, **extra: self._call_api(messages, **extra, **kwargs))
+    
+    async def achat(self, session_id: str, user_message: str, **kwargs) -> str:
+        """Async version of chat() - many sessions can be in flight on one event loop"""
+        context = self._require_context(session_id)
+        context.add_message("user", user_message)
+        return await self._asend(context, lambda messages, **extra: self._acall_api(messages, **extra, **kwargs))
+    
+    def chat_stream(self, session_id: str, user_message: str,
+                    stop_when: Optional[Callable[[str], bool]] = None, **kwargs) -> str:
+        """
+        Like chat(), but streams the response
         
-        # Add assistant response to context
-        context.add_message("assistant", response)
+        Args:
+            session_id: Chat session
+            user_message: Message to send
+            stop_when: Called with every text chunk; returning True closes the
+                       stream and keeps what was received so far
         
+        Returns:
+            Response text (possibly cut short by stop_when)
+        """
+        context = self._require_context(session_id)
+        context.add_message("user", user_message)
+        return self._send(context, lambda messages, **extra: self._stream_call(messages, stop_when, **extra, **kwargs))
+    
+    async def achat_stream(self, session_id: str, user_message: str,
+                           stop_when: Optional[Callable[[str], bool]] = None, **kwargs) -> str:
+        """Async version of chat_stream()"""
+        context = self._require_context(session_id)
+        context.add_message("user", user_message)
+        return await self._asend(
+            context, lambda messages, **extra: self._astream_call(messages, stop_when, **extra, **kwargs)
+        )
+    
+    def _require_context(self, session_id: str) -> ChatContext:
+        context = self.get_context(session_id)
+        if not context:
+            raise ValueError(f"No context found for session {session_id}. Create context first.")
+        return context
+    
+    def _request_messages(self, context: ChatContext) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        """Messages to send for the context's pending user turn, plus extra API arguments"""
+        return context.get_messages_for_api(), {}
+    
+    def _send(self, context: ChatContext, call: Callable[..., str]) -> str:
+        """Run call(messages, **extra) for the pending user turn and add the reply to the context"""
+        messages, extra = self._request_messages(context)
+        try:
+            response = call(messages, **extra)
+        except ProviderAPIError as e:
+            if not self._chain_lost(context, extra, e):
+                raise
+            messages, extra = self._request_messages(context)
+            response = call(messages, **extra)
+        self._add_response(context, messages, extra, response)
         return response
     
+    async def _asend(self, context: ChatContext, call: Callable[..., Awaitable[str]]) -> str:
+        """Async version of _send()"""
+        messages, extra = self._request_messages(context)
+        try:
+            response = await call(messages, **extra)
+        except ProviderAPIError as e:
+            if not self._chain_lost(context, extra, e):
+                raise
+            messages, extra = self._request_messages(context)
+            response = await call(messages, **extra)
+        self._add_response(context, messages, extra, response)
+        return response
+    
+    def _chain_lost(self, context: ChatContext, extra: Dict[str, Any], error: ProviderAPIError) -> bool:
+        """True (and the chain is reset) when a chained request failed because the server forgot it"""
+        if "previous_response_id" not in extra or error.status_code not in (400, 404):
+            return False
+        print(f"⚠️  {self.provider_name}: stored response {context.response_id} unavailable - resending history")
+        context.response_id = None
+        return True
+    
+    def _add_response(self, context: ChatContext, sent: List[Dict[str, str]], extra: Dict[str, Any],
+                      response: str) -> None:
+        self._record_turn(context, sent, response)
+        context.add_message("assistant", response)
+        
+        # Responses the server stored can be continued without resending the history
+        response_id = getattr(response, "response_id", None)
+        if response_id:
+            context.response_id = response_id
+            context.chained_count = len(context.messages)
+        elif "previous_response_id" not in extra:
+            context.response_id = None
+        # else: the reply wasn't stored (e.g. stream stopped early) - the next request chains from
+        # the previous response again and resends this turn
+    
+    def _record_turn(self, context: ChatContext, sent: List[Dict[str, str]], response: str) -> None:
+        self._report_turn(context.record_turn(sent, response))
+    
+    def _report_turn(self, stats: Dict[str, Any]) -> None:
+        if stats["saved_tokens"] > 0:
+            print(f"🧮 {self.provider_name}: turn {stats['turn']} sent ~{stats['prompt_tokens']} prompt tokens "
+                  f"(~{stats['saved_tokens']} of history not resent)")
+        usage = stats["usage"]
+        if usage and usage["cached_tokens"]:
+            print(f"⚡ {self.provider_name}: {usage['cached_tokens']}/{usage['input_tokens']} input tokens "
+                  f"served from prompt cache")
+    
+    def last_usage(self, session_id: str) -> Optional[Dict[str, int]]:
+        """Provider-reported usage of the session's last request (None if unknown)"""
+        context = self.get_context(session_id)
+        if not context or not context.turn_stats:
+            return None
+        return context.turn_stats[-1]["usage"]
+    
+    def _stream_call(self, messages: List[Dict[str, str]], stop_when: Optional[Callable[[str], bool]],
+                     **kwargs) -> str:
+        """Open a stream (plain call if the provider can't stream) and read it"""
+        # Opening the stream is the part that can be rate limited / retried
+        if self.middleware is None:
+            stream = self._open_stream(messages, **kwargs)
+        else:
+            stream = self.middleware.call(self._open_stream, messages, **kwargs)
+        
+        if stream is None:
+            return self._call_api(messages, **kwargs)
+        return self._read_stream(stream, stop_when)
+    
+    async def _astream_call(self, messages: List[Dict[str, str]], stop_when: Optional[Callable[[str], bool]],
+                            **kwargs) -> str:
+        """Async version of _stream_call()"""
+        if self.middleware is None:
+            stream = await self._aopen_stream(messages, **kwargs)
+        else:
+            stream = await self.middleware.acall(self._aopen_stream, messages, **kwargs)
+        
+        if stream is None:
+            return await self._acall_api(messages, **kwargs)
+        return await self._aread_stream(stream, stop_when)
+    
+    def _read_stream(self, stream: Any, stop_when: Optional[Callable[[str], bool]]) -> str:
+        """Collect chunks until the stream ends or stop_when fires; always closes the stream"""
+        parts: List[str] = []
+        meta: Dict[str, Any] = {}
+        stopped = False
+        try:
+            # Leaving the block closes the response, which aborts generation of the remaining tokens
+            with stream:
+                for chunk in self._stream_text(stream, meta):
+                    parts.append(chunk)
+                    if stop_when is not None and stop_when(chunk):
+                        stopped = True
+                        break
+        except Exception as e:
+            raise ProviderAPIError.wrap(self.provider_name, e) from e
+        
+        return self._stream_result(parts, stopped, meta)
+    
+    async def _aread_stream(self, stream: Any, stop_when: Optional[Callable[[str], bool]]) -> str:
+        """Async version of _read_stream()"""
+        parts: List[str] = []
+        meta: Dict[str, Any] = {}
+        stopped = False
+        try:
+            async with stream:
+                async for chunk in self._astream_text(stream, meta):
+                    parts.append(chunk)
+                    if stop_when is not None and stop_when(chunk):
+                        stopped = True
+                        break
+        except Exception as e:
+            raise ProviderAPIError.wrap(self.provider_name, e) from e
+        
+        return self._stream_result(parts, stopped, meta)
+    
+    def _stream_result(self, parts: List[str], stopped: bool, meta: Dict[str, Any]) -> str:
+        response = "".join(parts).strip()
+        if stopped:
+            print(f"✂️  {self.provider_name}: program complete after {len(response)} chars - stopped stream early")
+            # An aborted response can't be continued server-side
+            return ProviderResponse(response, usage=meta.get("usage"))
+        return ProviderResponse(response, meta.get("response_id"), meta.get("usage"))
+    
     def clear_context(self, session_id: str) -> None:
         """Clear a specific context"""
         if session_id in self._contexts:
@@ -110,5 +387,8 @@ class BaseLLMProvider(ABC):
             "model": self.model_name,
             "message_count": len(context.messages),
             "created_at": context.created_at,
-            "last_message_time": context.messages[-1].timestamp if context.messages else None
+            "last_message_time": context.messages[-1].timestamp if context.messages else None,
+            "prompt_tokens": sum(t["prompt_tokens"] for t in context.turn_stats),
+            "saved_tokens": sum(t["saved_tokens"] for t in context.turn_stats),
+            "turns": list(context.turn_stats)
         }
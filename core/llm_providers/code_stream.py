@@ -0,0 +1,113 @@
+"""
+Incremental C++ code parser for streamed completions
+
+Fed chunk by chunk, CodeStreamParser tells the caller when a complete
+translation unit has been received - braces balanced and main() closed -
+so the stream can be cut before the model starts explaining its code.
+"""
+import re
+
+MAIN_RE = re.compile(r"\bmain\s*\(")
+# Top-level C++ lines start or end like this; explanation prose ends with ".", ":" or a word
+CODE_PREFIXES = ("#", "//", "/*", "*", "}", "template", "struct ", "class ", "using ", "typedef ", "namespace ")
+CODE_SUFFIXES = (";", "{", "}", ")", ">", ",", "\\")
+
+
+class CodeStreamParser:
+    """Tracks fences, strings, comments and brace depth across chunks.
+
+    Completion rules:
+    - inside a ``` fence: the closing fence after main() has closed
+    - unfenced: the first non-blank top-level line after main() closes that
+      looks like prose (code such as helper functions keeps the stream going)
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.complete = False
+        self._pending = ""  # incomplete last line
+        self._in_fence = False
+        self._depth = 0
+        self._in_block_comment = False
+        self._main_declared = False
+        self._main_open = False
+        self._main_closed = False
+
+    def feed(self, chunk: str) -> bool:
+        """Add a chunk; returns True once the program is complete"""
+        if self.complete:
+            return True
+        self.text += chunk
+        self._pending += chunk
+        *lines, self._pending = self._pending.split("\n")
+        for line in lines:
+            if self._process_line(line):
+                self.complete = True
+                break
+        return self.complete
+
+    def _process_line(self, line: str) -> bool:
+        stripped = line.strip()
+
+        if stripped.startswith("```"):
+            if self._in_fence:
+                self._in_fence = False
+                return self._main_closed
+            self._in_fence = True
+            return False
+
+        # Prose can only follow at top level: inside a helper, "else" or "public:" are code
+        if self._main_closed and not self._in_fence and stripped and not self._in_block_comment \
+                and self._depth == 0:
+            if not self._looks_like_code(stripped):
+                return True
+            # More code after main (helpers defined later): keep reading
+        self._scan_code(line)
+        return False
+
+    @staticmethod
+    def _looks_like_code(line: str) -> bool:
+        return line.startswith(CODE_PREFIXES) or line.endswith(CODE_SUFFIXES)
+
+    def _scan_code(self, line: str):
+        """Update brace depth and main() tracking for one line of code"""
+        code = []
+        i = 0
+        quote = None
+        while i < len(line):
+            ch = line[i]
+            nxt = line[i + 1] if i + 1 < len(line) else ""
+            if self._in_block_comment:
+                if ch == "*" and nxt == "/":
+                    self._in_block_comment = False
+                    i += 1
+            elif quote:
+                if ch == "\\":
+                    i += 1
+                elif ch == quote:
+                    quote = None
+            elif ch == "/" and nxt == "/":
+                break
+            elif ch == "/" and nxt == "*":
+                self._in_block_comment = True
+                i += 1
+            elif ch in "\"'":
+                quote = ch
+            else:
+                code.append(ch)
+                if ch == "{":
+                    if self._depth == 0 and not self._main_open and (
+                            self._main_declared or MAIN_RE.search("".join(code))):
+                        self._main_open = True
+                    self._depth += 1
+                elif ch == "}":
+                    self._depth = max(0, self._depth - 1)
+                    if self._depth == 0 and self._main_open:
+                        self._main_closed = True
+                elif ch == ";" and self._depth == 0 and self._main_declared and not self._main_open:
+                    self._main_declared = False  # only a prototype
+            i += 1
+
+        code = "".join(code)
+        if self._depth == 0 and not self._main_open and MAIN_RE.search(code) and not code.rstrip().endswith(";"):
+            self._main_declared = True
@@ -0,0 +1,84 @@
+"""
+Context policy: keeps chat history inside a token budget
+
+A solving session talks to the same model for several attempts. Resending
+every earlier turn verbatim makes prompt size grow quadratically, so the
+policy keeps the system prompt and the first request (problem statement),
+keeps the most recent turns verbatim, replaces older solutions with a short
+placeholder and finally drops the oldest middle turns if the budget is still
+exceeded.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+from core.config import LLM_CONTEXT_KEEP_RECENT, LLM_CONTEXT_MAX_TOKENS
+
+# Assistant turns that contain a program (fenced or bare)
+CODE_RE = re.compile(r"```|#include|\bint\s+main\s*\(")
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return len(text) // 4 + 1 if text else 0
+
+
+def count_message_tokens(messages: Sequence[Dict[str, str]]) -> int:
+    """Rough token count of a message list, including per-message overhead"""
+    return sum(count_tokens(m.get("content", "")) + 4 for m in messages)
+
+
+@dataclass
+class ContextPolicy:
+    """Token budget for the messages sent with each request"""
+    max_prompt_tokens: int = LLM_CONTEXT_MAX_TOKENS
+    keep_recent_messages: int = LLM_CONTEXT_KEEP_RECENT  # newest messages always sent verbatim
+
+    def apply(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Fit messages into the budget
+
+        Args:
+            messages: Full history in API format (system, user, assistant, ...)
+
+        Returns:
+            Messages to send: anchors + summarized middle + recent turns
+        """
+        anchor_count = self._anchor_count(messages)
+        recent_start = max(anchor_count, len(messages) - self.keep_recent_messages)
+        anchors = messages[:anchor_count]
+        middle = [self._summarize(m) for m in messages[anchor_count:recent_start]]
+        recent = list(messages[recent_start:])
+
+        # Drop the oldest middle turns until the prompt fits
+        while middle and count_message_tokens(anchors + middle + recent) > self.max_prompt_tokens:
+            middle.pop(0)
+
+        # Still too big: summarize code in recent turns too, except the newest solution and request
+        if count_message_tokens(anchors + middle + recent) > self.max_prompt_tokens:
+            last_assistant = max((i for i, m in enumerate(recent) if m["role"] == "assistant"), default=-1)
+            keep = {last_assistant, len(recent) - 1}
+            recent = [m if i in keep else self._summarize(m) for i, m in enumerate(recent)]
+
+        return anchors + middle + recent
+
+    @staticmethod
+    def _anchor_count(messages: List[Dict[str, str]]) -> int:
+        """System messages plus the first user message (the problem statement)"""
+        count = 0
+        while count < len(messages) and messages[count]["role"] == "system":
+            count += 1
+        if count < len(messages) and messages[count]["role"] == "user":
+            count += 1
+        return count
+
+    @staticmethod
+    def _summarize(message: Dict[str, str]) -> Dict[str, str]:
+        """Replace a stale message that carries code with a one-line placeholder"""
+        content = message.get("content", "")
+        if message["role"] == "system" or not CODE_RE.search(content):
+            return message
+        lines = content.count("\n") + 1
+        what = "solution" if message["role"] == "assistant" else "request with code"
+        return {"role": message["role"],
+                "content": f"[Earlier {what} omitted ({lines} lines) - superseded by later attempts]"}
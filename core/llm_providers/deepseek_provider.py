@@ -2,23 +2,30 @@
 DeepSeek Provider
 """
 import os
-from typing import List, Dict, Optional
-from openai import OpenAI
-from .base import BaseLLMProvider
+from typing import Any, List, Dict, Optional
+from openai import AsyncOpenAI, OpenAI
+from .base import BaseLLMProvider, ProviderResponse, measure_turn
+from .http_pool import get_http_client
+from .middleware import ProviderAPIError
+from .usage import normalize_usage
 
 class DeepSeekProvider(BaseLLMProvider):
     """DeepSeek provider with persistent context"""
     
-    def __init__(self, api_key: Optional[str] = None, model_name: str = "deepseek-reasoner"):
+    def __init__(self, api_key: Optional[str] = None, model_name: str = "deepseek-reasoner", client: Optional[Any] = None):
         api_key = api_key or os.environ.get("DEEPSEEK_API_KEY")
         if not api_key:
             raise ValueError("DeepSeek API key is required")
         
         super().__init__(api_key, model_name)
         self._conversation_contexts = {}  # Initialize conversation contexts dictionary
-        self.client = OpenAI(
+        self._turn_stats: Dict[str, List[Dict[str, Any]]] = {}  # session_id -> token counts per request
+        # SDK retries are off: ProviderMiddleware owns the retry policy
+        self.client = client or OpenAI(
             api_key=api_key,
-            base_url="https://api.deepseek.com"
+            base_url="https://api.deepseek.com",
+            http_client=get_http_client(),
+            max_retries=0
         )
     
     def _make_api_call(self, messages: List[Dict[str, str]], **kwargs) -> tuple[str, str]:
@@ -30,32 +37,51 @@ class DeepSeekProvider(BaseLLMProvider):
         - final_answer_only: only the final answer for conversation history (API requirement)
         """
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                max_tokens=kwargs.get("max_tokens", 2048),  # Controls reasoning + answer together
-                # Note: temperature/top_p are ignored by deepseek-reasoner but allowed for compatibility
-                temperature=kwargs.get("temperature", 0.1),
-                top_p=kwargs.get("top_p", 1.0),
-            )
-            
-            # Extract both reasoning (chain-of-thought) and final answer
-            message = response.choices[0].message
-            reasoning = message.reasoning_content if hasattr(message, 'reasoning_content') else None
-            final_answer = message.content.strip() if message.content else ""
-            
-            # Combine reasoning and answer for comprehensive debugging feedback
-            if reasoning:
-                combined = f"**Reasoning Process:**\n{reasoning}\n\n**Analysis:**\n{final_answer}"
-            else:
-                combined = final_answer
-            
-            # Return both: combined for display, final_answer for history
-            # (API will 400 if we send reasoning_content back in next request)
-            return (combined, final_answer)
+            response = self.client.chat.completions.create(**self._chat_params(messages, **kwargs))
+            return self._split_response(response)
                 
         except Exception as e:
-            raise Exception(f"DeepSeek API error: {str(e)}")
+            raise ProviderAPIError.wrap("DeepSeek", e) from e
+    
+    async def _amake_api_call(self, messages: List[Dict[str, str]], **kwargs) -> tuple[str, str]:
+        """Async DeepSeek API call over the pooled keep-alive connection (same return as _make_api_call)"""
+        try:
+            response = await self._get_async_client().chat.completions.create(**self._chat_params(messages, **kwargs))
+            return self._split_response(response)
+                
+        except Exception as e:
+            raise ProviderAPIError.wrap("DeepSeek", e) from e
+    
+    def _create_async_client(self, http_client) -> Any:
+        return AsyncOpenAI(api_key=self.api_key, base_url="https://api.deepseek.com", http_client=http_client,
+                           max_retries=0)
+    
+    def _chat_params(self, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "messages": messages,
+            "max_tokens": kwargs.get("max_tokens", 2048),  # Controls reasoning + answer together
+            # Note: temperature/top_p are ignored by deepseek-reasoner but allowed for compatibility
+            "temperature": kwargs.get("temperature", 0.1),
+            "top_p": kwargs.get("top_p", 1.0),
+        }
+    
+    def _split_response(self, response) -> tuple[str, str]:
+        """Return (combined reasoning + answer, final answer only)"""
+        # Extract both reasoning (chain-of-thought) and final answer
+        message = response.choices[0].message
+        reasoning = message.reasoning_content if hasattr(message, 'reasoning_content') else None
+        final_answer = message.content.strip() if message.content else ""
+        
+        # Combine reasoning and answer for comprehensive debugging feedback
+        if reasoning:
+            combined = f"**Reasoning Process:**\n{reasoning}\n\n**Analysis:**\n{final_answer}"
+        else:
+            combined = final_answer
+        
+        # Return both: combined for display, final_answer for history
+        # (API will 400 if we send reasoning_content back in next request)
+        return (ProviderResponse(combined, usage=normalize_usage(response.usage)), final_answer)
     
     def create_context(self, session_id: str, system_message: str = ""):
         """Override to ensure proper initialization in _conversation_contexts"""
@@ -71,6 +97,49 @@ class DeepSeekProvider(BaseLLMProvider):
         """Get conversation context for a session"""
         return self._conversation_contexts.get(session_id)
     
+    def last_usage(self, session_id: str) -> Optional[Dict[str, int]]:
+        turns = self._turn_stats.get(session_id)
+        return turns[-1]["usage"] if turns else None
+    
+    def get_context_summary(self, session_id: str) -> Dict[str, Any]:
+        """Get summary of context (same keys as the other providers)"""
+        messages = self._conversation_contexts.get(session_id)
+        if messages is None:
+            return {}
+        turns = self._turn_stats.get(session_id, [])
+        return {
+            "session_id": session_id,
+            "provider": self.provider_name,
+            "model": self.model_name,
+            "message_count": len(messages),
+            "prompt_tokens": sum(t["prompt_tokens"] for t in turns),
+            "saved_tokens": sum(t["saved_tokens"] for t in turns),
+            "turns": list(turns)
+        }
+    
+    def clear_context(self, session_id: str) -> None:
+        """Clear a specific context"""
+        self._conversation_contexts.pop(session_id, None)
+        self._turn_stats.pop(session_id, None)
+    
+    def _history_to_send(self, session_id: str) -> List[Dict[str, str]]:
+        """The session's history trimmed to the context policy's token budget"""
+        history = self._conversation_contexts[session_id]
+        return self.context_policy.apply(history) if self.context_policy else list(history)
+    
+    def _add_answer(self, session_id: str, sent: List[Dict[str, str]], combined_response, final_answer: str) -> None:
+        """Record the request's token counts, then keep only the final answer in the history"""
+        turns = self._turn_stats.setdefault(session_id, [])
+        turns.append(measure_turn(len(turns) + 1, self._conversation_contexts[session_id], sent, combined_response))
+        self._report_turn(turns[-1])
+        
+        # CRITICAL: Store only final answer in conversation history
+        # (DeepSeek API will return 400 if reasoning_content is sent back)
+        self._conversation_contexts[session_id].append({
+            "role": "assistant",
+            "content": final_answer  # NOT combined_response!
+        })
+    
     def chat(self, session_id: str, user_message: str, **kwargs) -> str:
         """Override chat to handle DeepSeek's dual response (reasoning + final answer)
         
@@ -87,27 +156,48 @@ class DeepSeekProvider(BaseLLMProvider):
         })
         
         # Make API call and get both combined and final-only responses
-        combined_response, final_answer = self._make_api_call(
-            self._conversation_contexts[session_id],
-            **kwargs
-        )
+        sent = self._history_to_send(session_id)
+        combined_response, final_answer = self._call_api(sent, **kwargs)
+        self._add_answer(session_id, sent, combined_response, final_answer)
+        
+        # Return combined response (with reasoning) to caller for rich debugging feedback
+        return combined_response
+    
+    async def achat(self, session_id: str, user_message: str, **kwargs) -> str:
+        """Async version of chat(); history keeps only the final answer"""
+        if session_id not in self._conversation_contexts:
+            raise ValueError(f"Session {session_id} not found. Create context first.")
         
-        # CRITICAL: Store only final answer in conversation history
-        # (DeepSeek API will return 400 if reasoning_content is sent back)
         self._conversation_contexts[session_id].append({
-            "role": "assistant",
-            "content": final_answer  # NOT combined_response!
+            "role": "user",
+            "content": user_message
         })
         
-        # Return combined response (with reasoning) to caller for rich debugging feedback
+        sent = self._history_to_send(session_id)
+        combined_response, final_answer = await self._acall_api(sent, **kwargs)
+        self._add_answer(session_id, sent, combined_response, final_answer)
+        
         return combined_response
     
     def generate_hint(self, session_id: str, problem_statement: str, 
                      failed_solution: str, verdict: str, error_details: str, **kwargs) -> str:
         """Generate debugging hint with context"""
+        user_message = self._hint_message(session_id, problem_statement, failed_solution, verdict, error_details)
+        return self.chat(session_id, user_message, **kwargs)
+    
+    async def agenerate_hint(self, session_id: str, problem_statement: str,
+                             failed_solution: str, verdict: str, error_details: str, **kwargs) -> str:
+        """Async version of generate_hint()"""
+        user_message = self._hint_message(session_id, problem_statement, failed_solution, verdict, error_details)
+        return await self.achat(session_id, user_message, **kwargs)
+    
+    def _hint_message(self, session_id: str, problem_statement: str,
+                      failed_solution: str, verdict: str, error_details: str) -> str:
+        """Create the session context on first use and build the hint request"""
         
-        # Create context if it doesn't exist
-        if not self.get_context(session_id):
+        # Create context if it doesn't exist; later hints only need the new failure
+        first_turn = not self.get_context(session_id)
+        if first_turn:
             system_message = """You are an expert competitive programming mentor and debugging specialist with advanced reasoning capabilities.
 
 Your expertise lies in deeply analyzing failed competitive programming solutions and providing precise, actionable debugging hints.
@@ -128,8 +218,7 @@ Be analytical, precise, and educational in your hints."""
         # Build user message
         user_message = f"""Problem Analysis Request:
 
-Problem Statement:
-{problem_statement}
+{self._statement_section(problem_statement, first_turn)}
 
 Failed Solution:
 {failed_solution}
@@ -141,5 +230,5 @@ Error Details:
 
 Please provide specific debugging hints to help fix this solution. Focus on the root cause of the failure and suggest targeted improvements."""
         
-        return self.chat(session_id, user_message, **kwargs)
+        return user_message
 
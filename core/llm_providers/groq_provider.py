@@ -2,20 +2,24 @@
 Groq Provider
 """
 import os
-from typing import List, Dict, Optional
-from groq import Groq
-from .base import BaseLLMProvider
+from typing import Any, AsyncIterator, Iterator, List, Dict, Optional
+from groq import AsyncGroq, Groq
+from .base import BaseLLMProvider, ProviderResponse
+from .http_pool import get_http_client
+from .middleware import ProviderAPIError
+from .usage import normalize_usage
 
 class GroqProvider(BaseLLMProvider):
     """Groq provider with persistent context"""
     
-    def __init__(self, api_key: Optional[str] = None, model_name: str = "llama-3.3-70b-versatile"):
+    def __init__(self, api_key: Optional[str] = None, model_name: str = "llama-3.3-70b-versatile", client: Optional[Any] = None):
         api_key = api_key or os.environ.get("GROQ_API_KEY")
         if not api_key:
             raise ValueError("Groq API key is required")
         
         super().__init__(api_key, model_name)
-        self.client = Groq(api_key=api_key)
+        # SDK retries are off: ProviderMiddleware owns the retry policy
+        self.client = client or Groq(api_key=api_key, http_client=get_http_client(), max_retries=0)
     
     def _make_api_call(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Make Groq API call"""
@@ -26,16 +30,89 @@ class GroqProvider(BaseLLMProvider):
                 temperature=kwargs.get("temperature", 0.1),
                 max_tokens=kwargs.get("max_tokens", 2000),
             )
-            return response.choices[0].message.content.strip()
+            return ProviderResponse(response.choices[0].message.content.strip(), usage=normalize_usage(response.usage))
         except Exception as e:
-            raise Exception(f"Groq API error: {str(e)}")
+            raise ProviderAPIError.wrap("Groq", e) from e
+    
+    async def _amake_api_call(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Async Groq API call over the pooled keep-alive connection"""
+        try:
+            response = await self._get_async_client().chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                temperature=kwargs.get("temperature", 0.1),
+                max_tokens=kwargs.get("max_tokens", 2000),
+            )
+            return ProviderResponse(response.choices[0].message.content.strip(), usage=normalize_usage(response.usage))
+        except Exception as e:
+            raise ProviderAPIError.wrap("Groq", e) from e
+    
+    def _open_stream(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        """Start a streamed Groq completion"""
+        try:
+            return self.client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                temperature=kwargs.get("temperature", 0.1),
+                max_tokens=kwargs.get("max_tokens", 2000),
+                stream=True,
+            )
+        except Exception as e:
+            raise ProviderAPIError.wrap("Groq", e) from e
+    
+    async def _aopen_stream(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        try:
+            return await self._get_async_client().chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                temperature=kwargs.get("temperature", 0.1),
+                max_tokens=kwargs.get("max_tokens", 2000),
+                stream=True,
+            )
+        except Exception as e:
+            raise ProviderAPIError.wrap("Groq", e) from e
+    
+    def _stream_text(self, stream: Any, meta: Dict[str, Any]) -> Iterator[str]:
+        for chunk in stream:
+            self._chunk_usage(chunk, meta)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    async def _astream_text(self, stream: Any, meta: Dict[str, Any]) -> AsyncIterator[str]:
+        async for chunk in stream:
+            self._chunk_usage(chunk, meta)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    @staticmethod
+    def _chunk_usage(chunk: Any, meta: Dict[str, Any]) -> None:
+        """Groq reports usage on the last chunk under x_groq"""
+        usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or getattr(chunk, "usage", None)
+        if usage is not None:
+            meta["usage"] = normalize_usage(usage)
+    
+    def _create_async_client(self, http_client) -> Any:
+        return AsyncGroq(api_key=self.api_key, http_client=http_client, max_retries=0)
     
     def generate_hint(self, session_id: str, problem_statement: str, 
                      failed_solution: str, verdict: str, error_details: str, **kwargs) -> str:
         """Generate debugging hint with context"""
+        user_message = self._hint_message(session_id, problem_statement, failed_solution, verdict, error_details)
+        return self.chat(session_id, user_message, **kwargs)
+    
+    async def agenerate_hint(self, session_id: str, problem_statement: str,
+                             failed_solution: str, verdict: str, error_details: str, **kwargs) -> str:
+        """Async version of generate_hint()"""
+        user_message = self._hint_message(session_id, problem_statement, failed_solution, verdict, error_details)
+        return await self.achat(session_id, user_message, **kwargs)
+    
+    def _hint_message(self, session_id: str, problem_statement: str,
+                      failed_solution: str, verdict: str, error_details: str) -> str:
+        """Create the session context on first use and build the hint request"""
         
-        # Create context if it doesn't exist
-        if not self.get_context(session_id):
+        # Create context if it doesn't exist; later hints only need the new failure
+        first_turn = not self.get_context(session_id)
+        if first_turn:
             system_message = """You are an expert competitive programming mentor and debugging specialist.
 
 Your expertise lies in analyzing failed competitive programming solutions and providing precise, actionable debugging hints.
@@ -55,8 +132,7 @@ Be analytical, precise, and educational in your hints."""
         # Build user message
         user_message = f"""Problem Analysis Request:
 
-Problem Statement:
-{problem_statement}
+{self._statement_section(problem_statement, first_turn)}
 
 Failed Solution:
 {failed_solution}
@@ -68,4 +144,4 @@ Error Details:
 
 Please provide specific debugging hints to help fix this solution. Focus on the root cause of the failure and suggest targeted improvements."""
         
-        return self.chat(session_id, user_message, **kwargs)
+        return user_message
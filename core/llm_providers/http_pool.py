@@ -0,0 +1,67 @@
+"""
+Shared HTTP connection pools for LLM providers
+
+One keep-alive httpx.Client serves every synchronous SDK client in the
+process, and one httpx.AsyncClient per event loop serves the async path,
+so requests reuse TCP/TLS connections instead of opening new ones.
+"""
+import asyncio
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+
+from core.config import (
+    LLM_HTTP_KEEPALIVE_EXPIRY_SEC,
+    LLM_HTTP_MAX_CONNECTIONS,
+    LLM_HTTP_MAX_KEEPALIVE,
+    LLM_HTTP_TIMEOUT_SEC,
+)
+
+_lock = threading.Lock()
+_sync_client: Optional[httpx.Client] = None
+# httpx.AsyncClient is bound to the loop it was first used on
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def http_limits() -> httpx.Limits:
+    """Connection limits for the shared pools (LLM_HTTP_* settings)"""
+    return httpx.Limits(
+        max_connections=LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY_SEC
+    )
+
+
+def http_timeout() -> httpx.Timeout:
+    return httpx.Timeout(LLM_HTTP_TIMEOUT_SEC, connect=10.0)
+
+
+def get_http_client() -> httpx.Client:
+    """Process-wide keep-alive client for synchronous calls (thread-safe)"""
+    global _sync_client
+    with _lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(limits=http_limits(), timeout=http_timeout())
+        return _sync_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Keep-alive async client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=http_limits(), timeout=http_timeout())
+            _async_clients[loop] = client
+        return client
+
+
+async def aclose_async_http_client() -> None:
+    """Close the running loop's async client (call before the loop shuts down)"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,287 @@
+"""
+Provider middleware: rate limiting, retries and circuit breaking
+
+Every provider call goes through a ProviderMiddleware that
+1. waits on token buckets for requests/minute and tokens/minute,
+2. retries 429/5xx/connection errors with jittered exponential backoff
+   (honouring Retry-After) using tenacity,
+3. trips a circuit breaker after repeated server failures so callers pause
+   instead of hammering a provider that is down.
+"""
+import asyncio
+import email.utils
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from tenacity import AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from core.metrics import LLM_ERRORS, LLM_RETRIES
+
+# HTTP statuses worth retrying (529 = provider overloaded)
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+
+
+class ProviderAPIError(Exception):
+    """Provider call failed; carries the HTTP status and Retry-After when known"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None,
+                 retryable: Optional[bool] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.retryable = retryable if retryable is not None else status_code in RETRYABLE_STATUS
+
+    @classmethod
+    def wrap(cls, provider: str, error: Exception) -> "ProviderAPIError":
+        """Build from an SDK exception (openai/groq APIStatusError, mistral SDKError, httpx errors)"""
+        if isinstance(error, ProviderAPIError):
+            return error
+        status = getattr(error, "status_code", None)
+        response = getattr(error, "response", None) or getattr(error, "raw_response", None)
+        if status is None and isinstance(response, httpx.Response):
+            status = response.status_code
+        headers = response.headers if isinstance(response, httpx.Response) else {}
+        # APIConnectionError / APITimeoutError / transport failures have no status but are transient
+        transient = status is None and (
+            isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError))
+            or "Connection" in type(error).__name__ or "Timeout" in type(error).__name__
+        )
+        return cls(f"{provider} API error: {error}", status_code=status, retry_after=parse_retry_after(headers),
+                   retryable=True if transient else None)
+
+
+class CircuitOpenError(ProviderAPIError):
+    """Raised while a provider's circuit breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name}: circuit open, retry in {retry_after:.1f}s", retry_after=retry_after, retryable=True)
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Seconds to wait from retry-after-ms / Retry-After (seconds or HTTP date)"""
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+@dataclass
+class RateLimitPolicy:
+    """Limits and retry settings for one provider/model (None = unlimited)"""
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    max_retries: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+    failure_threshold: int = 5  # consecutive server failures before the circuit opens
+    reset_timeout: float = 30.0  # seconds the circuit stays open
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at rate_per_minute.
+
+    Callers reserve tokens up front (the balance may go negative) and then
+    sleep outside the lock, so waiters are served in arrival order.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Take amount tokens; returns how long the caller must wait before using them"""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self, amount: float = 1.0) -> float:
+        wait = self.reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, amount: float = 1.0) -> float:
+        wait = self.reserve(amount)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class CircuitBreaker:
+    """closed -> open after failure_threshold failures -> half-open after reset_timeout (one probe)"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == "closed":
+                return
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if self.state == "open" and remaining <= 0:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            raise CircuitOpenError(self.name, max(remaining, 1.0))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                print(f"✅ {self.name}: circuit closed")
+            self.state = "closed"
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"🔌 {self.name}: circuit open for {self.reset_timeout:.0f}s after {self._failures} failures")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+def estimate_tokens(messages: List[Dict[str, Any]], **kwargs) -> int:
+    """Rough request size for the TPM bucket: prompt chars/4 plus the completion budget"""
+    prompt_chars = sum(len(str(m.get("content", ""))) for m in messages)
+    return prompt_chars // 4 + int(kwargs.get("max_tokens") or 2000)
+
+
+class ProviderMiddleware:
+    """Wraps one provider/model's API calls with limiter, retries and circuit breaker"""
+
+    def __init__(self, name: str, policy: RateLimitPolicy):
+        self.name = name
+        self.policy = policy
+        self.request_bucket = TokenBucket(policy.requests_per_minute) if policy.requests_per_minute else None
+        self.token_bucket = TokenBucket(policy.tokens_per_minute) if policy.tokens_per_minute else None
+        self.breaker = CircuitBreaker(name, policy.failure_threshold, policy.reset_timeout)
+        self._backoff = wait_random_exponential(multiplier=policy.base_delay, max=policy.max_delay)
+        # One middleware per model is shared by every solver thread
+        self.stats = {"calls": 0, "retries": 0, "throttled_seconds": 0.0}
+        self._stats_lock = threading.Lock()
+
+    def call(self, fn: Callable[..., Any], messages: List[Dict[str, Any]], **kwargs) -> Any:
+        """Run fn(messages, **kwargs) under the policy"""
+        for attempt in Retrying(**self._retry_args()):
+            with attempt:
+                self.breaker.before_call()
+                self._throttle(messages, kwargs)
+                return self._run(fn, messages, kwargs)
+
+    async def acall(self, fn: Callable[..., Any], messages: List[Dict[str, Any]], **kwargs) -> Any:
+        """Async version of call(); fn must be a coroutine function"""
+        async for attempt in AsyncRetrying(**self._retry_args()):
+            with attempt:
+                self.breaker.before_call()
+                await self._athrottle(messages, kwargs)
+                return await self._arun(fn, messages, kwargs)
+
+    def _run(self, fn, messages, kwargs):
+        self._count("calls")
+        try:
+            result = fn(messages, **kwargs)
+        except Exception as e:
+            self._record_error(e)
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def _arun(self, fn, messages, kwargs):
+        self._count("calls")
+        try:
+            result = await fn(messages, **kwargs)
+        except Exception as e:
+            self._record_error(e)
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _count(self, stat: str, amount: float = 1) -> None:
+        with self._stats_lock:
+            self.stats[stat] += amount
+
+    def _record_error(self, error: Exception):
+        # Only server-side trouble counts against the breaker; a 4xx means the provider is up
+        status = getattr(error, "status_code", None)
+        LLM_ERRORS.inc(provider=self.name, status=status or type(error).__name__)
+        if isinstance(error, ProviderAPIError) and error.retryable and (status is None or status >= 500):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _throttle(self, messages, kwargs):
+        waited = 0.0
+        if self.request_bucket:
+            waited += self.request_bucket.acquire(1)
+        if self.token_bucket:
+            waited += self.token_bucket.acquire(estimate_tokens(messages, **kwargs))
+        self._count("throttled_seconds", waited)
+
+    async def _athrottle(self, messages, kwargs):
+        waited = 0.0
+        if self.request_bucket:
+            waited += await self.request_bucket.aacquire(1)
+        if self.token_bucket:
+            waited += await self.token_bucket.aacquire(estimate_tokens(messages, **kwargs))
+        self._count("throttled_seconds", waited)
+
+    def _retry_args(self) -> Dict[str, Any]:
+        return {
+            "stop": stop_after_attempt(self.policy.max_retries + 1),
+            "wait": self._wait,
+            "retry": retry_if_exception(lambda e: isinstance(e, ProviderAPIError) and e.retryable),
+            "before_sleep": self._before_sleep,
+            "reraise": True,
+        }
+
+    def _wait(self, retry_state) -> float:
+        """Retry-After when the provider sent one, else full-jitter exponential backoff"""
+        error = retry_state.outcome.exception()
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            return min(retry_after, self.policy.max_delay)
+        return self._backoff(retry_state)
+
+    def _before_sleep(self, retry_state):
+        self._count("retries")
+        LLM_RETRIES.inc(provider=self.name)
+        error = retry_state.outcome.exception()
+        delay = retry_state.next_action.sleep if retry_state.next_action else 0
+        print(f"⏳ {self.name}: {error} - retry {retry_state.attempt_number}/{self.policy.max_retries} in {delay:.1f}s")
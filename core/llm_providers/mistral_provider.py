@@ -2,20 +2,23 @@
 Mistral AI Provider
 """
 import os
-from typing import List, Dict, Optional
+from typing import Any, AsyncIterator, Iterator, List, Dict, Optional
 from mistralai import Mistral
-from .base import BaseLLMProvider
+from .base import BaseLLMProvider, ProviderResponse
+from .http_pool import get_http_client
+from .middleware import ProviderAPIError
+from .usage import normalize_usage
 
 class MistralProvider(BaseLLMProvider):
     """Mistral AI provider with persistent context"""
     
-    def __init__(self, api_key: Optional[str] = None, model_name: str = "codestral-2508"):
+    def __init__(self, api_key: Optional[str] = None, model_name: str = "codestral-2508", client: Optional[Any] = None):
         api_key = api_key or os.environ.get("MISTRAL_API_KEY")
         if not api_key:
             raise ValueError("Mistral API key is required")
         
         super().__init__(api_key, model_name)
-        self.client = Mistral(api_key=api_key)
+        self.client = client or Mistral(api_key=api_key, client=get_http_client())
     
     def _make_api_call(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Make Mistral API call"""
@@ -26,16 +29,82 @@ class MistralProvider(BaseLLMProvider):
                 temperature=kwargs.get("temperature", 0.1),
                 max_tokens=kwargs.get("max_tokens", 2000),
             )
-            return response.choices[0].message.content.strip()
+            return ProviderResponse(response.choices[0].message.content.strip(), usage=normalize_usage(response.usage))
         except Exception as e:
-            raise Exception(f"Mistral API error: {str(e)}")
+            raise ProviderAPIError.wrap("Mistral", e) from e
+    
+    async def _amake_api_call(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Async Mistral API call over the pooled keep-alive connection"""
+        try:
+            response = await self._get_async_client().chat.complete_async(
+                model=self.model_name,
+                messages=messages,
+                temperature=kwargs.get("temperature", 0.1),
+                max_tokens=kwargs.get("max_tokens", 2000),
+            )
+            return ProviderResponse(response.choices[0].message.content.strip(), usage=normalize_usage(response.usage))
+        except Exception as e:
+            raise ProviderAPIError.wrap("Mistral", e) from e
+    
+    def _open_stream(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        """Start a streamed Mistral completion"""
+        try:
+            return self.client.chat.stream(
+                model=self.model_name,
+                messages=messages,
+                temperature=kwargs.get("temperature", 0.1),
+                max_tokens=kwargs.get("max_tokens", 2000),
+            )
+        except Exception as e:
+            raise ProviderAPIError.wrap("Mistral", e) from e
+    
+    async def _aopen_stream(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        try:
+            return await self._get_async_client().chat.stream_async(
+                model=self.model_name,
+                messages=messages,
+                temperature=kwargs.get("temperature", 0.1),
+                max_tokens=kwargs.get("max_tokens", 2000),
+            )
+        except Exception as e:
+            raise ProviderAPIError.wrap("Mistral", e) from e
+    
+    def _stream_text(self, stream: Any, meta: Dict[str, Any]) -> Iterator[str]:
+        for event in stream:
+            if event.data.usage is not None:
+                meta["usage"] = normalize_usage(event.data.usage)
+            if event.data.choices and event.data.choices[0].delta.content:
+                yield event.data.choices[0].delta.content
+    
+    async def _astream_text(self, stream: Any, meta: Dict[str, Any]) -> AsyncIterator[str]:
+        async for event in stream:
+            if event.data.usage is not None:
+                meta["usage"] = normalize_usage(event.data.usage)
+            if event.data.choices and event.data.choices[0].delta.content:
+                yield event.data.choices[0].delta.content
+    
+    def _create_async_client(self, http_client) -> Any:
+        return Mistral(api_key=self.api_key, async_client=http_client)
     
     def generate_hint(self, session_id: str, problem_statement: str, 
                      failed_solution: str, verdict: str, error_details: str, **kwargs) -> str:
         """Generate debugging hint with context"""
+        user_message = self._hint_message(session_id, problem_statement, failed_solution, verdict, error_details)
+        return self.chat(session_id, user_message, **kwargs)
+    
+    async def agenerate_hint(self, session_id: str, problem_statement: str,
+                             failed_solution: str, verdict: str, error_details: str, **kwargs) -> str:
+        """Async version of generate_hint()"""
+        user_message = self._hint_message(session_id, problem_statement, failed_solution, verdict, error_details)
+        return await self.achat(session_id, user_message, **kwargs)
+    
+    def _hint_message(self, session_id: str, problem_statement: str,
+                      failed_solution: str, verdict: str, error_details: str) -> str:
+        """Create the session context on first use and build the hint request"""
         
-        # Create context if it doesn't exist
-        if not self.get_context(session_id):
+        # Create context if it doesn't exist; later hints only need the new failure
+        first_turn = not self.get_context(session_id)
+        if first_turn:
             system_message = """You are an expert competitive programming mentor specializing in debugging and providing hints.
 
 Your role is to analyze failed solutions and provide specific, actionable hints to help fix the issues.
@@ -54,8 +123,7 @@ Provide hints that guide the programmer to the correct solution without giving a
             self.create_context(session_id, system_message)
         
         # Build user message
-        user_message = f"""Problem Statement:
-{problem_statement}
+        user_message = f"""{self._statement_section(problem_statement, first_turn)}
 
 Failed Solution:
 {failed_solution}
@@ -67,4 +135,4 @@ Error Details:
 
 Please analyze this failure and provide specific hints on what needs to be fixed."""
         
-        return self.chat(session_id, user_message, **kwargs)
+        return user_message
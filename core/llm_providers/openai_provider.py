@@ -1,92 +1,179 @@
 """
 OpenAI GPT Provider
 """
+import hashlib
 import os
-from typing import List, Dict, Optional
+from typing import Any, AsyncIterator, Iterator, List, Dict, Optional
 import openai
-from .base import BaseLLMProvider
+from core.config import LLM_STREAM_SOLUTIONS, OPENAI_CHAIN_RESPONSES
+from .base import BaseLLMProvider, ChatContext, ProviderResponse
+from .code_stream import CodeStreamParser
+from .context_policy import count_message_tokens
+from .usage import normalize_usage
+from .http_pool import get_http_client
+from .middleware import ProviderAPIError
 
 class OpenAIProvider(BaseLLMProvider):
     """OpenAI GPT provider with persistent context"""
     
-    def __init__(self, api_key: Optional[str] = None, model_name: str = "gpt-4"):
+    def __init__(self, api_key: Optional[str] = None, model_name: str = "gpt-4", client: Optional[Any] = None):
         api_key = api_key or os.environ.get("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OpenAI API key is required")
         
         super().__init__(api_key, model_name)
-        self.client = openai.OpenAI(api_key=api_key)
+        # Reuse a client shared by other models on the same backend (e.g. gpt-4 and gpt-5).
+        # SDK retries are off: ProviderMiddleware owns the retry policy
+        self.client = client or openai.OpenAI(api_key=api_key, http_client=get_http_client(), max_retries=0)
+        # GPT-5: continue stored responses via previous_response_id instead of resending the history
+        self.chain_responses = OPENAI_CHAIN_RESPONSES and model_name.startswith("gpt-5")
     
     def _make_api_call(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Make OpenAI API call with model-specific handling"""
         try:
             # GPT-5 uses completely different API (responses.create vs chat.completions.create)
             if self.model_name.startswith("gpt-5"):
-                # Convert messages array to single input string for GPT-5
-                input_text = self._messages_to_input(messages)
-                
-                api_params = {
-                    "model": self.model_name,
-                    "input": input_text,
-                    "reasoning": {"effort": kwargs.get("reasoning_effort", "medium")}
-                }
-                
-                # Add any other params
-                for k, v in kwargs.items():
-                    if k not in ["temperature", "max_tokens", "reasoning_effort"]:
-                        api_params[k] = v
-                
-                response = self.client.responses.create(**api_params)
-                return response.output_text.strip()
+                response = self.client.responses.create(**self._responses_params(messages, **kwargs))
+                return self._response_result(response)
             
             # Regular models (gpt-4, gpt-3.5, etc.) use chat.completions
-            else:
-                # Default parameters for GPT-4
-                if self.model_name.startswith("gpt-4"):
-                    api_params = {
-                        "model": self.model_name,
-                        "messages": messages,
-                        "temperature": kwargs.get("temperature", 0.1),  # Low temperature for consistency
-                        "max_tokens": kwargs.get("max_tokens", 2000),
-                        "top_p": kwargs.get("top_p", 1.0),
-                        "presence_penalty": kwargs.get("presence_penalty", 0),
-                        "frequency_penalty": kwargs.get("frequency_penalty", 0),
-                    }
-                else:
-                    # Other models use default settings
-                    api_params = {
-                        "model": self.model_name,
-                        "messages": messages,
-                        "temperature": kwargs.get("temperature", 0.7),
-                        "max_tokens": kwargs.get("max_tokens", 2000),
-                    }
-                
-                # Add any other params not already set
-                for k, v in kwargs.items():
-                    if k not in api_params:
-                        api_params[k] = v
-                
-                response = self.client.chat.completions.create(**api_params)
-                return response.choices[0].message.content.strip()
+            response = self.client.chat.completions.create(**self._chat_params(messages, **kwargs))
+            return ProviderResponse(response.choices[0].message.content.strip(), usage=normalize_usage(response.usage))
                 
         except Exception as e:
-            raise Exception(f"OpenAI API error: {str(e)}")
-    
-    def _messages_to_input(self, messages: List[Dict[str, str]]) -> str:
-        """Convert messages array to single input string for GPT-5"""
-        input_parts = []
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
+            raise ProviderAPIError.wrap("OpenAI", e) from e
+    
+    async def _amake_api_call(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Async OpenAI API call over the pooled keep-alive connection"""
+        client = self._get_async_client()
+        try:
+            if self.model_name.startswith("gpt-5"):
+                response = await client.responses.create(**self._responses_params(messages, **kwargs))
+                return self._response_result(response)
             
-            if role == "system":
-                input_parts.append(f"System Instructions:\n{content}\n")
-            elif role == "user":
-                input_parts.append(f"{content}")
-            elif role == "assistant":
-                input_parts.append(f"Previous Response:\n{content}\n")
+            response = await client.chat.completions.create(**self._chat_params(messages, **kwargs))
+            return ProviderResponse(response.choices[0].message.content.strip(), usage=normalize_usage(response.usage))
+                
+        except Exception as e:
+            raise ProviderAPIError.wrap("OpenAI", e) from e
+    
+    def _open_stream(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        """Start a streamed completion (responses API for GPT-5)"""
+        try:
+            if self.model_name.startswith("gpt-5"):
+                return self.client.responses.create(**self._responses_params(messages, **kwargs), stream=True)
+            return self.client.chat.completions.create(**self._chat_params(messages, **kwargs), stream=True,
+                                                       stream_options={"include_usage": True})
+        except Exception as e:
+            raise ProviderAPIError.wrap("OpenAI", e) from e
+    
+    async def _aopen_stream(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        client = self._get_async_client()
+        try:
+            if self.model_name.startswith("gpt-5"):
+                return await client.responses.create(**self._responses_params(messages, **kwargs), stream=True)
+            return await client.chat.completions.create(**self._chat_params(messages, **kwargs), stream=True,
+                                                        stream_options={"include_usage": True})
+        except Exception as e:
+            raise ProviderAPIError.wrap("OpenAI", e) from e
+    
+    def _stream_text(self, stream: Any, meta: Dict[str, Any]) -> Iterator[str]:
+        for event in stream:
+            text = self._event_text(event, meta)
+            if text:
+                yield text
+    
+    async def _astream_text(self, stream: Any, meta: Dict[str, Any]) -> AsyncIterator[str]:
+        async for event in stream:
+            text = self._event_text(event, meta)
+            if text:
+                yield text
+    
+    @staticmethod
+    def _event_text(event: Any, meta: Dict[str, Any]) -> str:
+        """Text delta of a chat.completions chunk or a responses API event"""
+        event_type = getattr(event, "type", None)
+        if event_type == "response.output_text.delta":
+            return event.delta
+        if event_type == "response.completed":
+            meta["response_id"] = event.response.id
+            meta["usage"] = normalize_usage(event.response.usage)
+            return ""
+        if getattr(event, "usage", None) is not None:
+            meta["usage"] = normalize_usage(event.usage)  # final chunk with include_usage
+        choices = getattr(event, "choices", None)
+        if choices:
+            return choices[0].delta.content or ""
+        return ""
+    
+    def _response_result(self, response: Any) -> ProviderResponse:
+        """Text of a responses API result, keeping its id for chaining"""
+        return ProviderResponse(response.output_text.strip(), response.id, normalize_usage(response.usage))
+    
+    def _request_messages(self, context: ChatContext):
+        """GPT-5: send only the turns the stored response hasn't seen"""
+        if not (self.chain_responses and context.response_id):
+            return super()._request_messages(context)
         
-        return "\n".join(input_parts)
+        history = [{"role": msg.role, "content": msg.content} for msg in context.messages]
+        # Server-side history counts against the window too: past the budget start a fresh, trimmed chain
+        if context.policy and count_message_tokens(history) > context.policy.max_prompt_tokens:
+            return super()._request_messages(context)
+        
+        # Instructions are not inherited from the previous response, so the system prompt goes every time
+        system = [m for m in history if m["role"] == "system"]
+        return system + history[context.chained_count:], {"previous_response_id": context.response_id}
+    
+    def _create_async_client(self, http_client) -> Any:
+        return openai.AsyncOpenAI(api_key=self.api_key, http_client=http_client, max_retries=0)
+    
+    def _responses_params(self, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        """Parameters for responses.create (GPT-5)"""
+        # System prompt becomes instructions; the conversation goes as structured input items
+        instructions = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+        
+        api_params = {
+            "model": self.model_name,
+            "input": [{"role": m["role"], "content": m["content"]} for m in messages if m["role"] != "system"],
+            "reasoning": {"effort": kwargs.get("reasoning_effort", "medium")},
+            "store": self.chain_responses
+        }
+        if instructions:
+            api_params["instructions"] = instructions
+        
+        # Add any other params
+        for k, v in kwargs.items():
+            if k not in ["temperature", "max_tokens", "reasoning_effort"]:
+                api_params[k] = v
+        return api_params
+    
+    def _chat_params(self, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        """Parameters for chat.completions.create"""
+        # Default parameters for GPT-4
+        if self.model_name.startswith("gpt-4"):
+            api_params = {
+                "model": self.model_name,
+                "messages": messages,
+                "temperature": kwargs.get("temperature", 0.1),  # Low temperature for consistency
+                "max_tokens": kwargs.get("max_tokens", 2000),
+                "top_p": kwargs.get("top_p", 1.0),
+                "presence_penalty": kwargs.get("presence_penalty", 0),
+                "frequency_penalty": kwargs.get("frequency_penalty", 0),
+            }
+        else:
+            # Other models use default settings
+            api_params = {
+                "model": self.model_name,
+                "messages": messages,
+                "temperature": kwargs.get("temperature", 0.7),
+                "max_tokens": kwargs.get("max_tokens", 2000),
+            }
+        
+        # Add any other params not already set
+        for k, v in kwargs.items():
+            if k not in api_params:
+                api_params[k] = v
+        return api_params
     
     def clean_code_response(self, response: str) -> str:
         """Extract only C++ code from response, removing explanations"""
@@ -125,9 +212,39 @@ class OpenAIProvider(BaseLLMProvider):
     def generate_solution(self, session_id: str, problem_statement: str, 
                          previous_attempts: Optional[List[Dict]] = None, **kwargs) -> str:
         """Generate C++ solution with context"""
+        user_message = self._solution_message(session_id, problem_statement, previous_attempts)
+        kwargs.setdefault("prompt_cache_key", self._prompt_cache_key(problem_statement))
+        
+        # Get response and clean it; when streaming, stop as soon as main() is complete
+        if LLM_STREAM_SOLUTIONS:
+            response = self.chat_stream(session_id, user_message, stop_when=CodeStreamParser().feed, **kwargs)
+        else:
+            response = self.chat(session_id, user_message, **kwargs)
+        return self.clean_code_response(response)
+    
+    async def agenerate_solution(self, session_id: str, problem_statement: str,
+                                 previous_attempts: Optional[List[Dict]] = None, **kwargs) -> str:
+        """Async version of generate_solution()"""
+        user_message = self._solution_message(session_id, problem_statement, previous_attempts)
+        kwargs.setdefault("prompt_cache_key", self._prompt_cache_key(problem_statement))
+        if LLM_STREAM_SOLUTIONS:
+            response = await self.achat_stream(session_id, user_message, stop_when=CodeStreamParser().feed, **kwargs)
+        else:
+            response = await self.achat(session_id, user_message, **kwargs)
+        return self.clean_code_response(response)
+    
+    @staticmethod
+    def _prompt_cache_key(problem_statement: str) -> str:
+        """Routes every request about one problem (any attempt or workflow) to the same prompt cache"""
+        return "problem-" + hashlib.sha256(problem_statement.encode("utf-8")).hexdigest()[:24]
+    
+    def _solution_message(self, session_id: str, problem_statement: str,
+                          previous_attempts: Optional[List[Dict]] = None) -> str:
+        """Create the session context on first use and build the solution request"""
         
         # Create context if it doesn't exist
-        if not self.get_context(session_id):
+        first_turn = not self.get_context(session_id)
+        if first_turn:
             system_message = """You are an expert competitive programmer specializing in C++ solutions for ICPC problems.
 
 Your task is to analyze problem statements and generate efficient, correct C++ solutions.
@@ -146,8 +263,12 @@ If this is a retry attempt, analyze the previous failure and fix the issues."""
             
             self.create_context(session_id, system_message)
         
-        # Build user message
-        user_message = f"Problem Statement:\n{problem_statement}\n\n"
+        # Later turns carry only what changed; the statement and our last code are already in the context
+        if not first_turn and previous_attempts:
+            return self._feedback_message(previous_attempts[-1])
+        
+        # Build user message: the statement is the stable, cacheable prefix; attempt data goes after it
+        user_message = f"{self._statement_section(problem_statement, True)}\n\n"
         
         if previous_attempts:
             user_message += "Previous attempts and their failures:\n"
@@ -163,6 +284,28 @@ If this is a retry attempt, analyze the previous failure and fix the issues."""
         else:
             user_message += "Please provide a C++ solution for this problem."
         
-        # Get response and clean it
-        response = self.chat(session_id, user_message, **kwargs)
-        return self.clean_code_response(response)
+        return user_message
+    
+    def _feedback_message(self, attempt: Dict) -> str:
+        """Delta for a retry: verdict, first failing test and hint of the previous solution"""
+        message = f"Your solution above (attempt {attempt.get('attempt', '?')}) failed.\n"
+        message += f"Verdict: {attempt.get('verdict', 'N/A')}\n"
+        
+        failed = next((t for t in attempt.get('test_results') or []
+                       if not t.get('passed', t.get('verdict') in ('AC', 'OK'))), None)
+        if failed:
+            message += f"\nFailing test {failed.get('test_number', failed.get('index', ''))}:\n"
+            message += f"Input:\n{_clip(failed.get('input'))}\n"
+            message += f"Expected:\n{_clip(failed.get('expected'))}\n"
+            message += f"Got:\n{_clip(failed.get('output'))}\n"
+        if attempt.get('hint'):
+            message += f"\n🔍 DEBUGGING HINT FROM SPECIALIST:\n{attempt['hint']}\n"
+        
+        message += "\nPlease fix the issues and provide the complete improved C++ solution."
+        return message
+
+
+def _clip(text: Optional[str], limit: int = 500) -> str:
+    """Truncate long test data for prompts"""
+    text = str(text or "").strip()
+    return text if len(text) <= limit else text[:limit] + "..."
@@ -0,0 +1,52 @@
+"""
+Token usage reported by providers, normalized
+
+OpenAI chat/Groq report prompt_tokens + prompt_tokens_details.cached_tokens,
+the Responses API input_tokens + input_tokens_details.cached_tokens,
+DeepSeek prompt_cache_hit_tokens and Mistral prompt_tokens only.
+"""
+from typing import Any, Dict, Optional
+
+
+def normalize_usage(usage: Any) -> Optional[Dict[str, int]]:
+    """{input_tokens, cached_tokens, output_tokens} from an SDK usage object or dict (None if absent)"""
+    if usage is None:
+        return None
+    if hasattr(usage, "model_dump"):
+        data = usage.model_dump()
+    elif isinstance(usage, dict):
+        data = usage
+    else:
+        data = vars(usage)
+
+    details = data.get("input_tokens_details") or data.get("prompt_tokens_details") or {}
+    cached = details.get("cached_tokens") if isinstance(details, dict) else None
+    if cached is None:
+        cached = data.get("prompt_cache_hit_tokens")  # DeepSeek context caching
+
+    return {
+        "input_tokens": int(data.get("input_tokens") or data.get("prompt_tokens") or 0),
+        "cached_tokens": int(cached or 0),
+        "output_tokens": int(data.get("output_tokens") or data.get("completion_tokens") or 0),
+    }
+
+
+def add_usage(total: Dict[str, int], usage: Optional[Dict[str, int]]) -> None:
+    """Accumulate one request's normalized usage into total (counts requests without usage too)"""
+    total["requests"] = total.get("requests", 0) + 1
+    if usage is None:
+        return
+    total["reported"] = total.get("reported", 0) + 1
+    for key in ("input_tokens", "cached_tokens", "output_tokens"):
+        total[key] = total.get(key, 0) + usage.get(key, 0)
+    total["cache_hit_rate"] = round(total["cached_tokens"] / total["input_tokens"], 4) if total["input_tokens"] else 0.0
+
+
+def merge_usage(total: Dict[str, int], other: Dict[str, int]) -> None:
+    """Add the totals of another add_usage() accumulation into total"""
+    for key in ("requests", "reported", "input_tokens", "cached_tokens", "output_tokens"):
+        if key in other:
+            total[key] = total.get(key, 0) + other[key]
+    if "input_tokens" in total:
+        cached = total.get("cached_tokens", 0)
+        total["cache_hit_rate"] = round(cached / total["input_tokens"], 4) if total["input_tokens"] else 0.0
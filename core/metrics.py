@@ -0,0 +1,331 @@
+"""
+Metrics Module
+
+Runtime metrics of a solve sweep in Prometheus text format:
+1. Counters, gauges and histograms with labels, kept in a process-wide registry
+2. The solver, WorkflowManager and provider middleware update them as they
+   work (in-flight LLM calls, submission queue depth, attempts, verdicts,
+   tokens, errors, retries); per-stage latency comes from the tracing spans
+3. start_metrics_server() serves GET /metrics from a background thread so a
+   running batch can be scraped (or just curl'ed) while it runs
+"""
+
+import bisect
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core.models import Verdict
+from core.tracing import add_span_listener
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+LabelKey = Tuple[str, ...]
+
+
+class _Metric:
+    """Base for labelled metrics"""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: LabelKey, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{self._labels(key)} {_number(v)}" for key, v in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (or is computed at scrape time by value_fn)"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 value_fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self.value_fn = value_fn
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels) -> Iterator[None]:
+        """+1 while the block runs"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        if self.value_fn is not None:
+            return [f"{self.name} {_number(self.value_fn())}"]
+        with self._lock:
+            return [f"{self.name}{self._labels(key)} {_number(v)}" for key, v in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed values"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, List[float]] = {}  # bucket counts..., +Inf count, sum
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                    cumulative += count
+                    le = 'le="%s"' % ("+Inf" if bound == float("inf") else _number(bound))
+                    lines.append(f"{self.name}_bucket{self._labels(key, le)} {_number(cumulative)}")
+                lines.append(f"{self.name}_sum{self._labels(key)} {_number(series[-1])}")
+                lines.append(f"{self.name}_count{self._labels(key)} {_number(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.setdefault(metric.name, metric)
+            return self._metrics[metric.name]
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              value_fn: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, value_fn))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Every metric in Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _RateWindow:
+    """Events per minute over a sliding window"""
+
+    def __init__(self, window_seconds: float = 300.0):
+        self.window_seconds = window_seconds
+        self._events: deque = deque()
+        self._lock = threading.Lock()
+
+    def mark(self) -> None:
+        with self._lock:
+            self._events.append(time.monotonic())
+
+    def per_minute(self) -> float:
+        now = time.monotonic()
+        with self._lock:
+            while self._events and self._events[0] < now - self.window_seconds:
+                self._events.popleft()
+            return round(len(self._events) * 60.0 / self.window_seconds, 3)
+
+
+REGISTRY = MetricsRegistry()
+_attempt_rate = _RateWindow()
+
+LLM_INFLIGHT = REGISTRY.gauge(
+    "llm_inflight_calls", "LLM requests currently in flight", ("provider", "model", "role"))
+LLM_REQUESTS = REGISTRY.counter(
+    "llm_requests_total", "Completed LLM requests", ("provider", "model", "role"))
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "Provider-reported tokens (kind: input, cached, output)", ("provider", "model", "kind"))
+LLM_ERRORS = REGISTRY.counter(
+    "llm_errors_total", "Failed LLM API calls, including ones that were retried", ("provider", "status"))
+LLM_RETRIES = REGISTRY.counter(
+    "llm_retries_total", "LLM API call retries", ("provider",))
+SUBMISSION_QUEUE = REGISTRY.gauge(
+    "submission_queue_depth", "Solvers waiting for or holding the Codeforces submitter")
+SUBMISSIONS = REGISTRY.counter(
+    "submissions_total", "Codeforces submissions (result: verdict or error)", ("result",))
+ATTEMPTS = REGISTRY.counter(
+    "solver_attempts_total", "Finished solve attempts", ("workflow",))
+ATTEMPTS_PER_MINUTE = REGISTRY.gauge(
+    "solver_attempts_per_minute", "Finished attempts per minute over the last 5 minutes",
+    value_fn=_attempt_rate.per_minute)
+VERDICTS = REGISTRY.counter(
+    "solver_verdicts_total", "Attempt verdicts by core.models.Verdict", ("verdict", "workflow"))
+JOBS_INFLIGHT = REGISTRY.gauge(
+    "solver_jobs_inflight", "Solve loops currently running")
+JOBS = REGISTRY.counter(
+    "solver_jobs_total", "Finished solve loops by final status", ("status",))
+STAGE_SECONDS = REGISTRY.histogram(
+    "solver_stage_seconds", "Latency of each solve stage (trace span)", ("stage",))
+
+
+def verdict_code(verdict: Optional[str]) -> Verdict:
+    """Map a Codeforces/local judge verdict text ("Wrong answer on test 5", "WA", ...) to Verdict"""
+    text = (verdict or "").strip().lower()
+    checks = [
+        (Verdict.AC, ("accepted", "ok")),
+        (Verdict.WA, ("wrong answer", "wa")),
+        (Verdict.TLE, ("time limit", "tle")),
+        (Verdict.MLE, ("memory limit", "mle")),
+        (Verdict.RE, ("runtime error", "re")),
+        (Verdict.CE, ("compilation error", "ce")),
+        (Verdict.PE, ("presentation error", "pe")),
+        (Verdict.SEC, ("security violat", "sec")),
+        (Verdict.IL, ("idleness limit", "il")),
+        (Verdict.JUDGE_TIMEOUT, ("judge timeout", "timeout", "timed out", "in queue", "running")),
+    ]
+    words = text.replace(":", " ").split()
+    for code, needles in checks:
+        for needle in needles:
+            if (" " in needle or len(needle) > 3) and needle in text:
+                return code
+            if needle in words:
+                return code
+    return Verdict.ERROR
+
+
+def record_attempt(workflow: str, verdict: Optional[str]) -> None:
+    """Count one finished attempt and its verdict"""
+    ATTEMPTS.inc(workflow=workflow)
+    VERDICTS.inc(verdict=verdict_code(verdict).value, workflow=workflow)
+    _attempt_rate.mark()
+
+
+def record_usage(provider: str, model: str, role: str, usage: Optional[Dict[str, int]]) -> None:
+    """Count one LLM request and its reported tokens"""
+    LLM_REQUESTS.inc(provider=provider, model=model, role=role)
+    if usage:
+        for kind in ("input", "cached", "output"):
+            LLM_TOKENS.inc(usage.get(f"{kind}_tokens", 0), provider=provider, model=model, kind=kind)
+
+
+def _observe_span(name: str, seconds: float, attrs: Dict[str, Any]) -> None:
+    STAGE_SECONDS.observe(seconds, stage=name)
+
+
+add_span_listener(_observe_span)
+
+
+def create_metrics_app(registry: MetricsRegistry = REGISTRY):
+    """FastAPI app serving GET /metrics"""
+    from fastapi import FastAPI
+    from fastapi.responses import PlainTextResponse
+
+    app = FastAPI(title="Solver metrics")
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics():
+        return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    return app
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0"):
+    """
+    Serve /metrics from a daemon thread
+
+    Args:
+        port: TCP port (0 picks a free one)
+        host: Interface to bind
+
+    Returns:
+        (uvicorn server, base URL)
+    """
+    import uvicorn
+
+    if port == 0:
+        with socket.socket() as s:
+            s.bind((host, 0))
+            port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_metrics_app(), host=host, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True, name="metrics-server").start()
+    deadline = time.time() + 10
+    while not server.started and time.time() < deadline:
+        time.sleep(0.05)
+    url = f"http://{'127.0.0.1' if host == '0.0.0.0' else host}:{port}/metrics"
+    print(f"📈 Metrics: {url}")
+    return server, url
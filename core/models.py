@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 from enum import Enum
 from sqlmodel import SQLModel, Field
@@ -36,6 +36,8 @@ class TestCase(SQLModel, table=True):
     idx: int
     input_text: str
     expected_output_text: str
+    truncated: bool = False  # Codeforces cut the input/answer short ("...")
+    source_submission_id: Optional[str] = None  # submission that revealed a hidden test
 
 class SolveSession(SQLModel, table=True):
     id: str = Field(primary_key=True)
@@ -74,3 +76,25 @@ class ContestMap(SQLModel, table=True):
     letter: str
     cf_contest_id: int
     cf_problem_index: str
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class SolveJob(SQLModel, table=True):
+    id: str = Field(primary_key=True)  # "<problem_id>:<workflow>"
+    problem_id: str = Field(index=True)
+    workflow: str
+    max_attempts: int = 3
+    status: JobStatus = Field(default=JobStatus.PENDING, index=True)
+    claims: int = 0  # times a worker took the job (crashed workers leave it to be reclaimed)
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = Field(default=None, index=True)
+    heartbeat_at: Optional[datetime] = None
+    result_status: Optional[str] = None  # final_status of the solve ("accepted", "failed")
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,490 @@
+"""
+Record / Replay Module
+
+Reruns the solving pipeline without live LLM APIs or a logged-in Chromium:
+1. ReplayStore indexes what earlier runs left behind - problems_solved/<id>/<workflow>/
+   llm_responses/*_RESPONSE.txt, solutions/*.cpp, solving_log.json and
+   api_responses/*.json - plus anything recorded in REPLAY_MODE=record
+2. Replay providers answer chat requests by prompt hash, falling back to
+   (problem, workflow, role, attempt)
+3. ReplaySubmitter answers submissions by (problem, code hash), falling back
+   to (problem, workflow, attempt)
+4. In record mode the live providers/submitter are wrapped and every
+   response/verdict is appended to REPLAY_DIR/*.jsonl
+
+Selected with REPLAY_MODE=off|record|replay (see WorkflowManager._get_provider
+and AutomatedProblemSolver._get_submitter).
+"""
+
+import hashlib
+import json
+import re
+import threading
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.compile_cache import normalize_source
+from core.config import REPLAY_DIR, REPLAY_MODE, REPLAY_SOURCE_DIR
+from core.llm_providers.deepseek_provider import DeepSeekProvider
+from core.llm_providers.middleware import ProviderAPIError
+from core.submission_result import SubmissionResult
+
+# Chat session ids built by WorkflowManager.create_session: <problem>_<workflow>_<hex8>_<role>
+SESSION_RE = re.compile(r"^(?P<problem_id>.+?)_(?P<workflow>[a-z0-9]+_[a-z0-9]+)_[0-9a-f]{8}_(?P<role>solution|hint)$")
+RESPONSE_FILE_RE = re.compile(r"^(?P<role>solution|hint)_(?:after_)?attempt_(?P<attempt>\d+)_RESPONSE\.txt$")
+SOLUTION_FILE_RE = re.compile(r"_Solution_(?P<attempt>\d+)\.cpp$")
+SEPARATOR_RE = re.compile(r"^={20,}\s*$", re.MULTILINE)
+
+LLM_RECORDS = "llm_responses.jsonl"
+SUBMISSION_RECORDS = "submissions.jsonl"
+
+# (session_id, user_message) of the chat request being served on this thread/task
+_current_request: ContextVar[Optional[Tuple[str, str]]] = ContextVar("replay_request", default=None)
+
+
+def workflow_key(name: str) -> str:
+    """Canonical workflow name: WorkflowType values and output folder names differ
+    (gpt_mistral vs gpt4_mistral, gpt5_codestral vs gpt5_mistral)"""
+    name = name.lower().replace("codestral", "mistral")
+    return "gpt4_" + name[len("gpt_"):] if name.startswith("gpt_") else name
+
+
+def prompt_hash(provider_name: str, model_name: str, user_message: str) -> str:
+    """Key of one chat request"""
+    return hashlib.sha256(f"{provider_name}/{model_name}\n{user_message}".encode("utf-8")).hexdigest()
+
+
+def code_hash(source: str) -> str:
+    """Key of one submitted program (generated header and whitespace noise ignored)"""
+    return hashlib.sha256(normalize_source(source).lstrip("\n").encode("utf-8")).hexdigest()
+
+
+def parse_session(session_id: str) -> Dict[str, Optional[str]]:
+    """problem_id / workflow / role of a WorkflowManager chat session (None when it doesn't parse)"""
+    match = SESSION_RE.match(session_id)
+    if not match:
+        return {"problem_id": None, "workflow": None, "role": None}
+    return {"problem_id": match["problem_id"], "workflow": workflow_key(match["workflow"]), "role": match["role"]}
+
+
+def parse_submission(solution_path: str, api_dir: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+    """(workflow, attempt) of a solution saved under problems_solved/<id>/<workflow>/solutions/"""
+    match = SOLUTION_FILE_RE.search(Path(solution_path).name)
+    attempt = int(match["attempt"]) if match else None
+    workflow = workflow_key(Path(api_dir).parent.name) if api_dir else None
+    return workflow, attempt
+
+
+class ReplayMiss(ProviderAPIError):
+    """Nothing recorded for a request"""
+
+    def __init__(self, message: str):
+        super().__init__(message, retryable=False)
+
+
+class _ProblemRecording:
+    """Everything recorded for one problem"""
+
+    def __init__(self):
+        self.responses: Dict[Tuple[str, str, int], str] = {}  # (workflow, role, attempt) -> text
+        self.by_code: Dict[str, Dict[str, Any]] = {}  # code hash -> submission
+        self.by_attempt: Dict[Tuple[str, int], Dict[str, Any]] = {}  # (workflow, attempt) -> submission
+
+
+class ReplayStore:
+    """Recorded LLM responses and submission verdicts"""
+
+    def __init__(self, source_dir: str = REPLAY_SOURCE_DIR, record_dir: str = REPLAY_DIR):
+        self.source_dir = Path(source_dir)
+        self.record_dir = Path(record_dir)
+        self._problems: Dict[str, _ProblemRecording] = {}
+        self._prompts: Dict[str, str] = {}  # prompt hash -> response text
+        self._lock = threading.RLock()
+        self._load_records()
+
+    # ----- lookups -----
+
+    def response(self, prompt_key: Optional[str], problem_id: Optional[str], workflow: Optional[str],
+                 role: Optional[str], attempt: int) -> Optional[str]:
+        """
+        Recorded response for a chat request
+
+        Args:
+            prompt_key: prompt_hash() of the request (exact match wins)
+            problem_id, workflow, role: Parsed chat session (see parse_session)
+            attempt: 1-based request number within the session
+
+        Returns:
+            Response text, or None if nothing usable was recorded
+        """
+        if prompt_key and prompt_key in self._prompts:
+            return self._prompts[prompt_key]
+        if not problem_id or not role:
+            return None
+
+        responses = self._problem(problem_id).responses
+        if (workflow, role, attempt) in responses:
+            return responses[(workflow, role, attempt)]
+        # Same attempt of another workflow, then the workflow's last earlier attempt
+        same_attempt = sorted((key for key in responses if key[1] == role and key[2] == attempt), key=str)
+        if same_attempt:
+            return responses[same_attempt[0]]
+        earlier = sorted((key for key in responses if key[:2] == (workflow, role) and key[2] < attempt),
+                         key=lambda key: key[2])
+        return responses[earlier[-1]] if earlier else None
+
+    def submission(self, problem_id: str, source_hash: str, workflow: Optional[str],
+                   attempt: Optional[int]) -> Optional[Dict[str, Any]]:
+        """Recorded SubmissionResult fields for a program: by code hash, then by workflow/attempt"""
+        recording = self._problem(problem_id)
+        if source_hash in recording.by_code:
+            return recording.by_code[source_hash]
+        if attempt is None:
+            return None
+        if (workflow, attempt) in recording.by_attempt:
+            return recording.by_attempt[(workflow, attempt)]
+        same_attempt = sorted((key for key in recording.by_attempt if key[1] == attempt), key=str)
+        return recording.by_attempt[same_attempt[0]] if same_attempt else None
+
+    # ----- recording -----
+
+    def record_response(self, prompt_key: str, session: Dict[str, Optional[str]], attempt: int,
+                        provider_name: str, model_name: str, response: str) -> None:
+        """Append one live chat response to REPLAY_DIR/llm_responses.jsonl"""
+        entry = {"prompt_hash": prompt_key, **session, "attempt": attempt,
+                 "provider": provider_name, "model": model_name, "response": str(response)}
+        with self._lock:
+            self._add_response(entry)
+            self._append(LLM_RECORDS, entry)
+
+    def record_submission(self, problem_id: str, source_hash: str, workflow: Optional[str],
+                          attempt: Optional[int], result: SubmissionResult) -> None:
+        """Append one live verdict to REPLAY_DIR/submissions.jsonl"""
+        entry = {"problem_id": problem_id, "code_hash": source_hash, "workflow": workflow,
+                 "attempt": attempt, "result": result.to_dict()}
+        with self._lock:
+            self._add_submission(entry)
+            self._append(SUBMISSION_RECORDS, entry)
+
+    def _append(self, file_name: str, entry: Dict[str, Any]) -> None:
+        self.record_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.record_dir / file_name, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    # ----- indexing -----
+
+    def _load_records(self) -> None:
+        """Index earlier record-mode runs (they take precedence over problems_solved/)"""
+        for entry in _read_jsonl(self.record_dir / LLM_RECORDS):
+            self._add_response(entry)
+        for entry in _read_jsonl(self.record_dir / SUBMISSION_RECORDS):
+            self._add_submission(entry)
+
+    def _add_response(self, entry: Dict[str, Any]) -> None:
+        self._prompts[entry["prompt_hash"]] = entry["response"]
+        if entry.get("problem_id") and entry.get("role"):
+            key = (entry.get("workflow"), entry["role"], int(entry["attempt"]))
+            self._problem(entry["problem_id"]).responses[key] = entry["response"]
+
+    def _add_submission(self, entry: Dict[str, Any]) -> None:
+        recording = self._problem(entry["problem_id"])
+        recording.by_code[entry["code_hash"]] = entry["result"]
+        if entry.get("attempt") is not None:
+            recording.by_attempt[(entry.get("workflow"), int(entry["attempt"]))] = entry["result"]
+
+    def _problem(self, problem_id: str) -> _ProblemRecording:
+        """Recording of a problem, scanning problems_solved/<id>/ on first use"""
+        with self._lock:
+            recording = self._problems.get(problem_id)
+            if recording is None:
+                recording = self._problems[problem_id] = _ProblemRecording()
+                for workflow_dir in sorted((self.source_dir / problem_id).glob("*/")):
+                    _scan_workflow_dir(workflow_dir, recording)
+            return recording
+
+    def stats(self) -> Dict[str, int]:
+        """Sizes of what has been indexed so far"""
+        with self._lock:
+            return {
+                "problems": len(self._problems),
+                "responses": sum(len(r.responses) for r in self._problems.values()),
+                "submissions": sum(len(r.by_attempt) for r in self._problems.values()),
+                "recorded_prompts": len(self._prompts),
+            }
+
+
+def _scan_workflow_dir(workflow_dir: Path, recording: _ProblemRecording) -> None:
+    """Add one problems_solved/<id>/<workflow>/ run to a problem's recording (recorded entries win)"""
+    workflow = workflow_key(workflow_dir.name)
+
+    for path in (workflow_dir / "llm_responses").glob("*_RESPONSE.txt"):
+        match = RESPONSE_FILE_RE.match(path.name)
+        if match:
+            key = (workflow, match["role"], int(match["attempt"]))
+            recording.responses.setdefault(key, _response_body(path.read_text(encoding="utf-8", errors="replace")))
+
+    try:
+        solving_log = json.loads((workflow_dir / "solving_log.json").read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return
+
+    api_files = {}
+    for path in (workflow_dir / "api_responses").glob("submission_*.json"):
+        api_files.setdefault(path.name.split("_")[1], path)
+
+    for attempt in solving_log.get("attempts", []):
+        try:
+            number = int(attempt.get("attempt"))
+        except (TypeError, ValueError):
+            continue
+        verdict = attempt.get("verdict")
+        if not verdict:
+            continue
+        submission_id = attempt.get("submission_id")
+        api_file = api_files.get(str(submission_id))
+        api_response = None
+        if api_file is not None:
+            try:
+                api_response = json.loads(api_file.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                api_response = None
+        result = {
+            "submission_id": str(submission_id) if submission_id else None,
+            "verdict": verdict,
+            # Older logs store booleans as strings
+            "accepted": str(attempt.get("accepted")).lower() == "true" or verdict == "Accepted",
+            "api_response": api_response,
+            "api_response_file": str(api_file) if api_file else None,
+        }
+        recording.by_attempt.setdefault((workflow, number), result)
+
+        solution_file = attempt.get("solution_file")
+        solution_path = workflow_dir / "solutions" / solution_file if solution_file else None
+        if solution_path is not None and solution_path.exists():
+            source_hash = code_hash(solution_path.read_text(encoding="utf-8", errors="replace"))
+            recording.by_code.setdefault(source_hash, result)
+
+
+def _response_body(text: str) -> str:
+    """Strip the metadata header _save_llm_response writes above the raw response"""
+    match = SEPARATOR_RE.search(text)
+    return text[match.end():].strip() if match else text.strip()
+
+
+def _read_jsonl(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return entries
+
+
+_store: Optional[ReplayStore] = None
+_store_lock = threading.Lock()
+
+
+def get_replay_store() -> ReplayStore:
+    """Process-wide store (indexes are shared by every provider and submitter)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ReplayStore()
+        return _store
+
+
+# ----- providers -----
+
+class _OfflineClient:
+    """Stands in for the SDK client of a replay provider; any use is a bug"""
+
+    def __getattr__(self, name: str):
+        raise ReplayMiss(f"Replay provider tried to use the live API client ({name})")
+
+
+class _RequestTracking:
+    """Remembers which session/message the current chat request belongs to"""
+
+    store: ReplayStore
+    provider_label: str
+
+    def _track(self, session_id: str, user_message: str) -> Any:
+        turns = self._replay_turns
+        turns[session_id] = turns.get(session_id, 0) + 1
+        return _current_request.set((session_id, user_message))
+
+    def _request_key(self) -> Tuple[str, Dict[str, Optional[str]], int]:
+        session_id, user_message = _current_request.get() or ("", "")
+        key = prompt_hash(self.provider_label, self.model_name, user_message)
+        return key, parse_session(session_id), self._replay_turns.get(session_id, 0)
+
+    def chat(self, session_id: str, user_message: str, **kwargs) -> str:
+        token = self._track(session_id, user_message)
+        try:
+            return self._recorded(super().chat(session_id, user_message, **kwargs))
+        finally:
+            _current_request.reset(token)
+
+    async def achat(self, session_id: str, user_message: str, **kwargs) -> str:
+        token = self._track(session_id, user_message)
+        try:
+            return self._recorded(await super().achat(session_id, user_message, **kwargs))
+        finally:
+            _current_request.reset(token)
+
+    def chat_stream(self, session_id: str, user_message: str, stop_when=None, **kwargs) -> str:
+        token = self._track(session_id, user_message)
+        try:
+            return self._recorded(super().chat_stream(session_id, user_message, stop_when=stop_when, **kwargs))
+        finally:
+            _current_request.reset(token)
+
+    async def achat_stream(self, session_id: str, user_message: str, stop_when=None, **kwargs) -> str:
+        token = self._track(session_id, user_message)
+        try:
+            return self._recorded(await super().achat_stream(session_id, user_message, stop_when=stop_when, **kwargs))
+        finally:
+            _current_request.reset(token)
+
+    def _recorded(self, response: str) -> str:
+        return response
+
+
+class _ReplayProvider(_RequestTracking):
+    """Serves recorded responses instead of calling the API"""
+
+    def __init__(self, model_name: str, client: Optional[Any] = None, store: Optional[ReplayStore] = None):
+        super().__init__(api_key="replay", model_name=model_name, client=client or _OfflineClient())
+        self.store = store or get_replay_store()
+        self._replay_turns: Dict[str, int] = {}
+
+    def _make_api_call(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        key, session, attempt = self._request_key()
+        response = self.store.response(key, session["problem_id"], session["workflow"], session["role"], attempt)
+        if response is None:
+            raise ReplayMiss(f"No recorded {self.provider_label}/{self.model_name} response for "
+                             f"{session['problem_id']} {session['role']} #{attempt}")
+        if isinstance(self, DeepSeekProvider):
+            return response, response  # (combined, final answer)
+        return response
+
+    async def _amake_api_call(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        return self._make_api_call(messages, **kwargs)
+
+    def _open_stream(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        return None
+
+    async def _aopen_stream(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        return None
+
+
+class _RecordingProvider(_RequestTracking):
+    """Live provider that appends every response to the replay store"""
+
+    def __init__(self, model_name: str, client: Optional[Any] = None, store: Optional[ReplayStore] = None):
+        super().__init__(model_name=model_name, client=client)
+        self.store = store or get_replay_store()
+        self._replay_turns: Dict[str, int] = {}
+
+    def _recorded(self, response: str) -> str:
+        key, session, attempt = self._request_key()
+        self.store.record_response(key, session, attempt, self.provider_label, self.model_name, response)
+        return response
+
+
+_provider_classes: Dict[Tuple[type, str], type] = {}
+
+
+def replay_provider_class(provider_class: type, mode: str = REPLAY_MODE) -> type:
+    """Replay ("replay") or recording ("record") subclass of a provider class"""
+    mixin = _ReplayProvider if mode == "replay" else _RecordingProvider
+    key = (provider_class, mode)
+    if key not in _provider_classes:
+        label = provider_class.__name__.replace("Provider", "").lower()
+        _provider_classes[key] = type(
+            f"{mode.capitalize()}{provider_class.__name__}", (mixin, provider_class),
+            # provider_name is derived from the class name; keep the wrapped provider's
+            {"provider_label": label, "__init__": _named_init(mixin.__init__, label)}
+        )
+    return _provider_classes[key]
+
+
+def _named_init(init: Callable, label: str) -> Callable:
+    def __init__(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        self.provider_name = label
+    return __init__
+
+
+# ----- submitters -----
+
+class ReplaySubmitter:
+    """Drop-in for ChromiumSubmitter that returns recorded verdicts"""
+
+    def __init__(self, store: Optional[ReplayStore] = None):
+        self.store = store or get_replay_store()
+
+    def submit(self, solution_file: str, contest_id: int, problem_letter: str,
+               api_dir: Optional[str] = None, **kwargs) -> SubmissionResult:
+        problem_id = f"{contest_id}_{problem_letter}"
+        try:
+            source = Path(solution_file).read_text(encoding="utf-8")
+        except OSError:
+            return SubmissionResult(error=f"Solution file not found: {solution_file}")
+        workflow, attempt = parse_submission(solution_file, api_dir)
+
+        recorded = self.store.submission(problem_id, code_hash(source), workflow, attempt)
+        if recorded is None:
+            return SubmissionResult(error=f"Replay: no recorded submission for {problem_id} attempt {attempt}")
+        return SubmissionResult.from_dict({**recorded, "extra": {"replayed": True}})
+
+    def close(self):
+        pass
+
+
+class RecordingSubmitter:
+    """Live submitter that appends every verdict to the replay store"""
+
+    def __init__(self, submitter: Any, store: Optional[ReplayStore] = None):
+        self.submitter = submitter
+        self.store = store or get_replay_store()
+
+    def submit(self, solution_file: str, contest_id: int, problem_letter: str,
+               api_dir: Optional[str] = None, **kwargs) -> SubmissionResult:
+        result = self.submitter.submit(solution_file, contest_id, problem_letter, api_dir=api_dir, **kwargs)
+        if not result.error and result.verdict:
+            workflow, attempt = parse_submission(solution_file, api_dir)
+            source = Path(solution_file).read_text(encoding="utf-8")
+            self.store.record_submission(f"{contest_id}_{problem_letter}", code_hash(source), workflow, attempt, result)
+        return result
+
+    def close(self):
+        self.submitter.close()
+
+
+def create_submitter(live_factory: Callable[[], Any]) -> Any:
+    """Submitter for the configured REPLAY_MODE; live_factory builds the real one"""
+    if REPLAY_MODE == "replay":
+        return ReplaySubmitter()
+    if REPLAY_MODE == "record":
+        return RecordingSubmitter(live_factory())
+    return live_factory()
+
+
+def resume_by_default() -> bool:
+    """Replay runs are regression runs: they start every job over instead of resuming earlier results"""
+    return REPLAY_MODE != "replay"
+
+
+def replay_output_dir(base_dir: str) -> str:
+    """Keep replay runs from overwriting the recordings they are reading"""
+    if REPLAY_MODE == "replay" and Path(base_dir).resolve() == Path(REPLAY_SOURCE_DIR).resolve():
+        output_dir = str(Path(REPLAY_DIR) / "runs")
+        print(f"🔁 Replay mode: writing results to {output_dir} instead of {base_dir}")
+        return output_dir
+    return base_dir
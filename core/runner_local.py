@@ -0,0 +1,288 @@
+"""
+Local Runner Module
+
+Compiles a C++ solution with Codeforces-like flags and runs it against the
+sample tests before anything is sent to Codeforces:
+1. Compile with g++ (-std=gnu++17 -O2 -DONLINE_JUDGE)
+2. Run every test (samples plus harvested hidden tests) in its own process under CPU-time and memory rlimits,
+   several tests at once
+3. Compare outputs token by token (with a small tolerance for floats, and
+   ignoring case when the statement accepts answers "in any case")
+
+This is NOT a sandbox - it only catches CE/RE/WA early so a Codeforces
+submission isn't spent on code that fails the samples.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from core.compile_cache import CompileCache
+from core.config import COMPILE_CACHE_ENABLED, LOCAL_JUDGE_MEMORY_MB, LOCAL_JUDGE_TIME_LIMIT_SEC, LOCAL_JUDGE_WORKERS
+from core.tracing import span
+
+# Close to the GNU G++17 (CF_DEFAULT_LANG_ID=54) command line Codeforces uses
+CF_CPP_FLAGS = ["-std=gnu++17", "-O2", "-DONLINE_JUDGE", "-pipe"]
+
+# Verdicts that mean the code is certainly broken, so a submission would be wasted
+BLOCKING_VERDICTS = ("CE", "RE", "WA")
+
+VERDICT_NAMES = {
+    "CE": "Compilation error",
+    "RE": "Runtime error",
+    "WA": "Wrong answer",
+    "TLE": "Time limit exceeded",
+    "MLE": "Memory limit exceeded",
+}
+
+# Statements with several correct outputs can't be checked by plain comparison
+MULTIPLE_ANSWERS_RE = re.compile(
+    r"(print|output) any|any of them|multiple (possible |valid |correct )?(answers|solutions)|"
+    r"any (valid|correct|suitable|such) (answer|solution|one)",
+    re.IGNORECASE
+)
+
+# Statements that accept YES/yes/Yes alike
+ANY_CASE_RE = re.compile(r"in any (case|register)|any register|case[- ]insensitive", re.IGNORECASE)
+
+
+@dataclass
+class LocalTestResult:
+    """Result of running one test locally"""
+    index: int
+    verdict: str  # AC, WA, RE, TLE, MLE
+    time_ms: int
+    input: str
+    expected: str
+    output: str
+    stderr: str = ""
+    exit_code: Optional[int] = None
+    kind: str = "sample"  # sample or hidden
+    case_mismatch: bool = False  # WA where the output differs from the expected one only in letter case
+
+
+@dataclass
+class LocalJudgeResult:
+    """Outcome of compiling and running a solution on the local tests"""
+    verdict: str  # AC, CE, RE, WA, TLE, MLE or SKIPPED
+    compile_output: str = ""
+    compile_seconds: float = 0.0
+    compile_cache_hit: bool = False
+    run_seconds: float = 0.0
+    tests: List[LocalTestResult] = field(default_factory=list)
+    inconclusive: bool = False  # WA on a problem that accepts several answers, or only in letter case
+    skip_reason: Optional[str] = None
+
+    @property
+    def failed_test(self) -> Optional[LocalTestResult]:
+        return next((t for t in self.tests if t.verdict != "AC"), None)
+
+    @property
+    def blocks_submission(self) -> bool:
+        """True when the Codeforces submission can be skipped"""
+        return self.verdict in BLOCKING_VERDICTS and not self.inconclusive
+
+    def describe(self) -> str:
+        """Codeforces-style verdict text, e.g. "Wrong answer on sample test 2 (local judge)" """
+        if self.verdict in ("AC", "SKIPPED"):
+            return "Passed local tests" if self.verdict == "AC" else "Local judge skipped"
+        name = VERDICT_NAMES.get(self.verdict, self.verdict)
+        failed = self.failed_test
+        if failed is None:
+            return f"{name} (local judge)"
+        return f"{name} on {failed.kind} test {failed.index} (local judge)"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["description"] = self.describe()
+        return data
+
+
+def outputs_match(expected: str, actual: str, float_eps: float = 1e-6, ignore_case: bool = False) -> bool:
+    """Whitespace-insensitive token comparison; floats compare with absolute/relative tolerance"""
+    if ignore_case:
+        expected, actual = expected.lower(), actual.lower()
+    expected_tokens = expected.split()
+    actual_tokens = actual.split()
+    if len(expected_tokens) != len(actual_tokens):
+        return False
+
+    for exp, act in zip(expected_tokens, actual_tokens):
+        if exp == act:
+            continue
+        if "." not in exp:
+            return False
+        try:
+            e, a = float(exp), float(act)
+        except ValueError:
+            return False
+        if abs(e - a) > float_eps * max(1.0, abs(e)):
+            return False
+    return True
+
+
+def allows_multiple_answers(text: str) -> bool:
+    """Heuristic: does the statement say any of several outputs is accepted?"""
+    return bool(MULTIPLE_ANSWERS_RE.search(text or ""))
+
+
+def output_ignores_case(text: str) -> bool:
+    """Heuristic: does the statement accept the answer in any letter case?"""
+    return bool(ANY_CASE_RE.search(text or ""))
+
+
+class LocalJudge:
+    """Compile-and-run judge for sample (and known hidden) tests"""
+
+    def __init__(self, time_limit_sec: float = LOCAL_JUDGE_TIME_LIMIT_SEC,
+                 memory_limit_mb: int = LOCAL_JUDGE_MEMORY_MB, max_workers: int = LOCAL_JUDGE_WORKERS,
+                 compiler: str = "g++", flags: Sequence[str] = CF_CPP_FLAGS,
+                 compile_cache: Optional[CompileCache] = None):
+        self.time_limit_sec = time_limit_sec
+        self.memory_limit_mb = memory_limit_mb
+        self.max_workers = max(1, max_workers)
+        self.compiler = compiler
+        self.flags = list(flags)
+        if compile_cache is None and COMPILE_CACHE_ENABLED and self.available():
+            compile_cache = CompileCache(compiler=compiler)
+        self.compile_cache = compile_cache
+
+    def available(self) -> bool:
+        """True when the compiler can be found"""
+        return shutil.which(self.compiler) is not None
+
+    def judge(self, source: str, tests: Sequence[Tuple[str, ...]], allow_multiple_answers: bool = False,
+              ignore_case: bool = False) -> LocalJudgeResult:
+        """
+        Compile source and run it on every (input, expected_output) test
+
+        Args:
+            source: C++ source code
+            tests: (input_text, expected_output_text) pairs, optionally with a
+                   third "sample"/"hidden" element
+            allow_multiple_answers: Report WA as inconclusive (several outputs may be correct)
+            ignore_case: Compare outputs case-insensitively (the statement accepts any case);
+                         otherwise a WA that differs only in case is reported as inconclusive
+
+        Returns:
+            LocalJudgeResult; verdict is the first failing test's verdict, or AC
+        """
+        if not self.available():
+            return LocalJudgeResult(verdict="SKIPPED", skip_reason=f"{self.compiler} not found")
+
+        with tempfile.TemporaryDirectory(prefix="local_judge_") as workdir:
+            compile_start = time.time()
+            with span("compile") as attrs:
+                ok, compile_output, binary, cache_hit = self.compile(source, workdir)
+                attrs["cache_hit"] = cache_hit
+            compile_seconds = time.time() - compile_start
+            if not ok:
+                return LocalJudgeResult(verdict="CE", compile_output=compile_output, compile_seconds=compile_seconds,
+                                        compile_cache_hit=cache_hit)
+
+            run_start = time.time()
+            with span("run_tests", tests=len(tests)), \
+                    ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(tests)))) as executor:
+                results = list(executor.map(
+                    lambda item: self.run_test(binary, item[0], *item[1], ignore_case=ignore_case),
+                    enumerate(tests, 1)
+                ))
+            run_seconds = time.time() - run_start
+
+        failed = next((r for r in results if r.verdict != "AC"), None)
+        return LocalJudgeResult(
+            verdict=failed.verdict if failed else "AC",
+            compile_output=compile_output,
+            compile_seconds=compile_seconds,
+            compile_cache_hit=cache_hit,
+            run_seconds=run_seconds,
+            tests=results,
+            inconclusive=bool(failed and failed.verdict == "WA" and (allow_multiple_answers or failed.case_mismatch))
+        )
+
+    def compile(self, source: str, workdir: str) -> Tuple[bool, str, Optional[str], bool]:
+        """Compile source in workdir; returns (ok, compiler output, binary path, cache hit)"""
+        src = os.path.join(workdir, "main.cpp")
+        binary = os.path.join(workdir, "main")
+        
+        if self.compile_cache is not None:
+            ok, output, hit = self.compile_cache.compile(source, self.flags, binary)
+            return ok, output, (binary if ok else None), hit
+        
+        with open(src, "w", encoding="utf-8") as f:
+            f.write(source)
+
+        try:
+            p = subprocess.run(
+                [self.compiler, *self.flags, src, "-o", binary],
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, timeout=120
+            )
+        except subprocess.TimeoutExpired:
+            return False, "Compilation timed out", None, False
+
+        ok = p.returncode == 0
+        return ok, p.stdout, (binary if ok else None), False
+
+    def run_test(self, binary: str, index: int, input_text: str, expected_output: str,
+                 kind: str = "sample", ignore_case: bool = False) -> LocalTestResult:
+        """Run binary on one test under the time and memory limits"""
+        start = time.time()
+        try:
+            p = subprocess.run(
+                self._limited_command(binary), input=input_text, text=True,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                # CPU time is capped by RLIMIT_CPU; the wall timeout catches sleeping/blocked programs
+                timeout=self.time_limit_sec * 2 + 1
+            )
+        except subprocess.TimeoutExpired as e:
+            return LocalTestResult(index, "TLE", int((time.time() - start) * 1000), input_text,
+                                   expected_output, _as_text(e.stdout), _as_text(e.stderr), kind=kind)
+
+        time_ms = int((time.time() - start) * 1000)
+        stderr = p.stderr[-4000:]
+        case_mismatch = False
+
+        if p.returncode != 0:
+            if p.returncode in (-24, -9) or time_ms > self.time_limit_sec * 1000:
+                verdict = "TLE"  # SIGXCPU / SIGKILL from RLIMIT_CPU
+            elif "bad_alloc" in stderr:
+                verdict = "MLE"
+            else:
+                verdict = "RE"
+        elif time_ms > self.time_limit_sec * 1000:
+            verdict = "TLE"
+        else:
+            verdict = "AC" if outputs_match(expected_output, p.stdout, ignore_case=ignore_case) else "WA"
+            # The statement may allow any case without saying so in words we recognise
+            case_mismatch = verdict == "WA" and not ignore_case and outputs_match(expected_output, p.stdout,
+                                                                                  ignore_case=True)
+
+        return LocalTestResult(index, verdict, time_ms, input_text, expected_output,
+                               p.stdout[-4000:], stderr, p.returncode, kind, case_mismatch)
+
+    def _limited_command(self, binary: str) -> List[str]:
+        """Wrap binary in a shell that applies rlimits before exec.
+
+        ulimit in a child shell is used instead of preexec_fn, which is not
+        safe when solvers run in many threads. A limit the platform refuses
+        (e.g. -v on macOS) is skipped.
+        """
+        if os.name != "posix":
+            return [binary]
+        memory_kb = self.memory_limit_mb * 1024
+        cpu_seconds = int(self.time_limit_sec) + 1
+        script = (f"ulimit -t {cpu_seconds} 2>/dev/null; ulimit -v {memory_kb} 2>/dev/null; "
+                  f"ulimit -s {memory_kb} 2>/dev/null; exec \"$0\"")
+        return ["/bin/sh", "-c", script, binary]
+
+
+def _as_text(value) -> str:
+    if value is None:
+        return ""
+    return value.decode(errors="replace") if isinstance(value, bytes) else value
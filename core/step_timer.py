@@ -0,0 +1,97 @@
+"""
+Step Timer Module
+
+Latency budgets for the steps of a browser submission (problem page, submit
+link, paste, submit click, submission row, verdict, details):
+1. Each step's budget doubles as the timeout of the condition it waits on
+   (editor ready, submission row present, facebox populated, ...)
+2. Steps are timed, traced as "submit.<step>" spans and flagged when they
+   ran over budget
+3. report() is attached to the SubmissionResult so slow steps show up per
+   submission
+
+Budgets default to DEFAULT_BUDGETS; SUBMIT_STEP_BUDGETS overrides them with
+JSON, e.g. {"verdict": 300, "submission_row": 20}.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from core.config import SUBMIT_STEP_BUDGETS
+from core.tracing import record_span
+
+# Seconds per step
+DEFAULT_BUDGETS = {
+    "problem_page": 15.0,  # navigation to the problem, DOM ready
+    "submit_link": 10.0,  # click the Submit link, editor ready
+    "paste_code": 5.0,
+    "submit_click": 10.0,  # click submit, redirected to the status page
+    "submission_row": 10.0,  # our submission's row is on the status page
+    "verdict": 120.0,
+    "details_click": 10.0,  # click the submission id, facebox populated
+    "details_api": 3.0,  # submitSource response after the click
+}
+
+
+def _configured_budgets() -> Dict[str, float]:
+    if not SUBMIT_STEP_BUDGETS:
+        return {}
+    try:
+        return {step: float(seconds) for step, seconds in json.loads(SUBMIT_STEP_BUDGETS).items()}
+    except (ValueError, AttributeError) as e:
+        print(f"⚠️  Ignoring invalid SUBMIT_STEP_BUDGETS: {e}")
+        return {}
+
+
+class StepTimer:
+    """Times the steps of one submission against their budgets"""
+
+    def __init__(self, budgets: Optional[Dict[str, float]] = None):
+        self.budgets = {**DEFAULT_BUDGETS, **_configured_budgets(), **(budgets or {})}
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.started_at = time.time()
+
+    def budget(self, step: str) -> float:
+        """Budget of a step in seconds"""
+        return self.budgets.get(step, 10.0)
+
+    def budget_ms(self, step: str) -> int:
+        """Budget of a step in milliseconds (for Playwright timeouts)"""
+        return int(self.budget(step) * 1000)
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[float]:
+        """
+        Time a step; yields its budget in seconds
+
+        A step entered more than once (e.g. a retried navigation) accumulates its time.
+        """
+        start = time.time()
+        try:
+            yield self.budget(name)
+        finally:
+            end = time.time()
+            entry = self.steps.setdefault(name, {"seconds": 0.0, "budget_seconds": self.budget(name), "runs": 0})
+            entry["seconds"] = round(entry["seconds"] + end - start, 3)
+            entry["runs"] += 1
+            entry["over_budget"] = entry["seconds"] > entry["budget_seconds"]
+            record_span(f"submit.{name}", start, end, budget_seconds=entry["budget_seconds"])
+            if end - start > self.budget(name):
+                print(f"🐢 Step {name} took {end - start:.1f}s (budget {self.budget(name):g}s)")
+
+    def report(self) -> Dict[str, Any]:
+        """Seconds per step with budgets, the slowest step and the steps that ran over budget"""
+        slowest = max(self.steps, key=lambda name: self.steps[name]["seconds"], default=None)
+        return {
+            "total_seconds": round(time.time() - self.started_at, 3),
+            "steps": {name: dict(entry) for name, entry in self.steps.items()},
+            "slowest_step": slowest,
+            "over_budget": [name for name, entry in self.steps.items() if entry["over_budget"]],
+        }
+
+    def summary(self) -> str:
+        """One line: seconds per step in the order they ran"""
+        return ", ".join(f"{name} {entry['seconds']:.1f}s" + (" ⚠️" if entry["over_budget"] else "")
+                         for name, entry in self.steps.items())
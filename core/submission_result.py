@@ -0,0 +1,59 @@
+"""
+Submission Result
+
+Typed result returned by the Codeforces submitters, plus the JSON-lines
+event channel used when the submitter runs as a subprocess.
+"""
+
+import json
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+
+@dataclass
+class SubmissionResult:
+    """Outcome of one Codeforces submission"""
+    submission_id: Optional[str] = None
+    verdict: Optional[str] = None
+    accepted: bool = False
+    api_response: Optional[Dict[str, Any]] = None  # parsed_api_response, facebox test_results, ...
+    api_response_file: Optional[str] = None  # where api_response was saved
+    error: Optional[str] = None
+    queue_seconds: Optional[float] = None  # submitted -> judging started
+    judging_seconds: Optional[float] = None  # judging started -> final verdict
+    spacing_wait_seconds: Optional[float] = None  # waited for the account's next submission slot
+    timing: Optional[Dict[str, Any]] = None  # seconds per submit step against its budget (StepTimer.report())
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def test_results(self) -> List[Dict]:
+        """Facebox test results, if they were collected"""
+        if not self.api_response:
+            return []
+        return self.api_response.get("test_results", [])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SubmissionResult":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+def write_event(stream: TextIO, event: str, **payload) -> None:
+    """Write one JSON-lines event to the result channel"""
+    stream.write(json.dumps({"event": event, **payload}, ensure_ascii=False) + "\n")
+    stream.flush()
+
+
+def read_events(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    """Yield JSON-lines events from the result channel, skipping malformed lines"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue
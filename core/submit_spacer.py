@@ -0,0 +1,208 @@
+"""
+Submit Spacer Module
+
+Keeps a Codeforces account at its safe submission rate across every process
+that submits with it (batch runs, queue workers, run_solver_*.py scripts and
+the standalone submitter):
+1. Each submission waits in a small SQLite file (SUBMIT_SPACER_DB) shared by
+   all processes on the box - or boxes, if the file is on a shared filesystem
+2. A token bucket per account refills one token every CF_SUBMIT_SPACING_SEC,
+   holding at most CF_SUBMIT_BURST
+3. The next token goes to the waiter whose workflow was served least
+   recently (first come first served within a workflow), so a busy workflow
+   can't starve the others
+4. Waiters of a crashed process stop polling and are dropped after STALE_WAITER_SEC
+
+Every decision is a BEGIN IMMEDIATE transaction. Wait times are returned,
+printed, traced as "submit_spacing" spans and kept for stats().
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from core.config import CF_SUBMIT_BURST, CF_SUBMIT_SPACING_SEC, CF_USERNAME, REPLAY_MODE, SUBMIT_SPACER_DB
+from core.tracing import record_span
+
+# Waiters re-check at least this often (and so count as alive)
+MAX_POLL_SEC = 2.0
+# Waiters not seen for this long belong to a dead process
+STALE_WAITER_SEC = 30.0
+# Grants kept for stats()
+GRANT_HISTORY = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bucket (
+    account TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS waiter (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL,
+    workflow TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    seen_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS served (
+    account TEXT NOT NULL,
+    workflow TEXT NOT NULL,
+    served_at REAL NOT NULL,
+    PRIMARY KEY (account, workflow)
+);
+CREATE TABLE IF NOT EXISTS grant_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL,
+    workflow TEXT NOT NULL,
+    granted_at REAL NOT NULL,
+    waited REAL NOT NULL
+);
+"""
+
+
+class SubmitSpacer:
+    """Cross-process token bucket with a fair waiting queue, one per account"""
+
+    def __init__(self, path: str = SUBMIT_SPACER_DB, spacing_seconds: float = CF_SUBMIT_SPACING_SEC,
+                 burst: int = CF_SUBMIT_BURST, account: Optional[str] = None):
+        self.path = Path(path)
+        self.spacing_seconds = spacing_seconds
+        self.burst = max(1, burst)
+        self.account = account or CF_USERNAME or "default"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit; transactions are opened explicitly with BEGIN IMMEDIATE
+        return sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Transaction holding the spacer file's write lock from the start"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def acquire(self, workflow: str = "default") -> float:
+        """
+        Block until this account may submit again
+
+        Args:
+            workflow: Fairness group of the submission (the solver's workflow)
+
+        Returns:
+            Seconds spent waiting
+        """
+        start = time.time()
+        with self._write() as conn:
+            waiter_id = conn.execute(
+                "INSERT INTO waiter (account, workflow, enqueued_at, seen_at) VALUES (?, ?, ?, ?)",
+                (self.account, workflow, start, start)
+            ).lastrowid
+
+        try:
+            while True:
+                delay = self._try_take(waiter_id, workflow, start)
+                if delay is None:
+                    break
+                time.sleep(min(delay, MAX_POLL_SEC))
+        except BaseException:
+            with self._write() as conn:
+                conn.execute("DELETE FROM waiter WHERE id = ?", (waiter_id,))
+            raise
+
+        waited = time.time() - start
+        record_span("submit_spacing", start, workflow=workflow, account=self.account)
+        if waited >= 1:
+            print(f"⏳ Waited {waited:.1f}s for a submission slot ({self.account}, every {self.spacing_seconds:g}s)")
+        return waited
+
+    def _try_take(self, waiter_id: int, workflow: str, start: float) -> Optional[float]:
+        """Take a token if it's this waiter's turn; otherwise seconds until it is worth checking again"""
+        with self._write() as conn:
+            now = time.time()
+            conn.execute("UPDATE waiter SET seen_at = ? WHERE id = ?", (now, waiter_id))
+            conn.execute("DELETE FROM waiter WHERE account = ? AND seen_at < ?", (self.account, now - STALE_WAITER_SEC))
+
+            row = conn.execute("SELECT tokens, updated_at FROM bucket WHERE account = ?", (self.account,)).fetchone()
+            tokens = float(self.burst) if row is None else \
+                min(self.burst, row[0] + (now - row[1]) / self.spacing_seconds)
+            head = conn.execute(
+                "SELECT w.id FROM waiter w LEFT JOIN served s ON s.account = w.account AND s.workflow = w.workflow "
+                "WHERE w.account = ? ORDER BY COALESCE(s.served_at, 0), w.id LIMIT 1",
+                (self.account,)
+            ).fetchone()
+            until_token = max(0.0, (1 - tokens) * self.spacing_seconds)
+
+            if head is None or head[0] != waiter_id:
+                return max(until_token, 0.2)
+            if tokens < 1:
+                return max(until_token, 0.01)
+
+            conn.execute("INSERT OR REPLACE INTO bucket (account, tokens, updated_at) VALUES (?, ?, ?)",
+                         (self.account, tokens - 1, now))
+            conn.execute("DELETE FROM waiter WHERE id = ?", (waiter_id,))
+            conn.execute("INSERT OR REPLACE INTO served (account, workflow, served_at) VALUES (?, ?, ?)",
+                         (self.account, workflow, now))
+            conn.execute("INSERT INTO grant_log (account, workflow, granted_at, waited) VALUES (?, ?, ?, ?)",
+                         (self.account, workflow, now, now - start))
+            conn.execute("DELETE FROM grant_log WHERE id <= (SELECT MAX(id) FROM grant_log) - ?", (GRANT_HISTORY,))
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Waiting submissions and recent wait times per workflow for this account"""
+        conn = self._connect()
+        try:
+            waiting = conn.execute("SELECT COUNT(*) FROM waiter WHERE account = ?", (self.account,)).fetchone()[0]
+            per_workflow = {
+                workflow: {"grants": grants, "avg_wait_seconds": round(avg, 3), "max_wait_seconds": round(max_, 3)}
+                for workflow, grants, avg, max_ in conn.execute(
+                    "SELECT workflow, COUNT(*), AVG(waited), MAX(waited) FROM grant_log "
+                    "WHERE account = ? GROUP BY workflow ORDER BY workflow", (self.account,)
+                )
+            }
+        finally:
+            conn.close()
+        return {
+            "account": self.account,
+            "spacing_seconds": self.spacing_seconds,
+            "burst": self.burst,
+            "waiting": waiting,
+            "per_workflow": per_workflow,
+        }
+
+
+_spacer: Optional[SubmitSpacer] = None
+_spacer_lock = threading.Lock()
+
+
+def get_submit_spacer() -> Optional[SubmitSpacer]:
+    """Process-wide spacer for the configured account (None when nothing is really submitted)"""
+    global _spacer
+    if REPLAY_MODE == "replay" or CF_SUBMIT_SPACING_SEC <= 0:
+        return None
+    with _spacer_lock:
+        if _spacer is None:
+            _spacer = SubmitSpacer()
+        return _spacer
+
+
+if __name__ == "__main__":
+    import json
+
+    print(json.dumps(SubmitSpacer().stats(), indent=2))
@@ -0,0 +1,167 @@
+"""
+Tracing Module
+
+Lightweight spans around the solve stages (problem load, prompt build, LLM
+calls, local compile/run, submit, queue wait, judging, persistence):
+1. span() times a block; spans inside it inherit its attributes (problem,
+   workflow, attempt), so nested stages are labelled without passing them on
+2. Every finished span is appended to <TRACE_DIR>/<run>.jsonl right away
+3. At exit (or on write_chrome_trace()) the run is written as a Chrome
+   trace-event file, <TRACE_DIR>/<run>.trace.json, which chrome://tracing
+   and ui.perfetto.dev open directly - one row per solver thread
+
+Files are only written with TRACE_ENABLED=true. Span listeners (e.g. the
+per-stage latency histograms in core.metrics) see every span either way.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from core.config import TRACE_DIR, TRACE_ENABLED
+
+# Attributes of the innermost open span on this thread/task
+_attributes: ContextVar[Dict[str, Any]] = ContextVar("trace_attributes", default={})
+
+# Called with (name, seconds, attributes) for every finished span
+_listeners: List[Callable[[str, float, Dict[str, Any]], None]] = []
+
+
+def add_span_listener(listener: Callable[[str, float, Dict[str, Any]], None]) -> None:
+    """Get notified of every finished span (whether or not traces are written)"""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+class Tracer:
+    """Collects the spans of one run (process)"""
+
+    def __init__(self, trace_dir: str = TRACE_DIR, run_id: Optional[str] = None, enabled: bool = True):
+        self.enabled = enabled  # False: only notify span listeners
+        self.run_id = run_id or f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        self.trace_dir = Path(trace_dir)
+        self.jsonl_path = self.trace_dir / f"{self.run_id}.jsonl"
+        self.chrome_path = self.trace_dir / f"{self.run_id}.trace.json"
+        self._events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._jsonl = None
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Dict[str, Any]]:
+        """Time a block; yields its attribute dict so the block can add results (e.g. verdict)"""
+        merged = {**_attributes.get(), **attrs}
+        token = _attributes.set(merged)
+        start = time.time()
+        try:
+            yield merged
+        except BaseException as e:
+            merged["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _attributes.reset(token)
+            self.record(name, start, time.time(), **merged)
+
+    def record(self, name: str, start: float, end: Optional[float] = None, **attrs) -> None:
+        """Add a span measured elsewhere (epoch seconds); inherits the current span's attributes"""
+        end = time.time() if end is None else end
+        args = {**_attributes.get(), **attrs}
+        for listener in _listeners:
+            listener(name, end - start, args)
+        if not self.enabled:
+            return
+
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": args.get("workflow") or "solver",
+            "ph": "X",
+            "ts": round(start * 1_000_000),
+            "dur": round(max(0.0, end - start) * 1_000_000),
+            "pid": os.getpid(),
+            "tid": thread.ident,
+            "args": args,
+        }
+        with self._lock:
+            self._events.append(event)
+            self._threads.setdefault(thread.ident, thread.name)
+            if self._jsonl is None:
+                self.trace_dir.mkdir(parents=True, exist_ok=True)
+                self._jsonl = open(self.jsonl_path, "a", encoding="utf-8")
+            self._jsonl.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+            self._jsonl.flush()
+
+    def write_chrome_trace(self) -> Optional[Path]:
+        """Write every span so far as a Chrome trace-event file (None if there were none)"""
+        with self._lock:
+            if not self._events:
+                return None
+            events = list(self._events) + [
+                {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                for tid, name in self._threads.items()
+            ]
+        return write_chrome_trace(events, self.chrome_path, self.run_id)
+
+    def close(self) -> None:
+        path = self.write_chrome_trace()
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.close()
+                self._jsonl = None
+        if path:
+            print(f"🧵 Trace written: {path} (open in ui.perfetto.dev or chrome://tracing)")
+
+
+def write_chrome_trace(events: List[Dict[str, Any]], path: Path, run_id: str = "") -> Path:
+    """Write trace events in Chrome trace-event JSON format"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"run_id": run_id}},
+                  f, ensure_ascii=False, default=str)
+    return path
+
+
+def jsonl_to_chrome_trace(jsonl_path: str, output_path: Optional[str] = None) -> Path:
+    """Convert a span JSONL file (e.g. of a run that was killed) to a Chrome trace file"""
+    events = []
+    with open(jsonl_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    source = Path(jsonl_path)
+    return write_chrome_trace(events, Path(output_path) if output_path else source.with_suffix(".trace.json"), source.stem)
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """Process-wide tracer (writes files only if TRACE_ENABLED)"""
+    global _tracer
+    if _tracer is not None:
+        return _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(enabled=TRACE_ENABLED)
+            atexit.register(_tracer.close)
+        return _tracer
+
+
+def span(name: str, **attrs):
+    """get_tracer().span(...) - usage: with span("submit", attempt=2) as attrs: ..."""
+    return get_tracer().span(name, **attrs)
+
+
+def record_span(name: str, start: float, end: Optional[float] = None, **attrs) -> None:
+    """get_tracer().record(...)"""
+    get_tracer().record(name, start, end, **attrs)
@@ -4,12 +4,21 @@ Workflow Manager for Different LLM Combinations
 from typing import Dict, Any, Optional, List
 from enum import Enum
 from dataclasses import dataclass
+import json
+import threading
 import uuid
 
+from .config import LLM_RATE_LIMITS, REPLAY_MODE
+from .metrics import LLM_INFLIGHT, record_usage
+
 from .llm_providers.openai_provider import OpenAIProvider
 from .llm_providers.mistral_provider import MistralProvider
 from .llm_providers.groq_provider import GroqProvider
 from .llm_providers.deepseek_provider import DeepSeekProvider
+from .llm_providers.http_pool import aclose_async_http_client
+from .llm_providers.middleware import ProviderMiddleware, RateLimitPolicy
+from .llm_providers.usage import add_usage
+from .replay import replay_provider_class
 
 class WorkflowType(Enum):
     """Available workflow types"""
@@ -88,28 +97,63 @@ class WorkflowManager:
         )
     }
     
-    def __init__(self):
+    # Provider implementations by provider type
+    PROVIDER_CLASSES = {
+        "openai": OpenAIProvider,
+        "mistral": MistralProvider,
+        "groq": GroqProvider,
+        "deepseek": DeepSeekProvider,
+    }
+    
+    # Default limits/retry settings by "provider" or "provider/model" (the more specific key wins).
+    # Override via the policies argument or the LLM_RATE_LIMITS setting to match your account tier.
+    PROVIDER_POLICIES = {
+        "openai": RateLimitPolicy(requests_per_minute=500),
+        "mistral": RateLimitPolicy(requests_per_minute=60),
+        "groq": RateLimitPolicy(requests_per_minute=30),
+        "deepseek": RateLimitPolicy(),
+    }
+    
+    def __init__(self, policies: Optional[Dict[str, RateLimitPolicy]] = None):
+        self.policies: Dict[str, RateLimitPolicy] = {**self.PROVIDER_POLICIES, **_policies_from_env(), **(policies or {})}
         self._providers: Dict[str, Any] = {}
+        self._clients: Dict[str, Any] = {}  # provider_type -> SDK client shared by all models of that backend
         self._active_sessions: Dict[str, Dict[str, str]] = {}  # session_id -> {solution_session, hint_session}
+        # Provider-reported token usage: workflow -> role -> totals, and session_id -> role -> totals
+        self.usage_stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._session_usage: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # Workflows of one problem may run in parallel threads against the same manager
+        self._lock = threading.Lock()
     
     def _get_provider(self, provider_type: str, model_name: str):
         """Get or create a provider instance"""
         provider_key = f"{provider_type}_{model_name}"
         
-        if provider_key not in self._providers:
-            if provider_type == "openai":
-                self._providers[provider_key] = OpenAIProvider(model_name=model_name)
-            elif provider_type == "mistral":
-                self._providers[provider_key] = MistralProvider(model_name=model_name)
-            elif provider_type == "groq":
-                self._providers[provider_key] = GroqProvider(model_name=model_name)
-            elif provider_type == "deepseek":
-                self._providers[provider_key] = DeepSeekProvider(model_name=model_name)
-            else:
-                raise ValueError(f"Unknown provider type: {provider_type}")
+        with self._lock:
+            if provider_key not in self._providers:
+                provider_class = self.PROVIDER_CLASSES.get(provider_type)
+                if provider_class is None:
+                    raise ValueError(f"Unknown provider type: {provider_type}")
+                
+                if REPLAY_MODE in ("record", "replay"):
+                    provider_class = replay_provider_class(provider_class, REPLAY_MODE)
+                
+                provider = provider_class(model_name=model_name, client=self._clients.get(provider_type))
+                # One limiter per model: quotas are tracked per model by the providers
+                # (recorded responses are served without limits)
+                if REPLAY_MODE != "replay":
+                    provider.middleware = ProviderMiddleware(provider_key, self._policy_for(provider_type, model_name))
+                self._clients.setdefault(provider_type, provider.client)
+                self._providers[provider_key] = provider
         
         return self._providers[provider_key]
     
+    def _policy_for(self, provider_type: str, model_name: str) -> RateLimitPolicy:
+        """Most specific configured policy for a provider/model"""
+        return (self.policies.get(f"{provider_type}/{model_name}")
+                or self.policies.get(provider_type)
+                or RateLimitPolicy())
+    
     def create_session(self, workflow_type: WorkflowType, problem_id: str) -> str:
         """Create a new workflow session"""
         session_id = f"{problem_id}_{workflow_type.value}_{uuid.uuid4().hex[:8]}"
@@ -125,16 +169,17 @@ class WorkflowManager:
         hint_provider = self._get_provider(config.hint_provider, config.hint_model)
         
         # Create contexts (will be created when first used)
-        self._active_sessions[session_id] = {
-            "workflow_type": workflow_type.value,
-            "solution_session": solution_session_id,
-            "hint_session": hint_session_id,
-            "solution_provider": config.solution_provider,
-            "hint_provider": config.hint_provider,
-            "solution_model": config.solution_model,
-            "hint_model": config.hint_model,
-            "problem_id": problem_id
-        }
+        with self._lock:
+            self._active_sessions[session_id] = {
+                "workflow_type": workflow_type.value,
+                "solution_session": solution_session_id,
+                "hint_session": hint_session_id,
+                "solution_provider": config.solution_provider,
+                "hint_provider": config.hint_provider,
+                "solution_model": config.solution_model,
+                "hint_model": config.hint_model,
+                "problem_id": problem_id
+            }
         
         return session_id
     
@@ -150,12 +195,16 @@ class WorkflowManager:
             session_info["solution_model"]
         )
         
-        return solution_provider.generate_solution(
-            session_info["solution_session"],
-            problem_statement,
-            previous_attempts,
-            **kwargs
-        )
+        with LLM_INFLIGHT.track(provider=session_info["solution_provider"], model=session_info["solution_model"],
+                                role="solution"):
+            result = solution_provider.generate_solution(
+                session_info["solution_session"],
+                problem_statement,
+                previous_attempts,
+                **kwargs
+            )
+        self._record_usage(session_id, "solution", solution_provider.last_usage(session_info["solution_session"]))
+        return result
     
     def generate_hint(self, session_id: str, problem_statement: str, 
                      failed_solution: str, verdict: str, error_details: str, **kwargs) -> str:
@@ -169,14 +218,88 @@ class WorkflowManager:
             session_info["hint_model"]
         )
         
-        return hint_provider.generate_hint(
-            session_info["hint_session"],
-            problem_statement,
-            failed_solution,
-            verdict,
-            error_details,
-            **kwargs
+        with LLM_INFLIGHT.track(provider=session_info["hint_provider"], model=session_info["hint_model"], role="hint"):
+            result = hint_provider.generate_hint(
+                session_info["hint_session"],
+                problem_statement,
+                failed_solution,
+                verdict,
+                error_details,
+                **kwargs
+            )
+        self._record_usage(session_id, "hint", hint_provider.last_usage(session_info["hint_session"]))
+        return result
+    
+    async def agenerate_solution(self, session_id: str, problem_statement: str,
+                                 previous_attempts: Optional[List[Dict]] = None, **kwargs) -> str:
+        """Async version of generate_solution() for running many sessions on one event loop"""
+        if session_id not in self._active_sessions:
+            raise ValueError(f"Session {session_id} not found")
+        
+        session_info = self._active_sessions[session_id]
+        solution_provider = self._get_provider(
+            session_info["solution_provider"],
+            session_info["solution_model"]
+        )
+        
+        with LLM_INFLIGHT.track(provider=session_info["solution_provider"], model=session_info["solution_model"],
+                                role="solution"):
+            result = await solution_provider.agenerate_solution(
+                session_info["solution_session"],
+                problem_statement,
+                previous_attempts,
+                **kwargs
+            )
+        self._record_usage(session_id, "solution", solution_provider.last_usage(session_info["solution_session"]))
+        return result
+    
+    async def agenerate_hint(self, session_id: str, problem_statement: str,
+                             failed_solution: str, verdict: str, error_details: str, **kwargs) -> str:
+        """Async version of generate_hint()"""
+        if session_id not in self._active_sessions:
+            raise ValueError(f"Session {session_id} not found")
+        
+        session_info = self._active_sessions[session_id]
+        hint_provider = self._get_provider(
+            session_info["hint_provider"],
+            session_info["hint_model"]
         )
+        
+        with LLM_INFLIGHT.track(provider=session_info["hint_provider"], model=session_info["hint_model"], role="hint"):
+            result = await hint_provider.agenerate_hint(
+                session_info["hint_session"],
+                problem_statement,
+                failed_solution,
+                verdict,
+                error_details,
+                **kwargs
+            )
+        self._record_usage(session_id, "hint", hint_provider.last_usage(session_info["hint_session"]))
+        return result
+    
+    def _record_usage(self, session_id: str, role: str, usage: Optional[Dict[str, int]]) -> None:
+        """Add one request's usage to its workflow's and session's totals"""
+        session_info = self._active_sessions[session_id]
+        workflow = session_info["workflow_type"]
+        record_usage(session_info[f"{role}_provider"], session_info[f"{role}_model"], role, usage)
+        with self._lock:
+            add_usage(self.usage_stats.setdefault(workflow, {}).setdefault(role, {}), usage)
+            add_usage(self._session_usage.setdefault(session_id, {}).setdefault(role, {}), usage)
+    
+    def get_session_usage(self, session_id: str) -> Dict[str, Dict[str, Any]]:
+        """Token usage and prompt-cache hit rate of one session, by role (solution/hint)"""
+        with self._lock:
+            return {role: dict(totals) for role, totals in self._session_usage.get(session_id, {}).items()}
+    
+    def get_usage_stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Token usage and prompt-cache hit rate per workflow and role"""
+        with self._lock:
+            return {workflow: {role: dict(totals) for role, totals in roles.items()}
+                    for workflow, roles in self.usage_stats.items()}
+    
+    async def aclose(self) -> None:
+        """Close the running event loop's pooled HTTP connections"""
+        await aclose_async_http_client()
     
     def get_session_info(self, session_id: str) -> Dict[str, Any]:
         """Get information about a session"""
@@ -209,6 +332,19 @@ class WorkflowManager:
             }
         }
     
+    def get_solution_turns(self, session_id: str) -> List[Dict[str, int]]:
+        """Per-request token counts of a session's solution context"""
+        if session_id not in self._active_sessions:
+            return []
+        
+        session_info = self._active_sessions[session_id]
+        solution_provider = self._get_provider(
+            session_info["solution_provider"],
+            session_info["solution_model"]
+        )
+        context = solution_provider.get_context(session_info["solution_session"])
+        return list(getattr(context, "turn_stats", []))
+    
     def clear_session(self, session_id: str) -> None:
         """Clear a specific session"""
         if session_id not in self._active_sessions:
@@ -231,6 +367,7 @@ class WorkflowManager:
         
         # Remove session
         del self._active_sessions[session_id]
+        self._session_usage.pop(session_id, None)
     
     def list_workflows(self) -> Dict[str, WorkflowConfig]:
         """List available workflows"""
@@ -244,3 +381,14 @@ class WorkflowManager:
     def add_workflow(cls, workflow_type: WorkflowType, config: WorkflowConfig):
         """Add a new workflow configuration (for future extensibility)"""
         cls.WORKFLOWS[workflow_type] = config
+
+
+def _policies_from_env() -> Dict[str, RateLimitPolicy]:
+    """Parse LLM_RATE_LIMITS ({"provider[/model]": {RateLimitPolicy fields}})"""
+    if not LLM_RATE_LIMITS:
+        return {}
+    try:
+        return {key: RateLimitPolicy(**values) for key, values in json.loads(LLM_RATE_LIMITS).items()}
+    except (ValueError, TypeError) as e:
+        print(f"⚠️ Ignoring invalid LLM_RATE_LIMITS: {e}")
+        return {}
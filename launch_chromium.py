@@ -162,6 +162,31 @@ def launch_chromium(profile="Sifat", port=9222, url="https://codeforces.com"):
         print(f"❌ Failed to launch Chromium: {e}")
         return False
 
+def save_storage_state(port=9222, path=None):
+    """Export the cookies of the browser running on port as a Playwright storage state
+    (used by headless submissions and the HTTP submitter)"""
+    from playwright.sync_api import sync_playwright
+    
+    if path is None:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        from core.config import PLAYWRIGHT_STORAGE
+        path = PLAYWRIGHT_STORAGE
+    
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.connect_over_cdp(f"http://localhost:{port}")
+            if not browser.contexts:
+                print("❌ No browser contexts found. Make sure Chromium is running.")
+                return False
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            state = browser.contexts[0].storage_state(path=path)
+    except Exception as e:
+        print(f"❌ Failed to save storage state: {e}")
+        return False
+    
+    print(f"💾 Saved {len(state['cookies'])} cookies to {path}")
+    return True
+
 def main():
     import argparse
     
@@ -169,9 +194,13 @@ def main():
     parser.add_argument("--profile", default="Sifat", help="Profile name (default: Sifat)")
     parser.add_argument("--port", type=int, default=9222, help="Remote debugging port (default: 9222)")
     parser.add_argument("--url", default="https://codeforces.com", help="URL to open (default: https://codeforces.com)")
+    parser.add_argument("--save-storage", action="store_true", help="Save the running browser's login to PLAYWRIGHT_STORAGE instead of launching")
     
     args = parser.parse_args()
     
+    if args.save_storage:
+        sys.exit(0 if save_storage_state(args.port) else 1)
+    
     success = launch_chromium(args.profile, args.port, args.url)
     sys.exit(0 if success else 1)
 
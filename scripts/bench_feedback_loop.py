@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark of the feedback loop.
+
+Drives AutomatedProblemSolver over the problems/ corpus with fake LLM
+providers and a fake judge (apps/mock/fake_backends.py), so every run is
+deterministic and costs nothing. Each concurrency level runs in a fresh
+process and reports problems per hour, p50/p95 attempt latency, CPU time
+per attempt, peak RSS and how much of each attempt was simulated waiting
+versus orchestration (file writes, prompt assembly, JSON handling, locks).
+Results are printed as JSON (and optionally written to --output) so runs
+can be compared over time.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+# Add the project root to the path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from apps.mock.fake_backends import FakeJudge, LatencyModel, WaitClock, fake_provider_class
+from core.automated_solver import AutomatedProblemSolver
+from core.batch_solver import list_problem_ids
+from core.llm_providers.middleware import RateLimitPolicy
+from core.workflow_manager import WorkflowManager, WorkflowType
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (0 for no values)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def build_workflow_manager(args, clock: WaitClock) -> WorkflowManager:
+    """WorkflowManager whose providers are fakes (the solution provider answers code, the rest hints)"""
+    manager = WorkflowManager(policies={
+        provider_type: RateLimitPolicy() for provider_type in WorkflowManager.PROVIDER_CLASSES
+    })
+    manager.PROVIDER_CLASSES = {
+        provider_type: fake_provider_class(
+            provider_class,
+            kind="solution" if provider_type == "openai" else "hint",
+            latency=args.solution_latency if provider_type == "openai" else args.hint_latency,
+            clock=clock, time_scale=args.time_scale, seed=args.seed
+        )
+        for provider_type, provider_class in WorkflowManager.PROVIDER_CLASSES.items()
+    }
+    return manager
+
+
+def run_level(args, concurrency: int) -> Dict:
+    """Solve every (problem, workflow) job at one concurrency level; returns its metrics"""
+    clock = WaitClock()
+    manager = build_workflow_manager(args, clock)
+    judge = FakeJudge(verdicts=args.verdicts, queue=args.queue_latency, judging=args.judging_latency,
+                      clock=clock, time_scale=args.time_scale, seed=args.seed)
+    submit_lock = threading.Lock()
+    base_dir = tempfile.mkdtemp(prefix="bench_loop_")
+
+    problem_ids = list_problem_ids(args.problems_dir)[:args.problems]
+    jobs = [(problem_id, workflow) for problem_id in problem_ids for workflow in args.workflows]
+
+    def run_job(job):
+        problem_id, workflow = job
+        solver = AutomatedProblemSolver(
+            base_dir=base_dir, workflow_type=workflow, interactive=False,
+            # One judge tab shared by all jobs, unless --parallel-submit
+            submit_lock=threading.Lock() if args.parallel_submit else submit_lock,
+            workflow_manager=manager, submitter=judge
+        )
+        solver.local_judge = None  # the fake solutions aren't meant to pass samples
+        solver.submit_spacer = None  # the fake judge has no account to protect
+        try:
+            return solver.solve_problem(problem_id, args.max_attempts)
+        except Exception as e:
+            return {"problem_id": problem_id, "error": str(e)}
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as executor:
+        results = list(executor.map(run_job, jobs))
+    wall_seconds = time.perf_counter() - wall_start
+    cpu_seconds = time.process_time() - cpu_start
+
+    durations = []
+    for log_path in Path(base_dir).glob("*/*/solving_log.json"):
+        with open(log_path, encoding="utf-8") as f:
+            durations.extend(float(a["duration_seconds"]) for a in json.load(f).get("attempts", []))
+    attempts = len(durations)
+    waited = {kind: round(clock.total(kind), 3) for kind in ("solution", "hint", "queue", "judging")}
+    # Attempt = solution request + local steps + submission; the hint is generated between attempts
+    attempt_wait = clock.total("solution", "queue", "judging")
+
+    if not args.keep_output:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+    return {
+        "concurrency": concurrency,
+        "jobs": len(jobs),
+        "problems": len(problem_ids),
+        "attempts": attempts,
+        "accepted_jobs": sum(1 for r in results if r.get("accepted")),
+        "errors": sum(1 for r in results if "error" in r),
+        "wall_seconds": round(wall_seconds, 3),
+        "problems_per_hour": round(len(problem_ids) / wall_seconds * 3600, 1) if wall_seconds else 0.0,
+        "jobs_per_hour": round(len(jobs) / wall_seconds * 3600, 1) if wall_seconds else 0.0,
+        "attempt_latency_p50": round(percentile(durations, 50), 4),
+        "attempt_latency_p95": round(percentile(durations, 95), 4),
+        "cpu_seconds_per_attempt": round(cpu_seconds / attempts, 5) if attempts else 0.0,
+        "overhead_seconds_per_attempt": round((sum(durations) - attempt_wait) / attempts, 5) if attempts else 0.0,
+        "simulated_wait_seconds": waited,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "output_dir": base_dir if args.keep_output else None,
+    }
+
+
+def run_level_subprocess(argv: List[str], concurrency: int, verbose: bool) -> Dict:
+    """Run one level in a fresh interpreter so peak RSS isn't shared between levels"""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        result_file = f.name
+    try:
+        subprocess.run(
+            [sys.executable, __file__, *argv, "--level", str(concurrency), "--result-file", result_file],
+            cwd=PROJECT_ROOT, check=True, stdout=None if verbose else subprocess.DEVNULL
+        )
+        with open(result_file, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.unlink(result_file)
+
+
+def parse_args(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Benchmark feedback-loop throughput with fake LLMs and judge")
+    parser.add_argument("--concurrency", default="1,4,16",
+                        help="Comma separated concurrency levels (default: 1,4,16)")
+    parser.add_argument("--problems", type=int, default=20, help="Problems taken from problems/ (default: 20)")
+    parser.add_argument("--problems-dir", default="problems", help="Problem corpus (default: problems)")
+    parser.add_argument("--workflows", default="gpt5_groq,gpt5_deepseek",
+                        help="Comma separated workflows, or 'all' (default: gpt5_groq,gpt5_deepseek)")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Attempts per job (default: 3)")
+    parser.add_argument("--solution-latency", default="30,90",
+                        help="Solution model latency 'median,p95' in seconds (default: 30,90)")
+    parser.add_argument("--hint-latency", default="10,40", help="Hint model latency 'median,p95' (default: 10,40)")
+    parser.add_argument("--queue-latency", default="5,30", help="Judge queue delay 'median,p95' (default: 5,30)")
+    parser.add_argument("--judging-latency", default="3,10", help="Judging time 'median,p95' (default: 3,10)")
+    parser.add_argument("--verdicts", default=None,
+                        help='Verdict mix as JSON, e.g. \'{"Accepted": 0.4, "Wrong answer on test 2": 0.6}\'')
+    parser.add_argument("--time-scale", type=float, default=0.002,
+                        help="Multiplier for every simulated delay (default: 0.002, i.e. 30s -> 60ms)")
+    parser.add_argument("--parallel-submit", action="store_true",
+                        help="Don't serialize submissions (the real runner shares one browser tab)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of latency and verdict draws (default: 0)")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--keep-output", action="store_true", help="Keep the problems_solved-style output dirs")
+    parser.add_argument("--verbose", action="store_true", help="Show the solver's progress output")
+    parser.add_argument("--level", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+
+    args = parser.parse_args(argv)
+    args.workflows = (list(WorkflowType) if args.workflows == "all"
+                      else [WorkflowType(w.strip()) for w in args.workflows.split(",")])
+    for name in ("solution_latency", "hint_latency", "queue_latency", "judging_latency"):
+        setattr(args, name, LatencyModel.parse(getattr(args, name)))
+    args.verdicts = json.loads(args.verdicts) if args.verdicts else None
+    return args
+
+
+def main():
+    argv = sys.argv[1:]
+    args = parse_args(argv)
+
+    if args.level is not None:
+        with open(args.result_file, "w", encoding="utf-8") as f:
+            json.dump(run_level(args, args.level), f)
+        return
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    report = {
+        "benchmark": "feedback_loop",
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "problems": args.problems,
+            "workflows": [w.value for w in args.workflows],
+            "max_attempts": args.max_attempts,
+            "solution_latency": vars(args.solution_latency),
+            "hint_latency": vars(args.hint_latency),
+            "queue_latency": vars(args.queue_latency),
+            "judging_latency": vars(args.judging_latency),
+            "verdicts": args.verdicts,
+            "time_scale": args.time_scale,
+            "parallel_submit": args.parallel_submit,
+            "seed": args.seed,
+        },
+        "levels": [],
+    }
+    for level in levels:
+        print(f"⏱️  concurrency {level}...", file=sys.stderr)
+        result = run_level_subprocess(argv, level, args.verbose)
+        print(f"   {result['problems_per_hour']} problems/h, p50 {result['attempt_latency_p50']}s, "
+              f"p95 {result['attempt_latency_p95']}s, {result['cpu_seconds_per_attempt'] * 1000:.1f}ms CPU/attempt, "
+              f"{result['peak_rss_mb']} MB peak RSS", file=sys.stderr)
+        report["levels"].append(result)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark GPT-5 response chaining against resending the whole history.
+
+Runs a multi-attempt solving conversation through OpenAIProvider against the
+mock Responses server (apps/mock/responses_server.py), once with
+previous_response_id chaining and once without, and prints per-attempt
+latency plus billed (uncached) input tokens.
+"""
+
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+# Add the project root to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import openai
+import uvicorn
+
+from apps.mock.responses_server import create_app
+from core.llm_providers.openai_provider import OpenAIProvider
+
+
+def start_server(app) -> str:
+    """Run the mock server in a background thread; returns its base URL"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/v1"
+
+
+def run_conversation(base_url: str, app, chain: bool, attempts: int, statement: str):
+    """One solving session; returns [(attempt, seconds, input_tokens, cached_tokens)]"""
+    provider = OpenAIProvider(api_key="mock", model_name="gpt-5",
+                              client=openai.OpenAI(api_key="mock", base_url=base_url))
+    provider.chain_responses = chain
+    session_id = f"bench_{'chained' if chain else 'full'}"
+
+    rows = []
+    previous = None
+    for attempt in range(1, attempts + 1):
+        start = time.time()
+        code = provider.generate_solution(session_id, statement, previous)
+        elapsed = time.time() - start
+        usage = app.state.requests[-1]
+        rows.append((attempt, elapsed, usage["input_tokens"], usage["input_tokens_details"]["cached_tokens"]))
+        previous = [{
+            "attempt": attempt,
+            "solution_code": code,
+            "verdict": f"Wrong answer on test {attempt + 1}",
+            "test_results": [{"test_number": attempt + 1, "input": "1 2", "expected": "3", "output": "4",
+                              "passed": False}],
+            "hint": "Check the overflow when adding the two numbers. " * 20
+        }]
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GPT-5 previous_response_id chaining offline")
+    parser.add_argument("--attempts", type=int, default=5, help="Attempts per conversation (default: 5)")
+    parser.add_argument("--statement-chars", type=int, default=12000,
+                        help="Size of the synthetic problem statement (default: 12000)")
+    args = parser.parse_args()
+
+    app = create_app()
+    base_url = start_server(app)
+    statement = ("Given two integers a and b, print their sum. " * (args.statement_chars // 45 + 1))[:args.statement_chars]
+
+    results = {}
+    for chain in (False, True):
+        results[chain] = run_conversation(base_url, app, chain, args.attempts, statement)
+
+    print("\n" + "="*72)
+    print(f"{'attempt':>7} | {'full history':>28} | {'chained':>28}")
+    print(f"{'':>7} | {'seconds':>8} {'input':>8} {'billed':>9} | {'seconds':>8} {'input':>8} {'billed':>9}")
+    print("-"*72)
+    totals = {False: [0.0, 0], True: [0.0, 0]}
+    for full, chained in zip(results[False], results[True]):
+        cells = []
+        for chain, (_, seconds, input_tokens, cached) in ((False, full), (True, chained)):
+            billed = input_tokens - cached
+            totals[chain][0] += seconds
+            totals[chain][1] += billed
+            cells.append(f"{seconds:8.2f} {input_tokens:8d} {billed:9d}")
+        print(f"{full[0]:>7} | {cells[0]} | {cells[1]}")
+    print("-"*72)
+    print(f"{'total':>7} | {totals[False][0]:8.2f} {'':8} {totals[False][1]:9d} | "
+          f"{totals[True][0]:8.2f} {'':8} {totals[True][1]:9d}")
+
+
+if __name__ == "__main__":
+    main()
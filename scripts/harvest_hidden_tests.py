@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Harvest hidden Codeforces tests from saved submission responses.
+
+Scans problems_solved/<problem_id>/<workflow>/api_responses/submission_*.json,
+stores every revealed input/answer pair as a HIDDEN TestCase (deduped per
+problem) so the local judge can replay them before the next submission.
+"""
+
+import argparse
+import os
+import sys
+
+# Add the project root to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.db import init_db
+from core.hidden_tests import harvest_directory, load_hidden_tests
+
+def main():
+    parser = argparse.ArgumentParser(description="Store revealed Codeforces tests as hidden test cases")
+    parser.add_argument("--base-dir", default="problems_solved",
+                        help="Directory with solved problem folders (default: problems_solved)")
+    args = parser.parse_args()
+    
+    print("Initializing database...")
+    init_db()
+    
+    print(f"🔍 Scanning {args.base_dir}/ for submission responses...")
+    added = harvest_directory(args.base_dir)
+    
+    print("\n" + "="*50)
+    print("✅ Hidden test harvest complete!")
+    print("="*50)
+    print(f"New hidden tests: {sum(added.values())} across {len(added)} problems")
+    for problem_id, count in sorted(added.items()):
+        total = len(load_hidden_tests(problem_id, include_truncated=True))
+        usable = len(load_hidden_tests(problem_id))
+        print(f"  - {problem_id}: +{count} (total {total}, {total - usable} truncated)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Tests for the streamed C++ completion parser (core/llm_providers/code_stream.py)"""
+
+import pytest
+
+from core.llm_providers.code_stream import CodeStreamParser
+
+PROGRAM = "#include <bits/stdc++.h>\nint main()\n{\n    return 0;\n}\n"
+HELPER = "int helper(int x)\n{\n    if (x)\n        return 1;\n    else\n        return 2;\n}\n"
+
+
+def _feed(text: str, chunk_size: int = 1):
+    """Feed text in small chunks; returns (complete, characters fed when it completed)"""
+    parser = CodeStreamParser()
+    for start in range(0, len(text), chunk_size):
+        if parser.feed(text[start:start + chunk_size]):
+            return True, len(parser.text)
+    return False, len(parser.text)
+
+
+def test_fenced_program_completes_at_closing_fence():
+    text = "Here is my solution:\n```cpp\n" + PROGRAM + "```\nThe idea is to ...\n"
+    complete, fed = _feed(text)
+    assert complete
+    assert text[:fed] == "Here is my solution:\n```cpp\n" + PROGRAM + "```\n"
+
+
+@pytest.mark.parametrize("chunk_size", [2, 7, 64])
+def test_chunking_does_not_change_the_result(chunk_size):
+    text = "```cpp\n" + PROGRAM + HELPER + "```\nThe idea is to ...\n"
+    complete, fed = _feed(text, chunk_size)
+    assert complete
+    assert "```\n" in text[:fed] and fed >= len("```cpp\n" + PROGRAM + HELPER + "```\n")
+
+
+def test_fence_without_main_does_not_complete():
+    assert not _feed("```cpp\nint helper() { return 1; }\n```\nNow main:\n")[0]
+
+
+def test_unfenced_program_stops_at_prose():
+    text = PROGRAM + "This solution runs in O(n).\nMore words\n"
+    complete, fed = _feed(text)
+    assert complete
+    assert text[:fed] == PROGRAM + "This solution runs in O(n).\n"
+
+
+@pytest.mark.parametrize("helper", [
+    HELPER,
+    "struct Node\n{\npublic:\n    int value;\n};\n",
+    "int f(int n)\n{\n    int i = 0;\n    do\n    {\n        i++;\n    } while (i < n);\n    return i;\n}\n",
+    "long long mul(long long a, long long b)\n{\n    return a * b\n        % 1000000007;\n}\n",
+])
+def test_helper_after_main_is_not_prose(helper):
+    text = PROGRAM + helper + "Explanation follows\n"
+    complete, fed = _feed(text)
+    assert complete
+    assert text[:fed] == PROGRAM + helper + "Explanation follows\n"
+
+
+def test_prototype_is_not_main():
+    text = "int main();\nint helper()\n{\n    return 1;\n}\nNot done yet\n"
+    assert not _feed(text)[0]
+
+
+@pytest.mark.parametrize("body", [
+    '    std::cout << "}}} done" << \'}\' << std::endl;\n',
+    "    // closing } in a comment\n",
+    "    /* a { block\n       comment } */\n",
+])
+def test_braces_in_strings_and_comments_are_ignored(body):
+    text = "int main()\n{\n" + body + "    return 0;\n}\nDone.\n"
+    complete, fed = _feed(text)
+    assert complete
+    assert text[:fed].endswith("Done.\n")
@@ -0,0 +1,80 @@
+"""Tests for the compile cache (core/compile_cache.py)"""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from core.compile_cache import CompileCache, normalize_source
+from core.runner_local import CF_CPP_FLAGS
+
+pytestmark = pytest.mark.skipif(shutil.which("g++") is None, reason="g++ not found")
+
+SOURCE = "#include <cstdio>\nint main() { std::puts(\"42\"); }\n"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CompileCache(cache_dir=str(tmp_path / "cache"), use_pch=False)
+
+
+def _compile(cache, tmp_path, source, name="main"):
+    workdir = tmp_path / f"work_{name}"
+    workdir.mkdir()
+    output = str(workdir / "main")
+    return (*cache.compile(source, CF_CPP_FLAGS, output), output)
+
+
+def _run(binary: str) -> str:
+    return subprocess.run([binary], stdout=subprocess.PIPE, text=True, timeout=10).stdout
+
+
+def test_normalize_source_drops_generated_header():
+    header = "/*\n * Generated: 2026-01-01 12:00\n * Workflow: a\n */\n"
+    assert normalize_source(header + "int main() {}  \r\n\r\n") == "\n\n\n\nint main() {}\n"
+    assert normalize_source("/* user comment */\nint main() {}\n") == "/* user comment */\nint main() {}\n"
+
+
+def test_hit_after_miss(cache, tmp_path):
+    header = "/*\n * Generated: {}\n */\n"
+    ok, _, hit, first = _compile(cache, tmp_path, header.format("2026-01-01 12:00") + SOURCE, "first")
+    assert ok and not hit
+    assert _run(first) == "42\n"
+
+    # Another timestamp and line endings share the cache entry
+    source = header.format("2026-01-02 08:30") + SOURCE.replace("\n", "  \r\n")
+    ok, _, hit, second = _compile(cache, tmp_path, source, "second")
+    assert ok and hit
+    assert _run(second) == "42\n"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_compile_errors_are_cached(cache, tmp_path):
+    ok, output, hit, _ = _compile(cache, tmp_path, "int main() { oops }\n", "first")
+    assert not ok and not hit and "oops" in output
+    ok, cached_output, hit, _ = _compile(cache, tmp_path, "int main() { oops }\n", "second")
+    assert not ok and hit and cached_output == output
+
+
+def test_evicted_between_lookup_and_use_rebuilds(cache, tmp_path, monkeypatch):
+    _compile(cache, tmp_path, SOURCE, "first")
+    place = cache._place
+
+    def evicted_place(binary, output_path):
+        # Another process evicts the entry right after our exists() check
+        os.unlink(binary)
+        place(binary, output_path)
+
+    monkeypatch.setattr(cache, "_place", evicted_place)
+    ok, _, hit, binary = _compile(cache, tmp_path, SOURCE, "second")
+    assert ok and not hit
+    assert _run(binary) == "42\n"
+    assert cache.stats()["misses"] == 2
+
+
+def test_eviction_keeps_cache_within_bound(tmp_path):
+    cache = CompileCache(cache_dir=str(tmp_path / "cache"), max_size_mb=0, use_pch=False)
+    ok, _, _, binary = _compile(cache, tmp_path, SOURCE)
+    assert ok and _run(binary) == "42\n"
+    assert cache.stats()["size_bytes"] == 0
@@ -0,0 +1,58 @@
+"""Tests for DeepSeek's own conversation history (core/llm_providers/deepseek_provider.py)"""
+
+from types import SimpleNamespace
+
+from core.llm_providers.context_policy import ContextPolicy, count_message_tokens
+from core.llm_providers.deepseek_provider import DeepSeekProvider
+
+FAILED_SOLUTION = "#include <bits/stdc++.h>\nint main() {\n" + "    solve();\n" * 400 + "}\n"
+
+
+class _FakeCompletions:
+    def __init__(self):
+        self.requests = []
+
+    def create(self, **params):
+        self.requests.append(params["messages"])
+        message = SimpleNamespace(content=f"hint {len(self.requests)}", reasoning_content="thinking")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def _provider(max_prompt_tokens=3000):
+    completions = _FakeCompletions()
+    provider = DeepSeekProvider(api_key="test", client=SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    provider.context_policy = ContextPolicy(max_prompt_tokens=max_prompt_tokens, keep_recent_messages=2)
+    return provider, completions
+
+
+def _hint(provider, turn):
+    return provider.generate_hint("s", "Statement " * 200, FAILED_SOLUTION + f"// {turn}\n", "Wrong answer", "")
+
+
+def test_hint_requests_stay_within_the_policy_budget():
+    provider, completions = _provider()
+    for turn in range(6):
+        response = _hint(provider, turn)
+        assert response.startswith("**Reasoning Process:**")
+
+    sizes = [count_message_tokens(messages) for messages in completions.requests]
+    # Past the budget, old turns are summarized or dropped: the history keeps growing, requests don't
+    assert sizes[-1] <= sizes[2] < 2 * 3000
+    assert count_message_tokens(provider.get_context("s")) > 2 * sizes[-1]
+
+    summary = provider.get_context_summary("s")
+    assert [t["turn"] for t in summary["turns"]] == list(range(1, 7))
+    assert summary["saved_tokens"] > 0
+    assert summary["prompt_tokens"] == sum(sizes)
+
+
+def test_history_keeps_only_final_answers():
+    provider, _ = _provider()
+    provider.generate_hint("s", "Statement", "int main() {}", "Wrong answer", "")
+    history = provider.get_context("s")
+    assert history[-1] == {"role": "assistant", "content": "hint 1"}
+    assert provider.get_context_summary("s")["turns"][0]["turn"] == 1
+
+    provider.clear_context("s")
+    assert provider.get_context_summary("s") == {}
+    assert provider.last_usage("s") is None
@@ -0,0 +1,164 @@
+"""Tests for the HTTP submitter (core/http_submitter.py) against apps/mock/codeforces_server.py"""
+
+import json
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+import uvicorn
+
+from apps.mock.codeforces_server import create_app
+from core import http_submitter
+from core.http_submitter import HttpSubmitter, verdict_text
+
+VERDICTS = {"2045A": "OK", "2045B": "WRONG_ANSWER", "2045C": "COMPILATION_ERROR", "2045D": "TIME_LIMIT_EXCEEDED"}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def _serve(app):
+    """Run a mock app in a background uvicorn server; yields its base URL"""
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while not server.started:
+        if time.time() > deadline:
+            pytest.fail("mock Codeforces server did not start")
+        time.sleep(0.05)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+def _mock_app(**kwargs):
+    return create_app(queue_seconds=0.2, seconds_per_test=0.05,
+                      judge=lambda code, source: VERDICTS.get(code, "OK"), **kwargs)
+
+
+@pytest.fixture(scope="module")
+def mock_cf():
+    app = _mock_app()
+    with _serve(app) as base_url:
+        yield app, base_url
+
+
+@pytest.fixture(autouse=True)
+def fast_polls(monkeypatch):
+    monkeypatch.setattr(http_submitter, "MIN_POLL_SEC", 0.1)
+    monkeypatch.setattr(http_submitter, "MAX_POLL_SEC", 0.3)
+
+
+def _solution(tmp_path, name: str, body: str) -> str:
+    path = tmp_path / name
+    path.write_text(body, encoding="utf-8")
+    return str(path)
+
+
+def _submitter(base_url, tmp_path, **kwargs) -> HttpSubmitter:
+    options = {"username": "tester", "password": "secret", "lang_id": 54, "poll_timeout": 15}
+    options.update(kwargs)
+    return HttpSubmitter(base_url=base_url, storage_path=str(tmp_path / "storage_state.json"), **options)
+
+
+@pytest.mark.parametrize("letter, verdict, accepted", [
+    ("A", "Accepted", True),
+    ("B", "Wrong answer on test 2", False),
+    ("C", "Compilation error", False),
+    ("D", "Time limit exceeded on test 2", False),
+])
+def test_submit_reports_verdict(mock_cf, tmp_path, letter, verdict, accepted):
+    app, base_url = mock_cf
+    source = _solution(tmp_path, f"{letter}.cpp", f"int main() {{ return 0; }} // {letter} {tmp_path.name}\n")
+    events = []
+
+    with _submitter(base_url, tmp_path) as submitter:
+        result = submitter.submit(source, 2045, letter, api_dir=str(tmp_path / "api"), on_event=events.append)
+
+    assert result.error is None
+    assert result.verdict == verdict
+    assert result.accepted is accepted
+    assert result.submission_id == str(app.state.submissions[-1]["id"])
+    assert result.extra["submit_method"] == "http"
+    assert result.extra["status_polls"] >= 1
+    assert [event["event"] for event in events] == ["submitted", "verdict"]
+
+    # Test details were fetched from data/submitSource and saved
+    assert result.api_response_file and (tmp_path / "api").is_dir()
+    saved = json.loads(open(result.api_response_file, encoding="utf-8").read())
+    assert saved == result.api_response
+    assert app.state.submissions[-1]["program_type_id"] == "54"
+
+
+def test_cookie_jar_reused_without_credentials(mock_cf, tmp_path):
+    app, base_url = mock_cf
+    with _submitter(base_url, tmp_path) as submitter:
+        assert submitter.submit(_solution(tmp_path, "a.cpp", f"// first {tmp_path.name}\n"), 2045, "A",
+                                api_dir=str(tmp_path / "api")).accepted
+    logins = app.state.requests["logins"]
+
+    # A fresh submitter logs in through the saved cookies and finds the handle in the page header
+    with _submitter(base_url, tmp_path, username=None, password=None) as submitter:
+        result = submitter.submit(_solution(tmp_path, "b.cpp", f"// second {tmp_path.name}\n"), 2045, "A",
+                                  api_dir=str(tmp_path / "api"))
+    assert result.accepted
+    assert app.state.requests["logins"] == logins
+
+
+def test_rejected_form_is_an_error(mock_cf, tmp_path):
+    _, base_url = mock_cf
+    source = _solution(tmp_path, "dup.cpp", f"// duplicate {tmp_path.name}\n")
+    with _submitter(base_url, tmp_path) as submitter:
+        assert submitter.submit(source, 2045, "A", api_dir=str(tmp_path / "api")).accepted
+        result = submitter.submit(source, 2045, "A", api_dir=str(tmp_path / "api"))
+    assert result.verdict is None
+    assert "exactly the same code" in result.error
+
+
+@pytest.mark.parametrize("redirect", ["/submissions/{handle}", "/problemset/status?my=on&back=/problemset/submit"])
+def test_redirect_away_from_submit_page_is_a_success(tmp_path, redirect):
+    with _serve(_mock_app(submitted_redirect=redirect)) as base_url, \
+            _submitter(base_url, tmp_path) as submitter:
+        result = submitter.submit(_solution(tmp_path, "a.cpp", "int main() {}\n"), 2045, "B",
+                                  api_dir=str(tmp_path / "api"))
+    assert result.error is None
+    assert result.verdict == "Wrong answer on test 2"
+
+
+def test_session_without_known_handle_is_an_error(tmp_path):
+    with _serve(_mock_app(profile_link=False)) as base_url:
+        with _submitter(base_url, tmp_path) as submitter:
+            assert submitter.submit(_solution(tmp_path, "a.cpp", "// first\n"), 2045, "A",
+                                    api_dir=str(tmp_path / "api")).accepted
+
+        # The saved session is logged in, but nothing on the page names its handle
+        start = time.time()
+        with _submitter(base_url, tmp_path, username=None, password=None) as submitter:
+            result = submitter.submit(_solution(tmp_path, "b.cpp", "// second\n"), 2045, "A")
+    assert "handle was not found" in result.error
+    assert time.time() - start < 5
+
+
+def test_wrong_password_is_an_error(mock_cf, tmp_path):
+    _, base_url = mock_cf
+    with _submitter(base_url, tmp_path, password="wrong") as submitter:
+        result = submitter.submit(_solution(tmp_path, "a.cpp", "int main() {}\n"), 2045, "A")
+    assert "login failed" in result.error
+
+
+def test_verdict_text():
+    assert verdict_text({"verdict": "TESTING", "passedTestCount": 3}) is None
+    assert verdict_text({}) is None
+    assert verdict_text({"verdict": "OK", "passedTestCount": 12}) == "Accepted"
+    assert verdict_text({"verdict": "RUNTIME_ERROR", "passedTestCount": 4}) == "Runtime error on test 5"
+    assert verdict_text({"verdict": "COMPILATION_ERROR", "passedTestCount": 0}) == "Compilation error"
@@ -0,0 +1,117 @@
+"""Tests for the persistent job queue (core/job_queue.py)"""
+
+import threading
+import time
+
+import pytest
+from sqlmodel import SQLModel, create_engine
+
+from core.job_queue import JobQueue, job_id
+from core.models import JobStatus
+from core.workflow_manager import WorkflowType
+
+WORKFLOW = WorkflowType.GPT_MISTRAL
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'queue.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _queue(engine, **kwargs) -> JobQueue:
+    queue = JobQueue(engine, **{"lease_seconds": 60, "max_claims": 3, **kwargs})
+    queue.enqueue(["2045_A", "2045_B"], [WORKFLOW])
+    return queue
+
+
+def test_enqueue_is_idempotent(engine):
+    queue = _queue(engine)
+    assert queue.enqueue(["2045_A", "2045_C"], [WORKFLOW]) == 1
+    assert queue.stats()["pending"] == 3
+
+
+def test_claim_in_order_then_complete(engine):
+    queue = _queue(engine)
+
+    first = queue.claim("w1")
+    second = queue.claim("w2")
+    assert (first.id, second.id) == (job_id("2045_A", WORKFLOW.value), job_id("2045_B", WORKFLOW.value))
+    assert queue.claim("w3") is None
+
+    # Only the lease owner may finish a job
+    assert not queue.complete(first.id, "w2", "accepted")
+    assert queue.complete(first.id, "w1", "accepted")
+    stats = queue.stats()
+    assert stats["done"] == 1 and stats["running"] == 1
+
+
+def test_expired_lease_is_reclaimed(engine):
+    queue = _queue(engine, lease_seconds=0.2)
+    job = queue.claim("crashed")
+    queue.claim("other")
+    time.sleep(0.3)
+    assert queue.stats()["expired_leases"] == 2
+
+    reclaimed = queue.claim("w2")
+    assert reclaimed.id == job.id
+    assert reclaimed.lease_owner == "w2" and reclaimed.claims == 2
+
+    # The crashed worker lost its lease: its heartbeat and completion are refused
+    assert not queue.heartbeat(job.id, "crashed")
+    assert not queue.complete(job.id, "crashed", "accepted")
+    assert queue.heartbeat(job.id, "w2")
+
+
+def test_lease_expiring_too_often_fails_the_job(engine):
+    queue = JobQueue(engine, lease_seconds=0.1, max_claims=2)
+    queue.enqueue(["2045_A"], [WORKFLOW])
+    assert queue.claim("w1").claims == 1
+    time.sleep(0.15)
+    assert queue.claim("w2").claims == 2
+    time.sleep(0.15)
+
+    # The second expiry used up the claims: the job is failed instead of handed out again
+    assert queue.claim("w3") is None
+    stats = queue.stats()
+    assert stats["failed"] == 1 and stats["running"] == 0
+
+
+def test_fail_retries_until_claims_run_out(engine):
+    queue = _queue(engine, max_claims=2)
+    job = queue.claim("w1")
+    assert queue.fail(job.id, "w1", "boom")
+    assert queue.claim("w1").id == job.id
+    assert queue.fail(job.id, "w1", "boom again")
+    assert queue.stats()["failed"] == 1
+    assert queue.requeue() == 1
+    assert queue.stats()["pending"] == 2
+
+
+def test_release_does_not_count_a_claim(engine):
+    queue = _queue(engine)
+    job = queue.claim("w1")
+    assert queue.release(job.id, "w1")
+    assert queue.claim("w2").claims == 1
+
+
+def test_concurrent_claims_never_share_a_job(engine):
+    queue = JobQueue(engine, lease_seconds=60)
+    queue.enqueue([f"2045_{i}" for i in range(20)], [WORKFLOW])
+    claimed = []
+
+    def worker(name):
+        while True:
+            job = JobQueue(engine, lease_seconds=60).claim(name)
+            if job is None:
+                return
+            claimed.append(job.id)
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(claimed) == 20 and len(set(claimed)) == 20
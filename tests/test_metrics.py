@@ -0,0 +1,21 @@
+"""Tests for verdict mapping in core/metrics.py"""
+
+import pytest
+
+from core.metrics import Verdict, verdict_code
+
+
+@pytest.mark.parametrize("text, code", [
+    ("Accepted", Verdict.AC),
+    ("Wrong answer on test 5", Verdict.WA),
+    ("WA", Verdict.WA),
+    ("Time limit exceeded on test 12", Verdict.TLE),
+    ("Compilation error", Verdict.CE),
+    ("Runtime error on sample test 1 (local judge)", Verdict.RE),
+    ("Timeout", Verdict.JUDGE_TIMEOUT),
+    ("Running on test 3", Verdict.JUDGE_TIMEOUT),
+    (None, Verdict.ERROR),
+    ("Denial of judgement", Verdict.ERROR),
+])
+def test_verdict_code(text, code):
+    assert verdict_code(text) == code
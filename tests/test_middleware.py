@@ -0,0 +1,115 @@
+"""Tests for provider rate limiting, retries and circuit breaking (core/llm_providers/middleware.py)"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from core.llm_providers.middleware import (CircuitOpenError, ProviderAPIError, ProviderMiddleware, RateLimitPolicy,
+                                           TokenBucket, parse_retry_after)
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def _middleware(**policy) -> ProviderMiddleware:
+    return ProviderMiddleware("test", RateLimitPolicy(**{"base_delay": 0.01, "max_delay": 0.05, **policy}))
+
+
+class _Flaky:
+    """Fails with the given errors first, then answers"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, messages, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def test_retries_transient_errors():
+    middleware = _middleware()
+    fn = _Flaky(ProviderAPIError("busy", status_code=429, retry_after=0.01), ProviderAPIError("down", status_code=503))
+    assert middleware.call(fn, MESSAGES) == "ok"
+    assert fn.calls == 3
+    assert middleware.stats["calls"] == 3 and middleware.stats["retries"] == 2
+
+
+def test_client_errors_are_not_retried():
+    middleware = _middleware()
+    fn = _Flaky(ProviderAPIError("bad request", status_code=400))
+    with pytest.raises(ProviderAPIError):
+        middleware.call(fn, MESSAGES)
+    assert fn.calls == 1 and middleware.stats["retries"] == 0
+
+
+def test_gives_up_after_max_retries():
+    middleware = _middleware(max_retries=2, failure_threshold=10)
+    fn = _Flaky(*[ProviderAPIError("down", status_code=502)] * 5)
+    with pytest.raises(ProviderAPIError):
+        middleware.call(fn, MESSAGES)
+    assert fn.calls == 3
+
+
+def test_async_call_retries():
+    middleware = _middleware()
+    flaky = _Flaky(ProviderAPIError("busy", status_code=429))
+
+    async def fn(messages, **kwargs):
+        return flaky(messages, **kwargs)
+
+    assert asyncio.run(middleware.acall(fn, MESSAGES)) == "ok"
+    assert flaky.calls == 2
+
+
+def test_retry_after_headers():
+    assert parse_retry_after(httpx.Headers({"retry-after-ms": "1500"})) == 1.5
+    assert parse_retry_after(httpx.Headers({"retry-after": "3"})) == 3.0
+    assert parse_retry_after(httpx.Headers({})) is None
+
+    response = httpx.Response(429, headers={"retry-after": "2"}, request=httpx.Request("POST", "https://x"))
+    error = ProviderAPIError.wrap("test", httpx.HTTPStatusError("busy", request=response.request, response=response))
+    assert error.status_code == 429 and error.retry_after == 2.0 and error.retryable
+    assert ProviderAPIError.wrap("test", httpx.ConnectError("refused")).retryable
+
+
+def test_throttle_waits_for_the_request_bucket():
+    middleware = _middleware(requests_per_minute=600)
+    middleware.request_bucket = TokenBucket(600, capacity=1)  # one request every 0.1s, no burst
+    start = time.monotonic()
+    for _ in range(3):
+        middleware.call(lambda messages, **kwargs: "ok", MESSAGES)
+    assert time.monotonic() - start >= 0.18
+    assert middleware.stats["throttled_seconds"] >= 0.18
+
+
+def test_circuit_opens_then_probes_and_closes():
+    middleware = _middleware(max_retries=0, failure_threshold=2, reset_timeout=0.2)
+    for _ in range(2):
+        with pytest.raises(ProviderAPIError):
+            middleware.call(_Flaky(ProviderAPIError("down", status_code=500)), MESSAGES)
+    assert middleware.breaker.state == "open"
+
+    fn = _Flaky()
+    with pytest.raises(CircuitOpenError):
+        middleware.call(fn, MESSAGES)
+    assert fn.calls == 0
+
+    time.sleep(0.25)
+    assert middleware.call(fn, MESSAGES) == "ok"
+    assert middleware.breaker.state == "closed"
+
+
+def test_stats_are_exact_under_concurrency():
+    middleware = _middleware()
+    threads = [threading.Thread(target=lambda: [middleware.call(lambda m, **k: "ok", MESSAGES) for _ in range(300)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert middleware.stats["calls"] == 2400
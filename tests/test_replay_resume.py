@@ -0,0 +1,12 @@
+"""Tests for the resume default of replay runs (core/replay.py)"""
+
+import pytest
+
+import core.replay
+from core.replay import resume_by_default
+
+
+@pytest.mark.parametrize("mode, expected", [("off", True), ("record", True), ("replay", False)])
+def test_replay_runs_start_over_by_default(monkeypatch, mode, expected):
+    monkeypatch.setattr(core.replay, "REPLAY_MODE", mode)
+    assert resume_by_default() is expected
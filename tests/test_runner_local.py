@@ -0,0 +1,83 @@
+"""Tests for the local judge (core/runner_local.py)"""
+
+import shutil
+
+import pytest
+
+from core.compile_cache import CompileCache
+from core.runner_local import LocalJudge, allows_multiple_answers, output_ignores_case, outputs_match
+
+needs_gxx = pytest.mark.skipif(shutil.which("g++") is None, reason="g++ not found")
+
+ECHO_SOURCE = """
+#include <bits/stdc++.h>
+int main() { std::string s; while (std::cin >> s) std::cout << s << "\\n"; }
+"""
+
+
+@pytest.fixture
+def judge(tmp_path):
+    return LocalJudge(time_limit_sec=1, max_workers=2,
+                      compile_cache=CompileCache(cache_dir=str(tmp_path / "cache"), use_pch=False))
+
+
+def test_outputs_match_tokens_and_floats():
+    assert outputs_match("1 2\n3\n", "1  2 3")
+    assert not outputs_match("1 2 3", "1 2")
+    assert outputs_match("0.500000", "0.5000001")
+    assert not outputs_match("0.5", "0.51")
+    assert not outputs_match("10", "10.0")
+
+
+def test_outputs_match_case():
+    assert not outputs_match("YES\nNO", "Yes\nno")
+    assert outputs_match("YES\nNO", "Yes\nno", ignore_case=True)
+
+
+def test_statement_heuristics():
+    assert output_ignores_case('You can output the answer in any case (upper or lower).')
+    assert output_ignores_case('print "NO" (case-insensitive)')
+    assert not output_ignores_case("Print YES or NO.")
+    assert allows_multiple_answers("If there are multiple answers, print any of them.")
+    assert not allows_multiple_answers("Print the minimum number of operations.")
+
+
+@needs_gxx
+def test_judge_verdicts(judge):
+    assert judge.judge(ECHO_SOURCE, [("a b", "a b")]).verdict == "AC"
+
+    result = judge.judge(ECHO_SOURCE, [("a", "a"), ("b", "c")])
+    assert result.verdict == "WA"
+    assert result.blocks_submission
+    assert result.failed_test.index == 2
+    assert result.describe() == "Wrong answer on sample test 2 (local judge)"
+
+    result = judge.judge("int main() { return 1; }", [("", "")])
+    assert result.verdict == "RE" and result.blocks_submission
+
+    result = judge.judge("int main() { syntax error }", [("", "")])
+    assert result.verdict == "CE" and result.compile_output
+
+    result = judge.judge("int main() { for (;;); }", [("", "")])
+    assert result.verdict == "TLE" and not result.blocks_submission
+
+
+@needs_gxx
+def test_judge_case_insensitive_output(judge):
+    tests = [("YES NO", "Yes\nno")]
+
+    result = judge.judge(ECHO_SOURCE, tests, ignore_case=True)
+    assert result.verdict == "AC"
+
+    # Without an "in any case" statement a case-only difference must not block the submission
+    result = judge.judge(ECHO_SOURCE, tests)
+    assert result.verdict == "WA"
+    assert result.inconclusive and result.failed_test.case_mismatch
+    assert not result.blocks_submission
+
+
+@needs_gxx
+def test_judge_multiple_answers_is_inconclusive(judge):
+    result = judge.judge(ECHO_SOURCE, [("1 2", "2 1")], allow_multiple_answers=True)
+    assert result.verdict == "WA"
+    assert result.inconclusive and not result.blocks_submission
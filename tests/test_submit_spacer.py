@@ -0,0 +1,147 @@
+"""Tests for the cross-process submission spacer (core/submit_spacer.py)"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from core.automated_solver import AutomatedProblemSolver
+from core.submission_result import SubmissionResult
+from core.submit_spacer import SubmitSpacer
+from core.workflow_manager import WorkflowType
+
+SPACING = 0.3
+
+
+@pytest.fixture
+def spacer_path(tmp_path):
+    return str(tmp_path / "spacer.db")
+
+
+def _spacer(path, **kwargs) -> SubmitSpacer:
+    return SubmitSpacer(path, **{"spacing_seconds": SPACING, "burst": 1, "account": "tester", **kwargs})
+
+
+def _grants(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT workflow, granted_at FROM grant_log ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def _wait_for_waiters(spacer, count):
+    deadline = time.time() + 5
+    while spacer.stats()["waiting"] < count:
+        assert time.time() < deadline, "waiters did not register"
+        time.sleep(0.01)
+
+
+def test_burst_then_spacing(spacer_path):
+    spacer = _spacer(spacer_path, burst=2)
+    assert spacer.acquire() < 0.1
+    assert spacer.acquire() < 0.1
+    waited = spacer.acquire()
+    assert SPACING * 0.8 <= waited < SPACING * 3
+
+
+def test_spacing_holds_across_instances(spacer_path):
+    # Separate instances stand in for separate processes sharing the file
+    threads = [threading.Thread(target=_spacer(spacer_path).acquire, args=(f"w{i % 2}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    granted_at = [at for _, at in _grants(spacer_path)]
+    assert len(granted_at) == 4
+    gaps = [later - earlier for earlier, later in zip(granted_at, granted_at[1:])]
+    assert min(gaps) >= SPACING * 0.95
+
+
+def test_quiet_workflow_is_not_starved(spacer_path):
+    spacer = _spacer(spacer_path)
+    spacer.acquire("warmup")  # empty the bucket so every waiter below has to queue
+
+    busy = [threading.Thread(target=_spacer(spacer_path).acquire, args=("busy",)) for _ in range(4)]
+    for thread in busy:
+        thread.start()
+    _wait_for_waiters(spacer, 4)
+    quiet = threading.Thread(target=_spacer(spacer_path).acquire, args=("quiet",))
+    quiet.start()
+    for thread in [*busy, quiet]:
+        thread.join()
+
+    # One busy submission goes first (it queued first), then the quiet workflow's turn comes
+    order = [workflow for workflow, _ in _grants(spacer_path)][1:]
+    assert order[:2] == ["busy", "quiet"]
+    stats = spacer.stats()["per_workflow"]
+    assert stats["busy"]["grants"] == 4 and stats["quiet"]["grants"] == 1
+
+
+def test_accounts_do_not_share_a_bucket(spacer_path):
+    _spacer(spacer_path, account="alice").acquire()
+    assert _spacer(spacer_path, account="bob").acquire() < 0.1
+
+
+def test_stale_waiters_are_dropped(spacer_path):
+    spacer = _spacer(spacer_path)
+    conn = sqlite3.connect(spacer_path)
+    with conn:
+        # A waiter left behind by a crashed process, queued ahead of everyone
+        stale = time.time() - 120
+        conn.execute("INSERT INTO waiter (account, workflow, enqueued_at, seen_at) VALUES (?, ?, ?, ?)",
+                     ("tester", "crashed", stale, stale))
+    conn.close()
+
+    assert spacer.acquire() < 0.1
+    assert spacer.stats()["waiting"] == 0
+
+
+class _RecordingSubmitter:
+    """Stands in for the browser: records which workflow submitted, in order"""
+
+    def __init__(self):
+        self.order = []
+
+    def submit(self, solution_file, contest_id, problem_letter, api_dir="api_responses", on_event=None):
+        self.order.append(solution_file)
+        time.sleep(0.05)
+        return SubmissionResult(submission_id=str(len(self.order)), verdict="Accepted", accepted=True)
+
+
+def test_workflows_sharing_a_submit_lock_are_served_fairly(spacer_path, tmp_path):
+    # One process, two workflows, one browser tab: the lock must not decide who goes next
+    lock = threading.Lock()
+    submitter = _RecordingSubmitter()
+    spacer = _spacer(spacer_path)
+    spacer.acquire("warmup")
+
+    def solver(workflow):
+        return AutomatedProblemSolver(base_dir=str(tmp_path / "solved"), workflow_type=workflow, interactive=False,
+                                      submit_lock=lock, workflow_manager=object(), submitter=submitter,
+                                      local_judge=object(), submit_spacer=_spacer(spacer_path))
+
+    problem = SimpleNamespace(contest_id=2045, letter="a")
+    busy, quiet = solver(WorkflowType.GPT_MISTRAL), solver(WorkflowType.GPT_GROQ)
+    spans = []
+
+    def submit(solver_, name):
+        attrs = {}
+        solver_._submit_in_turn(Path(name), "Sifat", problem, tmp_path / "api", attrs)
+        spans.append(attrs)
+
+    threads = [threading.Thread(target=submit, args=(busy, WorkflowType.GPT_MISTRAL.value)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    _wait_for_waiters(spacer, 3)
+    threads.append(threading.Thread(target=submit, args=(quiet, WorkflowType.GPT_GROQ.value)))
+    threads[-1].start()
+    for thread in threads:
+        thread.join()
+
+    assert submitter.order[:2] == [WorkflowType.GPT_MISTRAL.value, WorkflowType.GPT_GROQ.value]
+    assert all("spacing_wait_seconds" in attrs and "lock_wait_seconds" in attrs for attrs in spans)